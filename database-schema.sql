@@ -34,8 +34,18 @@ CREATE TABLE IF NOT EXISTS customers (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_by INT,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    -- Normalised search keys (see _search_terms in lambdas/customers)
+    search_name VARCHAR(200) AS (LOWER(TRIM(REGEXP_REPLACE(customer_name, '[^[:alnum:]]+', ' ')))) STORED,
+    phone_digits VARCHAR(20) AS (RIGHT(REGEXP_REPLACE(phone, '[^0-9]', ''), 10)) STORED,
+    search_gst VARCHAR(20) AS (UPPER(REGEXP_REPLACE(gst_number, '[^[:alnum:]]', ''))) STORED,
     INDEX idx_customer_name (customer_name),
     INDEX idx_is_active (is_active),
+    INDEX idx_created_at (created_at),
+    INDEX idx_search_name (search_name),
+    INDEX idx_phone_digits (phone_digits),
+    INDEX idx_search_gst (search_gst),
+    INDEX idx_email (email),
+    FULLTEXT INDEX ft_customer_name (customer_name, contact_person),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -57,9 +67,9 @@ CREATE TABLE IF NOT EXISTS sales_invoices (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_by INT,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_customer_id (customer_id),
+    INDEX idx_customer_id (customer_id, invoice_date),
     INDEX idx_invoice_number (invoice_number),
-    INDEX idx_invoice_date (invoice_date),
+    INDEX idx_invoice_date (invoice_date, created_at),
     FOREIGN KEY (customer_id) REFERENCES customers(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
@@ -96,6 +106,9 @@ CREATE TABLE IF NOT EXISTS delivery_challans (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_customer_id (customer_id),
     INDEX idx_delivery_date (delivery_date),
+    INDEX idx_vehicle_number (vehicle_number),
+    INDEX idx_status (status),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (customer_id) REFERENCES customers(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
@@ -118,6 +131,7 @@ CREATE TABLE IF NOT EXISTS weight_bridge_reports (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_vehicle_number (vehicle_number),
     INDEX idx_weighing_date (weighing_date),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -138,6 +152,7 @@ CREATE TABLE IF NOT EXISTS purchase_orders (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_po_number (po_number),
     INDEX idx_vendor_name (vendor_name),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -158,6 +173,8 @@ CREATE TABLE IF NOT EXISTS sales_orders (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_order_number (order_number),
     INDEX idx_customer_id (customer_id),
+    INDEX idx_status (status),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (customer_id) REFERENCES customers(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
@@ -179,6 +196,7 @@ CREATE TABLE IF NOT EXISTS quotations (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_quotation_number (quotation_number),
     INDEX idx_customer_id (customer_id),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (customer_id) REFERENCES customers(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
@@ -199,6 +217,7 @@ CREATE TABLE IF NOT EXISTS mix_designs (
     updated_by INT,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_design_name (design_name),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -220,6 +239,7 @@ CREATE TABLE IF NOT EXISTS recipes (
     updated_by INT,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_recipe_name (recipe_name),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (mix_design_id) REFERENCES mix_designs(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
@@ -243,6 +263,8 @@ CREATE TABLE IF NOT EXISTS cube_tests (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_test_number (test_number),
     INDEX idx_test_date (test_date),
+    INDEX idx_test_status (test_status),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (mix_design_id) REFERENCES mix_designs(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
@@ -264,6 +286,7 @@ CREATE TABLE IF NOT EXISTS batch_lists (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_batch_number (batch_number),
     INDEX idx_production_date (production_date),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (mix_design_id) REFERENCES mix_designs(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
@@ -285,7 +308,8 @@ CREATE TABLE IF NOT EXISTS aggregates (
     updated_by INT,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_vendor_name (vendor_name),
-    INDEX idx_payment_status (payment_status),
+    INDEX idx_payment_status (payment_status, purchase_date),
+    INDEX idx_created_at (created_at),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -300,16 +324,150 @@ CREATE TABLE IF NOT EXISTS cash_book (
     reference_number VARCHAR(50),
     category VARCHAR(50),
     payment_mode VARCHAR(50),
+    -- Customer a receipt (credit) was received from, for statements
+    customer_id INT,
     created_by INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_by INT,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_transaction_date (transaction_date),
     INDEX idx_transaction_type (transaction_type),
+    INDEX idx_created_at (created_at),
+    INDEX idx_customer_id (customer_id, transaction_date),
+    FOREIGN KEY (customer_id) REFERENCES customers(id),
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (updated_by) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Daily rollups maintained by lambdas/utils/rollups.py
+-- Backfill after creating: python -m utils.rollups (from lambdas/)
+CREATE TABLE IF NOT EXISTS daily_revenue (
+    rollup_date DATE PRIMARY KEY,
+    invoice_count INT NOT NULL DEFAULT 0,
+    revenue_total DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS daily_deliveries (
+    rollup_date DATE PRIMARY KEY,
+    challan_count INT NOT NULL DEFAULT 0,
+    quantity_total DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS daily_customer_deliveries (
+    rollup_date DATE NOT NULL,
+    customer_id INT NOT NULL,
+    challan_count INT NOT NULL DEFAULT 0,
+    quantity_total DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (rollup_date, customer_id),
+    INDEX idx_customer_id (customer_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Response cache (lambdas/utils/cache.py)
+-- Change counter per table, bumped by every write through the API
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS response_cache (
+    cache_key VARCHAR(191) PRIMARY KEY,
+    body MEDIUMTEXT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    INDEX idx_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Cash book monthly movement and closing balances (lambdas/utils/cash_balances.py)
+-- Backfill after creating: python -m utils.cash_balances (from lambdas/)
+CREATE TABLE IF NOT EXISTS cash_book_monthly (
+    period_start DATE PRIMARY KEY,
+    credit_total DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    debit_total DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    net_total DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    closing_credit DECIMAL(18, 2) NOT NULL DEFAULT 0.00,
+    closing_debit DECIMAL(18, 2) NOT NULL DEFAULT 0.00,
+    closing_balance DECIMAL(18, 2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Purchase and pending-payment totals per vendor (lambdas/utils/vendor_totals.py)
+-- Backfill after creating: python -m utils.vendor_totals (from lambdas/)
+CREATE TABLE IF NOT EXISTS vendor_aggregate_totals (
+    vendor_name VARCHAR(200) PRIMARY KEY,
+    purchase_count INT NOT NULL DEFAULT 0,
+    total_quantity DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    total_amount DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    pending_count INT NOT NULL DEFAULT 0,
+    pending_amount DECIMAL(16, 2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Customer closing balances per period end (lambdas/utils/statements.py)
+-- Build after a period closes: python -m utils.statements --period-end YYYY-MM-DD
+CREATE TABLE IF NOT EXISTS customer_balance_snapshots (
+    customer_id INT NOT NULL,
+    period_end DATE NOT NULL,
+    balance DECIMAL(16, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (customer_id, period_end)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Report jobs (lambdas/utils/report_engine.py)
+-- Artifacts live in the blob store under artifact_key
+CREATE TABLE IF NOT EXISTS report_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    report_id VARCHAR(50) NOT NULL,
+    params TEXT NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    params_hash CHAR(40) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    artifact_key VARCHAR(255),
+    row_count INT,
+    byte_count BIGINT,
+    error TEXT,
+    created_by INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    finished_at DATETIME,
+    INDEX idx_params_hash (params_hash, id),
+    FOREIGN KEY (created_by) REFERENCES users(id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Indexes for databases created before they were added
+-- (run each once against an existing database)
+-- ALTER TABLE customers ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE customers
+--     ADD COLUMN search_name VARCHAR(200) AS (LOWER(TRIM(REGEXP_REPLACE(customer_name, '[^[:alnum:]]+', ' ')))) STORED,
+--     ADD COLUMN phone_digits VARCHAR(20) AS (RIGHT(REGEXP_REPLACE(phone, '[^0-9]', ''), 10)) STORED,
+--     ADD COLUMN search_gst VARCHAR(20) AS (UPPER(REGEXP_REPLACE(gst_number, '[^[:alnum:]]', ''))) STORED,
+--     ADD INDEX idx_search_name (search_name),
+--     ADD INDEX idx_phone_digits (phone_digits),
+--     ADD INDEX idx_search_gst (search_gst),
+--     ADD FULLTEXT INDEX ft_customer_name (customer_name, contact_person);
+-- ALTER TABLE customers ADD INDEX idx_email (email);
+-- ALTER TABLE sales_invoices DROP INDEX idx_invoice_date, ADD INDEX idx_invoice_date (invoice_date, created_at);
+-- ALTER TABLE delivery_challans ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE delivery_challans ADD INDEX idx_vehicle_number (vehicle_number), ADD INDEX idx_status (status);
+-- ALTER TABLE weight_bridge_reports ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE purchase_orders ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE sales_orders ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE sales_orders ADD INDEX idx_status (status);
+-- ALTER TABLE quotations ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE mix_designs ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE recipes ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE cube_tests ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE cube_tests ADD INDEX idx_test_status (test_status);
+-- ALTER TABLE batch_lists ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE aggregates ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE cash_book ADD INDEX idx_created_at (created_at);
+-- ALTER TABLE sales_invoices DROP INDEX idx_customer_id, ADD INDEX idx_customer_id (customer_id, invoice_date);
+-- ALTER TABLE cash_book ADD COLUMN customer_id INT AFTER payment_mode,
+--     ADD INDEX idx_customer_id (customer_id, transaction_date),
+--     ADD FOREIGN KEY (customer_id) REFERENCES customers(id);
+-- ALTER TABLE aggregates DROP INDEX idx_payment_status, ADD INDEX idx_payment_status (payment_status, purchase_date);
+
 -- Insert default admin user (password: admin123)
 -- Password hash is bcrypt hash of 'admin123'
 -- ⚠️ SECURITY WARNING: Change this password immediately after deployment!
@@ -4,54 +4,141 @@ Aggregates Lambda Functions
 
 import sys
 import os
+import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils import db, auth, response
-from utils.error_handler import async_handler
+from utils import db, auth, response, pagination, vendor_totals
+from utils.error_handler import async_handler, ValidationError
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('aggregates')
+# Sort key for payment_pending, served by idx_payment_status
+# (payment_status, purchase_date); MySQL puts NULL dates last in DESC order
+PENDING_KEYSET_COLUMNS = ['purchase_date', 'id']
+
+# One ordered, index-backed branch per pending status (see _pending_query)
+PENDING_BRANCH_SQL = '''
+    (SELECT * FROM aggregates
+     WHERE {status}{conditions}
+     ORDER BY purchase_date DESC, id DESC
+     LIMIT %s)
+'''
+
+handler = create_crud_handler(
+    'aggregates',
+    on_change=vendor_totals.record_change,
+    filters={
+        'vendor_name': 'eq',
+        'payment_status': 'in'
+    },
+    cached=True
+)
 
 list_aggregates = handler['list']
+export_aggregates = handler['export']
 get_aggregate = handler['get_by_id']
 create_aggregate = handler['create']
 update_aggregate = handler['update']
 delete_aggregate = handler['delete']
 
 
+def _date_param(query_params, name):
+    """Read an optional YYYY-MM-DD query parameter"""
+    value = query_params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValidationError(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def _after_cursor(after):
+    """
+    Condition selecting rows after a (purchase_date, id) cursor in DESC order
+    
+    pagination.keyset_condition cannot compare against a NULL date, and
+    undated purchases sort after every dated one.
+    
+    Returns:
+        Tuple of (sql, params)
+    """
+    purchase_date, record_id = after
+    if purchase_date is None:
+        return '(purchase_date IS NULL AND id < %s)', [record_id]
+    return (
+        '(purchase_date < %s OR (purchase_date = %s AND id < %s) OR purchase_date IS NULL)',
+        [purchase_date, purchase_date, record_id]
+    )
+
+
+def _pending_query(conditions, params, limit):
+    """
+    Pending purchases as one sorted range scan per status
+    
+    WHERE payment_status = 'pending' OR payment_status IS NULL cannot be read
+    in index order, so each status is fetched as its own LIMITed branch in
+    (purchase_date, id) order and the two short branches are merged.
+    
+    Returns:
+        Tuple of (sql, params)
+    """
+    extra = ''.join(f' AND {condition}' for condition in conditions)
+    branches = [
+        PENDING_BRANCH_SQL.format(status=status, conditions=extra)
+        for status in ("payment_status = 'pending'", 'payment_status IS NULL')
+    ]
+    sql = f"{' UNION ALL '.join(branches)} ORDER BY {pagination.order_by(PENDING_KEYSET_COLUMNS)} LIMIT %s"
+    return sql, tuple(params + [limit]) * 2 + (limit,)
+
+
 @async_handler
 def by_vendor(event, context):
     """
     Get aggregates by vendor
     GET /aggregates/by-vendor
+    Totals are kept per vendor in vendor_aggregate_totals by aggregate writes
     """
     auth.validate_request(event)
     
-    aggregates = db.query('''
-        SELECT vendor_name,
-               SUM(quantity) as total_quantity,
-               SUM(amount) as total_amount
-        FROM aggregates
-        GROUP BY vendor_name
-        ORDER BY vendor_name
-    ''')
-    
-    return response.success(aggregates)
+    return response.success(vendor_totals.summary())
 
 
 @async_handler
 def payment_pending(event, context):
     """
-    Get payment pending aggregates
+    Get payment pending aggregates, newest purchase first
     GET /aggregates/payment-pending
+    Query: purchase_date_from, purchase_date_to, limit and cursor (nextCursor
+    of the previous page)
     """
     auth.validate_request(event)
     
-    aggregates = db.query('''
-        SELECT * FROM aggregates
-        WHERE payment_status = 'pending' OR payment_status IS NULL
-        ORDER BY created_at DESC
-    ''')
+    query_params = event.get('queryStringParameters') or {}
+    limit = pagination.get_limit(query_params)
+    after = pagination.decode_cursor(query_params.get('cursor'), PENDING_KEYSET_COLUMNS)
+    
+    conditions, params = [], []
+    date_from = _date_param(query_params, 'purchase_date_from')
+    date_to = _date_param(query_params, 'purchase_date_to')
+    if date_from:
+        conditions.append('purchase_date >= %s')
+        params.append(date_from)
+    if date_to:
+        conditions.append('purchase_date <= %s')
+        params.append(date_to)
+    if after is not None:
+        condition, condition_params = _after_cursor(after)
+        conditions.append(condition)
+        params.extend(condition_params)
+    
+    sql, sql_params = _pending_query(conditions, params, limit + 1)
+    aggregates, next_cursor = pagination.keyset_page(db.query(sql, sql_params), PENDING_KEYSET_COLUMNS, limit)
     
-    return response.success(aggregates)
+    return response.success({
+        'data': aggregates,
+        'pagination': {
+            'limit': limit,
+            'nextCursor': next_cursor
+        }
+    })
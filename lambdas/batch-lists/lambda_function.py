@@ -3,10 +3,19 @@ import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('batch_lists')
+handler = create_crud_handler(
+    'batch_lists',
+    filters={
+        'production_date': 'range',
+        'mix_design_id': 'in'
+    },
+    sort_keys=('production_date',)
+)
 
 list_batches = handler['list']
+export_batches = handler['export']
 get_batch = handler['get_by_id']
 create_batch = handler['create']
 update_batch = handler['update']
 delete_batch = handler['delete']
+bulk_batches = handler['bulk']
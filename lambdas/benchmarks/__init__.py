@@ -0,0 +1 @@
+# Offline benchmarks for the Lambda handlers (not packaged for deployment)
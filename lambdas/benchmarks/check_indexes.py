@@ -0,0 +1,47 @@
+"""
+CRUD Filter Index Check
+Verifies every declared list filter and sort key has a supporting index
+
+Loads each Lambda built on create_crud_handler, runs its check_indexes()
+against the database configured by the DB_* environment variables and
+exits non-zero if any filter or sort column is not the leading column of
+an index.
+
+Usage:
+    python -m benchmarks.check_indexes
+"""
+
+import json
+import sys
+
+from benchmarks.common import lambda_modules, load_function
+
+
+def check():
+    """
+    Run check_indexes() for every CRUD Lambda
+    
+    Returns:
+        List of failure messages (empty when every filter is indexed)
+    """
+    failures = []
+    for module in lambda_modules():
+        handler = getattr(load_function(module), 'handler', None)
+        if not isinstance(handler, dict) or 'check_indexes' not in handler:
+            continue
+        unindexed = handler['check_indexes']()
+        print(json.dumps({'module': module, 'unindexed': unindexed}))
+        for column in unindexed:
+            failures.append(f'{module}: {column} has no index')
+    return failures
+
+
+def main():
+    failures = check()
+    for failure in failures:
+        print(f'FAIL {failure}', file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
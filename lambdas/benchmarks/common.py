@@ -0,0 +1,101 @@
+"""
+Benchmark Helpers
+Loads Lambda entry points and builds API Gateway events for local runs
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import importlib.util
+from urllib.parse import urlencode
+
+LAMBDAS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, LAMBDAS_DIR)
+
+
+def lambda_modules():
+    """Directory names of every Lambda with a lambda_function.py"""
+    return sorted(
+        name for name in os.listdir(LAMBDAS_DIR)
+        if os.path.isfile(os.path.join(LAMBDAS_DIR, name, 'lambda_function.py'))
+    )
+
+
+def load_function(module):
+    """
+    Import lambdas/<module>/lambda_function.py under a unique module name
+    
+    Args:
+        module: Lambda directory name, e.g. 'sales-invoices'
+    """
+    name = f"lambda_{module.replace('-', '_')}"
+    if name in sys.modules:
+        return sys.modules[name]
+    path = os.path.join(LAMBDAS_DIR, module, 'lambda_function.py')
+    spec = importlib.util.spec_from_file_location(name, path)
+    lambda_module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = lambda_module
+    spec.loader.exec_module(lambda_module)
+    return lambda_module
+
+
+def make_event(token=None, body=None, path_parameters=None, query=None, headers=None, route=None):
+    """
+    Build an API Gateway proxy event for a handler call
+    
+    With route (an HTTP API route key such as 'GET /api/customers/{id}') the
+    event also carries the payload 2.0 routing fields: routeKey, rawPath,
+    rawQueryString and requestContext.http.
+    """
+    event_headers = {'Content-Type': 'application/json'}
+    if token:
+        event_headers['Authorization'] = f'Bearer {token}'
+    event_headers.update(headers or {})
+    event = {
+        'headers': event_headers,
+        'pathParameters': path_parameters,
+        'queryStringParameters': query,
+        'body': json.dumps(body) if body is not None else None
+    }
+    if route:
+        method, path = route.split(' ', 1)
+        for name, value in (path_parameters or {}).items():
+            path = path.replace(f'{{{name}}}', str(value))
+        event.update(
+            version='2.0',
+            routeKey=route,
+            rawPath=path,
+            rawQueryString=urlencode(query or {}),
+            requestContext={'http': {'method': method, 'path': path}, 'stage': '$default'}
+        )
+    return event
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(samples):
+    """p50/p95/p99/max summary of millisecond samples"""
+    return {
+        'runs': len(samples),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'max_ms': round(max(samples), 3) if samples else 0.0
+    }
@@ -0,0 +1,119 @@
+"""
+Customer Search Benchmark
+Compares the old four-column LIKE '%term%' search with list_customers search=
+
+Seeds synthetic customers (city = 'BENCH') into the database configured by
+the DB_* and JWT_SECRET environment variables, times both searches for name,
+multi-word, phone and GST terms, then deletes the seeded rows. Use a scratch
+database.
+
+Usage:
+    python -m benchmarks.customer_search [--customers 100000] [--runs 20]
+"""
+
+import argparse
+import json
+import random
+
+from benchmarks.common import load_function, make_event, summarize, timed
+from utils import auth, db
+
+BENCH_CITY = 'BENCH'
+
+FIRST_WORDS = ['Sri', 'Balaji', 'Lakshmi', 'Ganesh', 'Venkateswara', 'Sai', 'Durga', 'Krishna']
+SECOND_WORDS = ['Constructions', 'Builders', 'Infra', 'Developers', 'Projects', 'Estates', 'Engineers']
+
+# Search term per scenario, matched against the seeded data
+SEARCHES = {
+    'name_prefix': 'Balaji',
+    'multi_word': 'Sai Infra',
+    'phone': '98450',
+    'gst': '29ABCDE12',
+    'email': 'customer1234@example.com'
+}
+
+# Search as it was before indexed search: page query plus a COUNT(*)
+LEGACY_WHERE = '''is_active = 1 AND (customer_name LIKE %s OR contact_person LIKE %s
+                  OR phone LIKE %s OR email LIKE %s)'''
+
+
+def _seed(count, batch_size=1000):
+    """Insert count synthetic customers in multi-row batches"""
+    rng = random.Random(42)
+    sql = '''INSERT INTO customers (customer_name, contact_person, phone, email, gst_number, city, is_active, created_by)
+             VALUES (%s, %s, %s, %s, %s, %s, 1, 1)'''
+    for start in range(0, count, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, count)):
+            name = f'{rng.choice(FIRST_WORDS)} {rng.choice(SECOND_WORDS)} {i}'
+            rows.append((
+                name,
+                f'Contact {i}',
+                f'+91 {rng.randint(6000000000, 9999999999)}',
+                f'customer{i}@example.com',
+                f'29ABCDE{i % 10000:04d}F1Z{i % 10}',
+                BENCH_CITY
+            ))
+        db.execute_many(sql, rows)
+
+
+def _legacy_search(term, limit=50):
+    """Run the old leading-wildcard search (page and count)"""
+    pattern = f'%{term}%'
+    params = (pattern,) * 4
+    db.query(
+        f'SELECT * FROM customers WHERE {LEGACY_WHERE} ORDER BY created_at DESC LIMIT %s OFFSET 0',
+        params + (limit,)
+    )
+    db.query(f'SELECT COUNT(*) as total FROM customers WHERE {LEGACY_WHERE}', params)
+
+
+def run(customers, runs, seed=True):
+    """Benchmark both searches and return latency summaries per scenario"""
+    handlers = load_function('customers')
+    token = auth.generate_token({'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'role': 'admin'})
+    
+    if seed:
+        _seed(customers)
+    results = {}
+    
+    try:
+        for scenario, term in SEARCHES.items():
+            legacy_ms, indexed_ms = [], []
+            for _ in range(runs):
+                _, elapsed = timed(_legacy_search, term)
+                legacy_ms.append(elapsed)
+                
+                event = make_event(token, query={'search': term, 'limit': '50'})
+                result, elapsed = timed(handlers.list_customers, event, None)
+                if result['statusCode'] != 200:
+                    raise RuntimeError(f"list_customers failed: {result['body']}")
+                indexed_ms.append(elapsed)
+            
+            page_info = json.loads(result['body'])['data']['pagination']
+            results[scenario] = {
+                'term': term,
+                'legacy_like': summarize(legacy_ms),
+                'indexed_search': summarize(indexed_ms),
+                'matches': page_info['total'],
+                'totalMode': page_info['totalMode']
+            }
+    finally:
+        if seed:
+            db.execute('DELETE FROM customers WHERE city = %s', (BENCH_CITY,))
+    
+    return {'customers': customers, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--customers', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--no-seed', action='store_true', help='Search the existing rows, do not seed or clean up')
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.customers, args.runs, seed=not args.no_seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
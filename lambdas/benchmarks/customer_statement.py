@@ -0,0 +1,183 @@
+"""
+Customer Statement Benchmark
+Times the single-query statement against a month-by-month build
+
+Seeds one customer (city = 'BENCH') with --transactions invoices and cash
+book receipts spread over five years into the database configured by the
+DB_* and JWT_SECRET environment variables, then times:
+    full            - whole history, one ordered window query
+    handler         - GET /customers/{id}/statement for the whole history
+    last_month      - last month, opening balance summed from history
+    last_month_snap - last month, opening balance from a period snapshot
+    per_month       - two queries per month with the balance carried in Python
+Every scenario must reach the same closing balance. Seeded rows are
+deleted afterwards. Use a scratch database.
+
+Usage:
+    python -m benchmarks.customer_statement [--transactions 20000] [--runs 10]
+"""
+
+import argparse
+import datetime
+import json
+import random
+import sys
+from decimal import Decimal
+
+from benchmarks.common import load_function, make_event, summarize, timed
+from utils import auth, db, statements
+
+BENCH_CITY = 'BENCH'
+START_DATE = datetime.date(2021, 1, 1)
+DAYS = 5 * 365
+
+# Share of seeded transactions that are invoices (the rest are receipts)
+INVOICE_SHARE = 0.6
+
+
+def _seed(transactions, batch_size=1000):
+    """Insert the benchmark customer and its invoices and receipts"""
+    rng = random.Random(7)
+    customer_id = db.execute(
+        "INSERT INTO customers (customer_name, city, created_by) VALUES ('Bench Statement Customer', %s, 1)",
+        (BENCH_CITY,)
+    )['last_insert_id']
+    
+    invoices = int(transactions * INVOICE_SHARE)
+    invoice_rows = [
+        (
+            customer_id, f'BENCH-STMT-{customer_id}-{i}',
+            START_DATE + datetime.timedelta(days=i * DAYS // invoices),
+            f'{rng.uniform(5000, 400000):.2f}'
+        )
+        for i in range(invoices)
+    ]
+    receipts = transactions - invoices
+    receipt_rows = [
+        (
+            START_DATE + datetime.timedelta(days=i * DAYS // receipts),
+            f'{rng.uniform(5000, 600000):.2f}', f'BENCH-RCPT-{i}', customer_id
+        )
+        for i in range(receipts)
+    ]
+    
+    for start in range(0, len(invoice_rows), batch_size):
+        db.execute_many(
+            '''INSERT INTO sales_invoices (customer_id, invoice_number, invoice_date, total_amount, created_by)
+               VALUES (%s, %s, %s, %s, 1)''',
+            invoice_rows[start:start + batch_size]
+        )
+    for start in range(0, len(receipt_rows), batch_size):
+        db.execute_many(
+            '''INSERT INTO cash_book (transaction_date, transaction_type, amount, reference_number, category, customer_id)
+               VALUES (%s, 'credit', %s, %s, 'BENCH', %s)''',
+            receipt_rows[start:start + batch_size]
+        )
+    return customer_id
+
+
+def _cleanup(customer_id):
+    """Delete the benchmark customer and everything seeded for it"""
+    db.execute('DELETE FROM customer_balance_snapshots WHERE customer_id = %s', (customer_id,))
+    db.execute('DELETE FROM cash_book WHERE customer_id = %s', (customer_id,))
+    db.execute('DELETE FROM sales_invoices WHERE customer_id = %s', (customer_id,))
+    db.execute('DELETE FROM customers WHERE id = %s', (customer_id,))
+
+
+def _single_query(customer_id, date_from=None):
+    """Statement via statements.build, returning the closing balance"""
+    sql, params, opening, _ = statements.build(customer_id, date_from)
+    rows = db.query(sql, tuple(params))
+    return rows[-1]['balance'] if rows else opening
+
+
+def _per_month(customer_id):
+    """Statement built month by month, returning the closing balance"""
+    balance = Decimal('0')
+    month = START_DATE
+    end = START_DATE + datetime.timedelta(days=DAYS)
+    while month <= end:
+        next_month = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        invoices = db.query(
+            '''SELECT invoice_date, total_amount FROM sales_invoices
+               WHERE customer_id = %s AND invoice_date >= %s AND invoice_date < %s''',
+            (customer_id, month, next_month)
+        )
+        receipts = db.query(
+            '''SELECT transaction_date, amount FROM cash_book
+               WHERE customer_id = %s AND transaction_type = 'credit'
+                 AND transaction_date >= %s AND transaction_date < %s''',
+            (customer_id, month, next_month)
+        )
+        entries = sorted(
+            [(row['invoice_date'], 0, row['total_amount']) for row in invoices]
+            + [(row['transaction_date'], 1, -row['amount']) for row in receipts]
+        )
+        for _, _, amount in entries:
+            balance += amount
+        month = next_month
+    return balance
+
+
+def run(transactions, runs):
+    """Benchmark each scenario and return latency summaries"""
+    handlers = load_function('customers')
+    token = auth.generate_token({'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'role': 'admin'})
+    
+    customer_id = _seed(transactions)
+    last_day = START_DATE + datetime.timedelta(days=DAYS)
+    month_start = last_day.replace(day=1)
+    results = {}
+    
+    try:
+        scenarios = {
+            'full': lambda: _single_query(customer_id),
+            'handler': lambda: handlers.get_statement(
+                make_event(token, path_parameters={'id': str(customer_id)}), None
+            ),
+            'last_month': lambda: _single_query(customer_id, month_start.isoformat()),
+            'per_month': lambda: _per_month(customer_id)
+        }
+        closing = {}
+        for name, scenario in scenarios.items():
+            samples = []
+            for _ in range(runs):
+                closing[name], elapsed = timed(scenario)
+                samples.append(elapsed)
+            results[name] = summarize(samples)
+        
+        statements.rebuild_snapshots(month_start - datetime.timedelta(days=1), customer_id)
+        samples = []
+        for _ in range(runs):
+            closing['last_month_snap'], elapsed = timed(_single_query, customer_id, month_start.isoformat())
+            samples.append(elapsed)
+        results['last_month_snap'] = summarize(samples)
+    finally:
+        _cleanup(customer_id)
+    
+    if closing['handler']['statusCode'] != 200:
+        raise RuntimeError(f"get_statement failed: {closing['handler']['body']}")
+    consistent = closing['full'] == closing['per_month'] == closing['last_month'] == closing['last_month_snap']
+    return {
+        'transactions': transactions,
+        'closingBalance': str(closing['full']),
+        'consistent': consistent,
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    
+    report = run(args.transactions, args.runs)
+    print(json.dumps(report, indent=2))
+    if not report['consistent']:
+        print('FAIL closing balances differ between scenarios', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
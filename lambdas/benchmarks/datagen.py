@@ -0,0 +1,256 @@
+"""
+Benchmark Data Generator
+Seeds invoices, challans and cash book entries at a chosen scale
+
+Inserts synthetic customers (city = GEN_MARKER), sales invoices with line
+items, delivery challans, cash book entries (a third of them receipts
+linked to a customer) and aggregate purchases into the database configured
+by the DB_* environment variables, spread over five years of dates. The
+rollup, cash book snapshot and vendor total tables are rebuilt afterwards,
+since seeding bypasses the handlers that keep them current. Rows are
+generated from a fixed seed, so two databases seeded at the same scale hold
+the same data. Use a scratch database; --clean deletes everything seeded.
+
+Scales (rows each of invoices, challans and cash book entries):
+    10k  -     10,000
+    1m   -  1,000,000
+    10m  - 10,000,000
+
+Usage:
+    python -m benchmarks.datagen --scale 10k
+    python -m benchmarks.datagen --clean
+"""
+
+import argparse
+import datetime
+import json
+import random
+import sys
+import time
+
+from utils import db, rollups, cash_balances, vendor_totals
+
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+
+# Marks seeded customers (city), cash book entries (category) and purchases (notes)
+GEN_MARKER = 'BENCHGEN'
+GEN_PREFIX = 'GEN-'
+START_DATE = datetime.date(2021, 1, 1)
+DAYS = 5 * 365
+
+# Line items per invoice, and purchases per 100 invoices
+ITEMS_PER_INVOICE = 2
+AGGREGATES_PER_100 = 5
+
+BATCH_SIZE = 5000
+
+VENDORS = ['Sri Ram Quarry', 'Balaji Sand Suppliers', 'Lakshmi Cements', 'Ganesh Aggregates', 'Durga Minerals']
+GRADES = ['M15', 'M20', 'M25', 'M30', 'M35', 'M40']
+
+
+def customer_count(rows):
+    """Customers for a scale: one per 100 invoices, between 100 and 100,000"""
+    return max(100, min(100_000, rows // 100))
+
+
+def _day(i, total):
+    """Date of the i-th of total rows, evenly spread over the date range"""
+    return START_DATE + datetime.timedelta(days=i * DAYS // total)
+
+
+def _batches(total, build):
+    """Yield (start, rows) for rows built by build(i) in BATCH_SIZE chunks"""
+    for start in range(0, total, BATCH_SIZE):
+        yield start, [build(i) for i in range(start, min(start + BATCH_SIZE, total))]
+
+
+def _progress(label, done, total, started):
+    """Report insert progress on stderr"""
+    elapsed = time.perf_counter() - started
+    print(f'{label}: {done:,}/{total:,} ({elapsed:.0f}s)', file=sys.stderr)
+
+
+def _seed_customers(count, rng):
+    """Insert count customers and return their ids"""
+    db.execute_many(
+        '''INSERT INTO customers (customer_name, contact_person, phone, gst_number, city, is_active, created_by)
+           VALUES (%s, %s, %s, %s, %s, 1, 1)''',
+        [
+            (
+                f'Gen Customer {i:06d}', f'Contact {i}',
+                f'+91 {rng.randint(6000000000, 9999999999)}',
+                f'29GENCU{i % 10000:04d}F1Z{i % 10}', GEN_MARKER
+            )
+            for i in range(count)
+        ]
+    )
+    return [row['id'] for row in db.query('SELECT id FROM customers WHERE city = %s ORDER BY id', (GEN_MARKER,))]
+
+
+def _seed_invoices(total, customers, rng):
+    """Insert invoices in batches, each followed by its line items"""
+    started = time.perf_counter()
+    
+    def build(i):
+        subtotal = round(rng.uniform(20000, 400000), 2)
+        tax = round(subtotal * 0.18, 2)
+        day = _day(i, total)
+        return (
+            rng.choice(customers), f'{GEN_PREFIX}INV-{i:09d}', day, day + datetime.timedelta(days=30),
+            subtotal, tax, 0, subtotal + tax, rng.choice(('pending', 'paid', 'paid'))
+        )
+    
+    for start, rows in _batches(total, build):
+        db.execute_many(
+            '''INSERT INTO sales_invoices (
+                   customer_id, invoice_number, invoice_date, due_date,
+                   subtotal, tax_amount, discount_amount, total_amount, status, created_by
+               ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 1)''',
+            rows
+        )
+        # Items for this batch, split evenly across ITEMS_PER_INVOICE grades
+        db.execute(
+            f'''INSERT INTO sales_invoice_items (invoice_id, item_description, quantity, unit_price, tax_rate, amount)
+                SELECT si.id, CONCAT('Ready mix ', ELT(1 + (si.id + n.n) %% {len(GRADES)}, {", ".join(["%s"] * len(GRADES))})),
+                       6, ROUND(si.subtotal / {ITEMS_PER_INVOICE} / 6, 2), 18, ROUND(si.subtotal / {ITEMS_PER_INVOICE}, 2)
+                FROM sales_invoices si
+                CROSS JOIN ({" UNION ALL ".join(f"SELECT {n} as n" for n in range(ITEMS_PER_INVOICE))}) n
+                WHERE si.invoice_number BETWEEN %s AND %s''',
+            (*GRADES, rows[0][1], rows[-1][1])
+        )
+        _progress('sales_invoices', start + len(rows), total, started)
+
+
+def _seed_challans(total, customers, rng):
+    """Insert delivery challans in batches"""
+    started = time.perf_counter()
+    
+    def build(i):
+        return (
+            f'{GEN_PREFIX}DC-{i:09d}', rng.choice(customers), _day(i, total),
+            f'KA{rng.randint(1, 60):02d}AB{rng.randint(1000, 9999)}', round(rng.uniform(3, 9), 2),
+            rng.choice(('pending', 'delivered', 'delivered'))
+        )
+    
+    for start, rows in _batches(total, build):
+        db.execute_many(
+            '''INSERT INTO delivery_challans (challan_number, customer_id, delivery_date, vehicle_number, quantity, status, created_by)
+               VALUES (%s, %s, %s, %s, %s, %s, 1)''',
+            rows
+        )
+        _progress('delivery_challans', start + len(rows), total, started)
+
+
+def _seed_cash_book(total, customers, rng):
+    """Insert cash book entries in batches; every third one is a customer receipt"""
+    started = time.perf_counter()
+    
+    def build(i):
+        if i % 3 == 0:
+            return (
+                _day(i, total), 'credit', round(rng.uniform(10000, 500000), 2), f'{GEN_PREFIX}RCPT-{i:09d}',
+                GEN_MARKER, 'bank', rng.choice(customers)
+            )
+        return (
+            _day(i, total), 'debit', round(rng.uniform(500, 80000), 2), f'{GEN_PREFIX}PAY-{i:09d}',
+            GEN_MARKER, rng.choice(('cash', 'bank')), None
+        )
+    
+    for start, rows in _batches(total, build):
+        db.execute_many(
+            '''INSERT INTO cash_book (transaction_date, transaction_type, amount, reference_number, category, payment_mode, customer_id, created_by)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, 1)''',
+            rows
+        )
+        _progress('cash_book', start + len(rows), total, started)
+
+
+def _seed_aggregates(total, rng):
+    """Insert aggregate purchases in batches"""
+    def build(i):
+        quantity = round(rng.uniform(10, 60), 2)
+        rate = round(rng.uniform(800, 2500), 2)
+        return (
+            rng.choice(('20mm', '10mm', 'M-Sand', 'Cement')), rng.choice(VENDORS), quantity, rate,
+            round(quantity * rate, 2), _day(i, total), rng.choice(('pending', 'paid', 'paid')), GEN_MARKER
+        )
+    
+    for _, rows in _batches(total, build):
+        db.execute_many(
+            '''INSERT INTO aggregates (aggregate_type, vendor_name, quantity, rate, amount, purchase_date, payment_status, notes, created_by)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1)''',
+            rows
+        )
+
+
+def seed(rows):
+    """
+    Seed every table for a scale and rebuild the derived tables
+    
+    Returns:
+        Dictionary of rows inserted per table
+    """
+    rng = random.Random(2024)
+    customers = _seed_customers(customer_count(rows), rng)
+    _seed_invoices(rows, customers, rng)
+    _seed_challans(rows, customers, rng)
+    _seed_cash_book(rows, customers, rng)
+    purchases = rows * AGGREGATES_PER_100 // 100
+    _seed_aggregates(purchases, rng)
+    
+    rollups.rebuild()
+    cash_balances.rebuild()
+    vendor_totals.rebuild()
+    return {
+        'customers': len(customers),
+        'sales_invoices': rows,
+        'sales_invoice_items': rows * ITEMS_PER_INVOICE,
+        'delivery_challans': rows,
+        'cash_book': rows,
+        'aggregates': purchases
+    }
+
+
+def clean():
+    """Delete every seeded row (in batches, so large scales do not hold one huge transaction)"""
+    statements = [
+        f"DELETE FROM sales_invoices WHERE invoice_number LIKE '{GEN_PREFIX}%%' LIMIT {BATCH_SIZE}",
+        f"DELETE FROM delivery_challans WHERE challan_number LIKE '{GEN_PREFIX}%%' LIMIT {BATCH_SIZE}",
+        f"DELETE FROM cash_book WHERE category = '{GEN_MARKER}' LIMIT {BATCH_SIZE}",
+        f"DELETE FROM aggregates WHERE notes = '{GEN_MARKER}' LIMIT {BATCH_SIZE}",
+        f"DELETE FROM customer_balance_snapshots WHERE customer_id IN (SELECT id FROM customers WHERE city = '{GEN_MARKER}')",
+        f"DELETE FROM customers WHERE city = '{GEN_MARKER}' LIMIT {BATCH_SIZE}"
+    ]
+    deleted = {}
+    for sql in statements:
+        table = sql.split()[2]
+        deleted[table] = 0
+        while True:
+            affected = db.execute(sql)['affected_rows']
+            deleted[table] += affected
+            if affected < BATCH_SIZE:
+                break
+    
+    rollups.rebuild()
+    cash_balances.rebuild()
+    vendor_totals.rebuild()
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), help='Rows per table to seed')
+    parser.add_argument('--clean', action='store_true', help='Delete previously seeded rows instead')
+    args = parser.parse_args()
+    if not args.scale and not args.clean:
+        parser.error('one of --scale or --clean is required')
+    
+    print(json.dumps(clean() if args.clean else seed(SCALES[args.scale]), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Dashboard Query Plan Check
+Verifies the dashboard statistics queries can range-scan their date keys
+
+Runs EXPLAIN for dashboard.STATS_SQL and dashboard.QUANTITY_SQL against the
+database configured by the DB_* environment variables and exits non-zero
+if the daily_revenue / daily_deliveries date predicates cannot use the
+rollup_date primary key.
+
+Usage:
+    python -m benchmarks.explain_dashboard
+"""
+
+import json
+import sys
+
+from benchmarks.common import load_function
+from utils import db
+
+# table -> index its date predicate must be able to use
+EXPECTED_INDEXES = {
+    'daily_revenue': 'PRIMARY',
+    'daily_deliveries': 'PRIMARY'
+}
+
+
+def explain(sql, params):
+    """Return EXPLAIN rows for a statement"""
+    return db.query(f'EXPLAIN {sql}', params)
+
+
+def check():
+    """
+    Check every dashboard plan row for the expected tables
+    
+    Returns:
+        List of failure messages (empty when all plans are index-backed)
+    """
+    dashboard = load_function('dashboard')
+    plans = {
+        'stats': explain(dashboard.STATS_SQL, (dashboard.ORDER_STATUS['PENDING'],)),
+        'quantity': explain(dashboard.QUANTITY_SQL, ())
+    }
+    
+    failures = []
+    seen = set()
+    for name, rows in plans.items():
+        for row in rows:
+            index = EXPECTED_INDEXES.get(row.get('table'))
+            if not index:
+                continue
+            seen.add(row['table'])
+            possible = (row.get('possible_keys') or '').split(',')
+            print(json.dumps({'query': name, 'table': row['table'], 'type': row['type'],
+                              'possible_keys': row.get('possible_keys'), 'key': row.get('key')}))
+            if index not in possible:
+                failures.append(f"{name}: {row['table']} cannot use {index} (possible_keys={row.get('possible_keys')})")
+    
+    for table in sorted(set(EXPECTED_INDEXES) - seen):
+        failures.append(f'{table} does not appear in any dashboard plan')
+    return failures
+
+
+def main():
+    failures = check()
+    for failure in failures:
+        print(f'FAIL {failure}', file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
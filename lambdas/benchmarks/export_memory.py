@@ -0,0 +1,97 @@
+"""
+Export Memory Benchmark
+Compares peak Python memory of a buffered fetchall() with a streamed export
+
+Seeds synthetic cash_book rows (category = 'BENCH') into the database
+configured by the DB_* environment variables, then measures with
+tracemalloc the peak allocated while reading them all with db.query and
+while exporting them with export.export_query (to the configured blob
+store). The seeded rows are deleted afterwards. Use a scratch database.
+
+Usage:
+    python -m benchmarks.export_memory [--rows 200000] [--format csv]
+"""
+
+import argparse
+import json
+import random
+import tracemalloc
+
+from benchmarks.common import timed
+from utils import db, export
+
+BENCH_CATEGORY = 'BENCH'
+
+EXPORT_SQL = 'SELECT * FROM cash_book WHERE category = %s ORDER BY transaction_date, id'
+
+
+def _seed(count, batch_size=1000):
+    """Insert count synthetic cash book entries in multi-row batches"""
+    rng = random.Random(42)
+    sql = '''INSERT INTO cash_book (transaction_date, transaction_type, amount, description, category, payment_mode)
+             VALUES (%s, %s, %s, %s, %s, %s)'''
+    for start in range(0, count, batch_size):
+        db.execute_many(sql, [
+            (
+                f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+                rng.choice(['credit', 'debit']),
+                f'{rng.uniform(100, 500000):.2f}',
+                f'Bench entry {i} ' + 'x' * rng.randint(10, 120),
+                BENCH_CATEGORY,
+                rng.choice(['cash', 'upi', 'cheque'])
+            )
+            for i in range(start, min(start + batch_size, count))
+        ])
+
+
+def _peak(func, *args):
+    """Run func and return (result, elapsed_ms, peak_bytes)"""
+    tracemalloc.start()
+    try:
+        result, elapsed = timed(func, *args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(rows, fmt, seed=True):
+    """Measure both reads and return elapsed time and peak memory for each"""
+    if seed:
+        _seed(rows)
+    try:
+        fetched, fetch_ms, fetch_peak = _peak(db.query, EXPORT_SQL, (BENCH_CATEGORY,))
+        row_count = len(fetched)
+        del fetched
+        
+        reference, export_ms, export_peak = _peak(
+            export.export_query, EXPORT_SQL, (BENCH_CATEGORY,), 'cash_book', fmt
+        )
+    finally:
+        if seed:
+            db.execute('DELETE FROM cash_book WHERE category = %s', (BENCH_CATEGORY,))
+    
+    return {
+        'rows': row_count,
+        'fetchall': {'ms': round(fetch_ms, 1), 'peak_mb': round(fetch_peak / 2 ** 20, 2)},
+        'export': {
+            'ms': round(export_ms, 1),
+            'peak_mb': round(export_peak / 2 ** 20, 2),
+            'bytes': reference['bytes'],
+            'location': reference['location']
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+    parser.add_argument('--no-seed', action='store_true', help='Export the existing BENCH rows, do not seed or clean up')
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.rows, args.format, seed=not args.no_seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""
+Handler Benchmark Suite
+Drives every Lambda handler with HTTP API events and reports latency per endpoint
+
+Imports each lambdas/*/lambda_function.py, builds API Gateway HTTP API
+(payload 2.0) events with a JWT from utils.auth.generate_token, and calls
+the handlers in-process against the database configured by the DB_* and
+JWT_SECRET environment variables. Seed that database first with
+benchmarks.datagen (10k, 1m or 10m rows). Per endpoint it reports
+p50/p95/p99 latency, SQL statements per request (from the utils.db request
+trace, COMMIT/ROLLBACK excluded) and response bytes. The report is saved
+as JSON; --baseline compares against an earlier report.
+
+Read endpoints only touch existing rows. --writes adds create/update/delete
+cycles for cash book entries, delivery challans and sales invoices, and
+deletes what they create.
+
+Usage:
+    python -m benchmarks.handlers [--runs 50] [--only customers] [--writes]
+        [--compress] [--output handlers.json] [--baseline previous.json]
+"""
+
+import argparse
+import base64
+import datetime
+import json
+import statistics
+import sys
+import uuid
+
+from benchmarks.common import lambda_modules, load_function, make_event, summarize, timed
+from utils import auth, db
+
+# Transaction control statements are not counted as queries
+CONTROL_STATEMENTS = ('COMMIT', 'ROLLBACK')
+
+# Lambda directory -> (table, list handler, get handler) for CRUD modules
+CRUD_MODULES = {
+    'aggregates': ('aggregates', 'list_aggregates', 'get_aggregate'),
+    'batch-lists': ('batch_lists', 'list_batches', 'get_batch'),
+    'cash-book': ('cash_book', 'list_entries', 'get_entry'),
+    'cube-tests': ('cube_tests', 'list_tests', 'get_test'),
+    'delivery-challans': ('delivery_challans', 'list_challans', 'get_challan'),
+    'mix-designs': ('mix_designs', 'list_designs', 'get_design'),
+    'purchase-orders': ('purchase_orders', 'list_orders', 'get_order'),
+    'quotations': ('quotations', 'list_quotations', 'get_quotation'),
+    'recipes': ('recipes', 'list_recipes', 'get_recipe'),
+    'sales-orders': ('sales_orders', 'list_orders', 'get_order'),
+    'weight-bridge': ('weight_bridge_reports', 'list_reports', 'get_report')
+}
+
+
+def _month_before(day):
+    """Same day one month earlier (clamped to the 28th)"""
+    first = day.replace(day=1) - datetime.timedelta(days=1)
+    return first.replace(day=min(day.day, 28))
+
+
+def read_endpoints(samples):
+    """
+    Read endpoints as (route key, Lambda directory, handler name, request)
+    
+    Requests are dicts with optional path, query and body. Endpoints that
+    need a sample row the database does not have are left out.
+    """
+    last = samples['last_date']
+    month_ago = _month_before(last).isoformat()
+    year_ago = (last - datetime.timedelta(days=365)).isoformat()
+    endpoints = [
+        ('GET /api/auth/validate', 'auth', 'validate', {}),
+        ('GET /api/customers', 'customers', 'list_customers', {'query': {'page': '1', 'limit': '50'}}),
+        ('GET /api/customers?cursor', 'customers', 'list_customers', {'query': {'cursor': '', 'limit': '50'}}),
+        ('GET /api/customers?search', 'customers', 'list_customers', {'query': {'search': 'Gen Customer 0004'}}),
+        ('GET /api/sales-invoices', 'sales-invoices', 'list_invoices', {'query': {'page': '1', 'limit': '50'}}),
+        ('GET /api/sales-invoices?cursor', 'sales-invoices', 'list_invoices', {'query': {'cursor': '', 'limit': '50'}}),
+        ('GET /api/cash-book/summary', 'cash-book', 'summary', {}),
+        ('GET /api/cash-book/summary?range', 'cash-book', 'summary',
+         {'query': {'start_date': year_ago, 'end_date': last.isoformat()}}),
+        ('GET /api/dashboard/stats', 'dashboard', 'stats', {}),
+        ('GET /api/dashboard/quantity', 'dashboard', 'quantity', {}),
+        ('GET /api/dashboard/summary', 'dashboard', 'summary_handler', {}),
+        ('GET /api/aggregates/by-vendor', 'aggregates', 'by_vendor', {}),
+        ('GET /api/aggregates/payment-pending', 'aggregates', 'payment_pending', {'query': {'limit': '50'}}),
+        ('GET /api/reports', 'reports', 'list_reports', {}),
+        ('GET /api/reports/preview', 'reports', 'preview',
+         {'query': {'report_id': 'sales-summary', 'date_from': month_ago}})
+    ]
+    
+    if samples.get('customer_id'):
+        customer = {'id': str(samples['customer_id'])}
+        endpoints += [
+            ('GET /api/customers/{id}', 'customers', 'get_customer', {'path': customer}),
+            ('GET /api/customers/{id}/statement', 'customers', 'get_statement', {'path': customer}),
+            ('GET /api/customers/{id}/statement?date_from', 'customers', 'get_statement',
+             {'path': customer, 'query': {'date_from': year_ago}})
+        ]
+    if samples.get('sales_invoices'):
+        endpoints.append(('GET /api/sales-invoices/{id}', 'sales-invoices', 'get_invoice',
+                          {'path': {'id': str(samples['sales_invoices'])}}))
+    
+    for module, (table, list_name, get_name) in CRUD_MODULES.items():
+        endpoints += [
+            (f'GET /api/{module}', module, list_name, {'query': {'page': '1', 'limit': '50'}}),
+            (f'GET /api/{module}?cursor', module, list_name, {'query': {'cursor': '', 'limit': '50'}})
+        ]
+        if samples.get(table):
+            endpoints.append((f'GET /api/{module}/{{id}}', module, get_name, {'path': {'id': str(samples[table])}}))
+    return endpoints
+
+
+def _invoice_body(samples, run, items=3):
+    """Sales invoice with the given number of line items for a write cycle"""
+    return {
+        'customer_id': samples['customer_id'],
+        'invoice_number': f'BENCH-{uuid.uuid4().hex[:12]}',
+        'invoice_date': samples['last_date'].isoformat(),
+        'subtotal': 29100 * items, 'tax_amount': 5238 * items, 'discount_amount': 0, 'total_amount': 34338 * items,
+        'items': [
+            {'item_description': f'Ready mix M25 lot {run}-{i}', 'quantity': 6, 'unit_price': 4850,
+             'tax_rate': 18, 'amount': 29100}
+            for i in range(items)
+        ]
+    }
+
+
+def write_cycles(samples, invoice_items=3):
+    """
+    Create/update/delete cycles as (Lambda directory, create, update, delete,
+    create body builder, update body builder); builders take (samples, run)
+    """
+    day = samples['last_date'].isoformat()
+    return [
+        ('cash-book', 'create_entry', 'update_entry', 'delete_entry',
+         lambda s, run: {'transaction_date': day, 'transaction_type': 'credit', 'amount': 25000,
+                         'reference_number': f'BENCH-{run}', 'customer_id': s['customer_id']},
+         lambda s, run: {'amount': 26000}),
+        ('delivery-challans', 'create_challan', 'update_challan', 'delete_challan',
+         lambda s, run: {'challan_number': f'BENCH-{uuid.uuid4().hex[:12]}', 'customer_id': s['customer_id'],
+                         'delivery_date': day, 'vehicle_number': 'KA01AB1234', 'quantity': 6},
+         lambda s, run: {'quantity': 7, 'status': 'delivered'}),
+        ('sales-invoices', 'create_invoice', 'update_invoice', 'delete_invoice',
+         lambda s, run: _invoice_body(s, run, invoice_items),
+         lambda s, run: dict(_invoice_body(s, run + 1, invoice_items),
+                             discount_amount=500, total_amount=34338 * invoice_items - 500))
+    ]
+
+
+def get_samples():
+    """Newest row id per table, a customer with invoices and the newest invoice date"""
+    samples = {}
+    for table, _, _ in CRUD_MODULES.values():
+        row = db.query(f'SELECT MAX(id) as id FROM {table}')
+        samples[table] = row[0]['id'] if row else None
+    newest = db.query('SELECT id, customer_id, invoice_date FROM sales_invoices ORDER BY id DESC LIMIT 1')
+    samples['sales_invoices'] = newest[0]['id'] if newest else None
+    samples['customer_id'] = newest[0]['customer_id'] if newest else None
+    samples['last_date'] = newest[0]['invoice_date'] if newest else datetime.date.today()
+    return samples
+
+
+def table_sizes():
+    """Approximate row counts of the seeded tables (from table statistics)"""
+    rows = db.query(
+        '''SELECT TABLE_NAME as name, TABLE_ROWS as row_count FROM information_schema.TABLES
+           WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN
+               ('customers', 'sales_invoices', 'sales_invoice_items', 'delivery_challans', 'cash_book', 'aggregates')'''
+    )
+    return {row['name']: int(row['row_count'] or 0) for row in rows}
+
+
+def response_bytes(result):
+    """Size of the response body as sent (decoded from base64 when compressed)"""
+    body = result.get('body') or ''
+    if result.get('isBase64Encoded'):
+        return len(base64.b64decode(body))
+    return len(body.encode('utf-8'))
+
+
+def call(handler, event):
+    """
+    Call a handler once
+    
+    Returns:
+        Tuple of (result, elapsed ms, SQL statements run, response bytes)
+    """
+    result, elapsed = timed(handler, event, None)
+    queries = sum(
+        1 for entry in db.get_request_statements() if entry['fingerprint'] not in CONTROL_STATEMENTS
+    )
+    return result, elapsed, queries, response_bytes(result)
+
+
+def record(samples, route, result, elapsed, queries, size):
+    """Add one call's measurements to the samples for its route key"""
+    entry = samples.setdefault(route, {'ms': [], 'queries': [], 'bytes': [], 'statuses': {}})
+    entry['ms'].append(elapsed)
+    entry['queries'].append(queries)
+    entry['bytes'].append(size)
+    status = str(result.get('statusCode'))
+    entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+
+
+def summarize_endpoints(samples):
+    """Latency percentiles, median and max queries, median bytes and status counts per route key"""
+    return {
+        route: dict(
+            summarize(entry['ms']),
+            queries_p50=statistics.median(entry['queries']),
+            queries_max=max(entry['queries']),
+            bytes_p50=statistics.median(entry['bytes']),
+            statuses=entry['statuses']
+        )
+        for route, entry in samples.items()
+    }
+
+
+def _request_event(token, route, request, headers):
+    """HTTP API event for a read endpoint request"""
+    return make_event(
+        token, request.get('body'), request.get('path'), request.get('query'),
+        headers, route=route.split('?')[0]
+    )
+
+
+def run_reads(measured, endpoints, token, runs, headers):
+    """Time each read endpoint: one warm-up call, then runs measured calls"""
+    for route, module, name, request in endpoints:
+        handler = getattr(load_function(module), name)
+        event = _request_event(token, route, request, headers)
+        handler(event, None)
+        for _ in range(runs):
+            record(measured, route, *call(handler, event))
+
+
+def run_writes(measured, samples, token, runs, headers, only=None, invoice_items=3):
+    """Time create, update and delete for each write cycle"""
+    cycles = write_cycles(samples, invoice_items)
+    for module, create_name, update_name, delete_name, create_body, update_body in cycles:
+        if only and only not in module:
+            continue
+        handlers = load_function(module)
+        for run in range(runs):
+            route = f'POST /api/{module}'
+            event = make_event(token, create_body(samples, run), None, None, headers, route=route)
+            result, elapsed, queries, size = call(getattr(handlers, create_name), event)
+            record(measured, route, result, elapsed, queries, size)
+            if result['statusCode'] != 201:
+                break
+            path = {'id': str(json.loads(result['body'])['data']['id'])}
+            
+            route = f'PUT /api/{module}/{{id}}'
+            event = make_event(token, update_body(samples, run), path, None, headers, route=route)
+            record(measured, route, *call(getattr(handlers, update_name), event))
+            
+            route = f'DELETE /api/{module}/{{id}}'
+            event = make_event(token, None, path, None, headers, route=route)
+            record(measured, route, *call(getattr(handlers, delete_name), event))
+
+
+def compare(report, baseline):
+    """p50/p95 ratios and query count changes against a baseline report"""
+    changes = {}
+    for route, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(route)
+        if not previous:
+            continue
+        changes[route] = {
+            'p50_ratio': round(current['p50_ms'] / previous['p50_ms'], 3) if previous['p50_ms'] else None,
+            'p95_ratio': round(current['p95_ms'] / previous['p95_ms'], 3) if previous['p95_ms'] else None,
+            'queries_change': current['queries_p50'] - previous['queries_p50'],
+            'bytes_change': current['bytes_p50'] - previous['bytes_p50']
+        }
+    return changes
+
+
+def run(runs, only=None, writes=False, compress=False):
+    """Benchmark every endpoint and return the report"""
+    token = auth.generate_token({'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'role': 'admin'})
+    headers = {'Accept-Encoding': 'gzip, br'} if compress else None
+    samples = get_samples()
+    
+    endpoints = [endpoint for endpoint in read_endpoints(samples) if not only or only in endpoint[1]]
+    covered = {module for _, module, _, _ in endpoints}
+    measured = {}
+    run_reads(measured, endpoints, token, runs, headers)
+    if writes and samples['customer_id']:
+        run_writes(measured, samples, token, runs, headers, only)
+    
+    return {
+        'createdAt': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'runs': runs,
+        'compress': compress,
+        'tables': table_sizes(),
+        'uncovered': [module for module in lambda_modules() if module not in covered and not only],
+        'endpoints': summarize_endpoints(measured)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--only', help='Only Lambda directories containing this text')
+    parser.add_argument('--writes', action='store_true', help='Also run create/update/delete cycles')
+    parser.add_argument('--compress', action='store_true', help='Send Accept-Encoding: gzip, br')
+    parser.add_argument('--output', help='Report path (default handlers-<UTC timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier report to compare against')
+    args = parser.parse_args()
+    
+    report = run(args.runs, args.only, args.writes, args.compress)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            report['comparison'] = compare(report, json.load(baseline))
+    
+    output = args.output or f"handlers-{datetime.datetime.now(datetime.timezone.utc):%Y%m%d-%H%M%S}.json"
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2, default=str)
+    print(json.dumps(report, indent=2, default=str))
+    print(f'Saved {output}', file=sys.stderr)
+    
+    failed = [
+        route for route, entry in report['endpoints'].items()
+        if any(int(status) >= 400 for status in entry['statuses'])
+    ]
+    if failed:
+        print(f"FAIL error responses from: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Lambda Import-Time Budget
+Measures the cold import time of every lambda_function module
+
+Each module is imported in a fresh interpreter, as on a Lambda cold start,
+several times; the median is compared against the budget. The check also
+fails if importing a module loads a dependency that utils defers to first
+use (pymysql, jwt, bcrypt, cryptography). Exits non-zero on any failure.
+Needs no database; JWT_SECRET defaults to a placeholder.
+
+Usage:
+    python -m benchmarks.import_budget [--budget-ms 60] [--repeat 5] [--module customers]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import LAMBDAS_DIR, lambda_modules
+
+# Dependencies that must not be imported until a handler needs them
+DEFERRED_MODULES = ('pymysql', 'jwt', 'bcrypt', 'cryptography')
+
+# Run in a fresh interpreter: import one Lambda module and report the cost
+PROBE = '''
+import json, sys, time
+sys.path.insert(0, {lambdas_dir!r})
+from benchmarks.common import load_function
+start = time.perf_counter()
+load_function({module!r})
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{'ms': elapsed, 'loaded': [name for name in {deferred!r} if name in sys.modules]}}))
+'''
+
+
+def measure(module, repeat):
+    """Import a Lambda module in repeat fresh interpreters"""
+    env = dict(os.environ)
+    env.setdefault('JWT_SECRET', 'import-budget')
+    code = PROBE.format(lambdas_dir=LAMBDAS_DIR, module=module, deferred=DEFERRED_MODULES)
+    samples, loaded = [], set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result['ms'])
+        loaded.update(result['loaded'])
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'deferred_loaded': sorted(loaded)
+    }
+
+
+def check(budget_ms, repeat, modules=None):
+    """
+    Measure every Lambda module against the budget
+    
+    Returns:
+        Tuple of (results per module, list of failure messages)
+    """
+    results, failures = {}, []
+    for module in modules or lambda_modules():
+        result = measure(module, repeat)
+        results[module] = result
+        if result['median_ms'] > budget_ms:
+            failures.append(f"{module}: import took {result['median_ms']} ms (budget {budget_ms} ms)")
+        if result['deferred_loaded']:
+            failures.append(f"{module}: import loaded {', '.join(result['deferred_loaded'])}")
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', 60)))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--module', action='append', help='Lambda directory to check (default all)')
+    args = parser.parse_args()
+    
+    results, failures = check(args.budget_ms, args.repeat, args.module)
+    print(json.dumps({'budget_ms': args.budget_ms, 'results': results}, indent=2))
+    for failure in failures:
+        print(f'FAIL {failure}', file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Sales Invoice Write Benchmark
+Times create_invoice and update_invoice for invoices with 1, 50 and 500 items
+
+Runs the real handlers against the database configured by the DB_* and
+JWT_SECRET environment variables (use a scratch database, the benchmark
+creates and deletes its own customer and invoices).
+
+Usage:
+    python -m benchmarks.invoice_writes [--runs 20] [--sizes 1,50,500]
+"""
+
+import argparse
+import json
+import uuid
+
+from benchmarks.common import load_function, make_event, summarize, timed
+from utils import auth, db
+
+
+def _items(count, seed=0):
+    """Build count line items; seed varies descriptions between updates"""
+    return [
+        {
+            'item_description': f'M25 concrete lot {seed}-{i}',
+            'quantity': 6,
+            'unit_price': 4850,
+            'tax_rate': 18,
+            'amount': 29100
+        }
+        for i in range(count)
+    ]
+
+
+def _invoice_body(customer_id, items):
+    """Request body for a benchmark invoice with the given items"""
+    return {
+        'customer_id': customer_id,
+        'invoice_number': f'BENCH-{uuid.uuid4().hex[:12]}',
+        'invoice_date': '2026-01-15',
+        'due_date': '2026-02-14',
+        'subtotal': 29100 * len(items),
+        'tax_amount': 5238 * len(items),
+        'discount_amount': 0,
+        'total_amount': 34338 * len(items),
+        'items': items
+    }
+
+
+def run(runs, sizes):
+    """Benchmark invoice writes and return latency summaries per item count"""
+    invoices = load_function('sales-invoices')
+    token = auth.generate_token({'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'role': 'admin'})
+    
+    customer = db.execute(
+        "INSERT INTO customers (customer_name, is_active, created_by) VALUES (%s, 1, 1)",
+        (f'Benchmark customer {uuid.uuid4().hex[:8]}',)
+    )
+    customer_id = customer['last_insert_id']
+    created = []
+    results = {}
+    
+    try:
+        for size in sizes:
+            create_ms, update_same_ms, update_half_ms = [], [], []
+            for _ in range(runs):
+                items = _items(size)
+                body = _invoice_body(customer_id, items)
+                result, elapsed = timed(invoices.create_invoice, make_event(token, body), None)
+                if result['statusCode'] != 201:
+                    raise RuntimeError(f"create_invoice failed: {result['body']}")
+                invoice_id = json.loads(result['body'])['data']['id']
+                created.append(invoice_id)
+                create_ms.append(elapsed)
+                
+                # Re-save with the same items: no item rows should be touched
+                event = make_event(token, body, {'id': str(invoice_id)})
+                _, elapsed = timed(invoices.update_invoice, event, None)
+                update_same_ms.append(elapsed)
+                
+                # Re-save with half the items changed
+                body['items'] = items[:size // 2] + _items(size - size // 2, seed=1)
+                event = make_event(token, body, {'id': str(invoice_id)})
+                _, elapsed = timed(invoices.update_invoice, event, None)
+                update_half_ms.append(elapsed)
+            
+            results[size] = {
+                'create': summarize(create_ms),
+                'update_unchanged': summarize(update_same_ms),
+                'update_half_changed': summarize(update_half_ms)
+            }
+    finally:
+        for invoice_id in created:
+            db.execute('DELETE FROM sales_invoice_items WHERE invoice_id = %s', (invoice_id,))
+            db.execute('DELETE FROM sales_invoices WHERE id = %s', (invoice_id,))
+        db.execute('DELETE FROM customers WHERE id = %s', (customer_id,))
+    
+    return {'results': results, 'connections': db.get_stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--sizes', default='1,50,500')
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(json.dumps(run(args.runs, sizes), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Query-Count Budgets
+Fails when an endpoint runs more SQL statements per request than its budget
+
+Drives the same endpoints as benchmarks.handlers (reads plus the cash book,
+challan and invoice write cycles) and counts, for every invocation, the SQL
+statements and connection checkouts seen by utils.db: statements from the
+request trace (db.get_request_statements, COMMIT/ROLLBACK excluded) and
+checkouts from the connection counters (db.get_stats). Nothing in the
+handlers is mocked. Each endpoint is called once to warm the container (the
+one-time index check), then measured; cached endpoints are measured on
+their compute path, with the response cache emptied before every call.
+
+Budgets are exact for the current code, so adding a statement to a handler
+means raising its budget here on purpose. Invoices are written with
+--items line items (default 25) so a per-item statement cannot hide under
+the budget. Every endpoint must have a budget. Runs against the database
+configured by the DB_* and JWT_SECRET environment variables, seeded with
+benchmarks.datagen (--scale 10k is enough). Exits non-zero on any failure.
+
+Usage:
+    python -m benchmarks.query_budget [--runs 3] [--items 25] [--only sales-invoices]
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.common import load_function, make_event
+from benchmarks.handlers import (
+    CONTROL_STATEMENTS, CRUD_MODULES, get_samples, read_endpoints, write_cycles
+)
+from utils import auth, cache, db
+
+# Connection checkouts allowed per request (the request scope holds one)
+CONNECTION_BUDGET = 1
+
+# SQL statements per request, by route key (see benchmarks.handlers)
+BUDGETS = {
+    'GET /api/auth/validate': 1,
+    'GET /api/customers': 2,
+    'GET /api/customers?cursor': 1,
+    'GET /api/customers?search': 2,
+    'GET /api/customers/{id}': 1,
+    'GET /api/customers/{id}/statement': 2,
+    'GET /api/customers/{id}/statement?date_from': 4,
+    'GET /api/sales-invoices': 2,
+    'GET /api/sales-invoices?cursor': 1,
+    'GET /api/sales-invoices/{id}': 2,
+    'GET /api/cash-book/summary': 1,
+    'GET /api/cash-book/summary?range': 4,
+    'GET /api/dashboard/stats': 2,
+    'GET /api/dashboard/quantity': 2,
+    'GET /api/dashboard/summary': 3,
+    'GET /api/aggregates/by-vendor': 1,
+    'GET /api/aggregates/payment-pending': 1,
+    'GET /api/reports': 0,
+    'GET /api/reports/preview': 2,
+    # Insert, re-read, customer receipt: month snapshot lock + upsert +
+    # cascade, statement snapshot invalidation, table version
+    'POST /api/cash-book': 7,
+    'PUT /api/cash-book/{id}': 8,
+    'DELETE /api/cash-book/{id}': 7,
+    # Insert, re-read, daily and per-customer delivery rollups, table version
+    'POST /api/delivery-challans': 5,
+    'PUT /api/delivery-challans/{id}': 6,
+    'DELETE /api/delivery-challans/{id}': 5,
+    # Header, one multi-row item insert, re-read, rollup, statement
+    # invalidation, table version
+    'POST /api/sales-invoices': 6,
+    # Locked read, header, re-read, rollup, invalidation, table version, then
+    # item sync: read, one DELETE ... IN, one multi-row insert
+    'PUT /api/sales-invoices/{id}': 9,
+    'DELETE /api/sales-invoices/{id}': 6
+}
+
+for _module in CRUD_MODULES:
+    BUDGETS.setdefault(f'GET /api/{_module}', 2)
+    BUDGETS.setdefault(f'GET /api/{_module}?cursor', 1)
+    BUDGETS.setdefault(f'GET /api/{_module}/{{id}}', 1)
+
+
+def measure(handler, event):
+    """
+    Call a handler once with an empty response cache
+    
+    Returns:
+        Tuple of (result, statements, connection checkouts)
+    """
+    cache.clear_local()
+    before = db.get_stats()
+    result = handler(event, None)
+    after = db.get_stats()
+    statements = [
+        entry['fingerprint'] for entry in db.get_request_statements()
+        if entry['fingerprint'] not in CONTROL_STATEMENTS
+    ]
+    checkouts = (after['opened'] + after['reused']) - (before['opened'] + before['reused'])
+    return result, statements, checkouts
+
+
+def _check(results, failures, route, result, statements, checkouts):
+    """Compare one measured call with its budget and keep the worst call per route"""
+    budget = BUDGETS.get(route)
+    worst = results.get(route)
+    if worst is None or len(statements) > worst['queries']:
+        results[route] = {
+            'queries': len(statements),
+            'budget': budget,
+            'connections': checkouts,
+            'status': result.get('statusCode'),
+            'statements': statements
+        }
+    if result.get('statusCode', 500) >= 400:
+        failures.add(f"{route}: returned {result.get('statusCode')}")
+    if budget is None:
+        failures.add(f'{route}: no query budget declared')
+    elif len(statements) > budget:
+        failures.add(f'{route}: {len(statements)} queries (budget {budget})')
+    if checkouts > CONNECTION_BUDGET:
+        failures.add(f'{route}: {checkouts} connection checkouts (budget {CONNECTION_BUDGET})')
+
+
+def check(runs, items, only=None):
+    """
+    Measure every endpoint against its budget
+    
+    Returns:
+        Tuple of (worst call per route, sorted list of failure messages)
+    """
+    token = auth.generate_token({'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'role': 'admin'})
+    samples = get_samples()
+    results, failures = {}, set()
+    
+    # Measure the compute path of cached endpoints, not the shared store
+    cache.set_shared_backend(None)
+    
+    for route, module, name, request in read_endpoints(samples):
+        if only and only not in module:
+            continue
+        handler = getattr(load_function(module), name)
+        event = make_event(token, request.get('body'), request.get('path'), request.get('query'),
+                           route=route.split('?')[0])
+        handler(event, None)
+        for _ in range(runs):
+            _check(results, failures, route, *measure(handler, event))
+    
+    if not samples['customer_id']:
+        failures.add('no sales invoice to take a customer from, seed with benchmarks.datagen')
+        return results, sorted(failures)
+    
+    for module, create_name, update_name, delete_name, create_body, update_body in write_cycles(samples, items):
+        if only and only not in module:
+            continue
+        handlers = load_function(module)
+        for run in range(runs):
+            route = f'POST /api/{module}'
+            event = make_event(token, create_body(samples, run), route=route)
+            result, statements, checkouts = measure(getattr(handlers, create_name), event)
+            _check(results, failures, route, result, statements, checkouts)
+            if result['statusCode'] != 201:
+                break
+            path = {'id': str(json.loads(result['body'])['data']['id'])}
+            
+            route = f'PUT /api/{module}/{{id}}'
+            event = make_event(token, update_body(samples, run), path, route=route)
+            _check(results, failures, route, *measure(getattr(handlers, update_name), event))
+            
+            route = f'DELETE /api/{module}/{{id}}'
+            event = make_event(token, None, path, route=route)
+            _check(results, failures, route, *measure(getattr(handlers, delete_name), event))
+    return results, sorted(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--items', type=int, default=25, help='Line items per written invoice')
+    parser.add_argument('--only', help='Only Lambda directories containing this text')
+    args = parser.parse_args()
+    
+    results, failures = check(args.runs, args.items, args.only)
+    print(json.dumps({'connection_budget': CONNECTION_BUDGET, 'results': results}, indent=2))
+    for failure in failures:
+        print(f'FAIL {failure}', file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Response Serialization Benchmark
+Times response.success for list pages of DictCursor-style rows
+
+Rows mimic sales_invoices rows (Decimal amounts, date and datetime columns).
+The baseline is what handlers had to do before response.dumps: copy every
+row with converted values, then json.dumps the copy. Needs no database.
+
+Usage:
+    python -m benchmarks.serialize_rows [--rows 10000] [--runs 50]
+"""
+
+import argparse
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from benchmarks.common import summarize, timed
+from utils import response
+
+
+def _rows(count):
+    """Build count synthetic invoice rows"""
+    created = datetime(2026, 1, 1, 9, 30)
+    return [
+        {
+            'id': i,
+            'invoice_number': f'INV-{i:06d}',
+            'customer_id': i % 500,
+            'customer_name': f'Customer {i % 500}',
+            'invoice_date': date(2026, 1, 1) + timedelta(days=i % 365),
+            'due_date': date(2026, 1, 31) + timedelta(days=i % 365),
+            'subtotal': Decimal('29100.00') + i,
+            'tax_amount': Decimal('5238.00'),
+            'discount_amount': Decimal('0.00'),
+            'total_amount': Decimal('34338.50') + i,
+            'status': 'pending',
+            'created_at': created + timedelta(minutes=i),
+            'updated_at': created + timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
+
+def _coerce_and_dump(rows):
+    """Baseline: copy rows with converted values, then json.dumps"""
+    def convert(value):
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+    
+    copied = [{key: convert(value) for key, value in row.items()} for row in rows]
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Credentials': True,
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+        },
+        'body': json.dumps({'success': True, 'data': {'invoices': copied}})
+    }
+
+
+def run(row_count, runs):
+    """Benchmark both serialization paths and return latency summaries"""
+    rows = _rows(row_count)
+    baseline_ms, success_ms = [], []
+    for _ in range(runs):
+        _, elapsed = timed(_coerce_and_dump, rows)
+        baseline_ms.append(elapsed)
+        result, elapsed = timed(response.success, {'invoices': rows})
+        success_ms.append(elapsed)
+    
+    return {
+        'rows': row_count,
+        'body_bytes': len(result['body'].encode('utf-8')),
+        'coerce_copy_json_dumps': summarize(baseline_ms),
+        'response_success': summarize(success_ms)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.rows, args.runs), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,13 +7,31 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils import db, auth, response
-from utils.error_handler import async_handler
+from utils import auth, response, statements, cash_balances
+from utils.error_handler import async_handler, ValidationError
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('cash_book')
+
+def _record_change(old, new):
+    """Keep monthly balance snapshots and customer statement snapshots current"""
+    cash_balances.record_change(old, new)
+    statements.record_receipt_change(old, new)
+
+
+handler = create_crud_handler(
+    'cash_book',
+    on_change=_record_change,
+    filters={
+        'transaction_date': 'range',
+        'transaction_type': 'in',
+        'customer_id': 'in'
+    },
+    sort_keys=('transaction_date',),
+    cached=True
+)
 
 list_entries = handler['list']
+export_entries = handler['export']
 get_entry = handler['get_by_id']
 create_entry = handler['create']
 update_entry = handler['update']
@@ -25,31 +43,19 @@ def summary(event, context):
     """
     Get cash book summary
     GET /cash-book/summary
+    Totals come from the monthly snapshots in cash_book_monthly plus a scan
+    of the partial months at the ends of the range
     """
     auth.validate_request(event)
     
     query_params = event.get('queryStringParameters') or {}
     start_date = query_params.get('start_date')
     end_date = query_params.get('end_date')
+    for name, value in (('start_date', start_date), ('end_date', end_date)):
+        if value:
+            try:
+                cash_balances.month_start(value)
+            except ValueError:
+                raise ValidationError(f'{name} must be a date (YYYY-MM-DD)')
     
-    sql = '''
-        SELECT
-            SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE 0 END) as total_credit,
-            SUM(CASE WHEN transaction_type = 'debit' THEN amount ELSE 0 END) as total_debit,
-            SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE -amount END) as balance
-        FROM cash_book
-        WHERE 1=1
-    '''
-    params = []
-    
-    if start_date:
-        sql += ' AND transaction_date >= %s'
-        params.append(start_date)
-    
-    if end_date:
-        sql += ' AND transaction_date <= %s'
-        params.append(end_date)
-    
-    summary_result = db.query(sql, tuple(params))
-    
-    return response.success(summary_result[0] if summary_result else {})
+    return response.success(cash_balances.summary(start_date, end_date))
@@ -3,10 +3,21 @@ import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('cube_tests')
+handler = create_crud_handler(
+    'cube_tests',
+    filters={
+        'test_date': 'range',
+        'mix_design_id': 'in',
+        'test_status': 'in'
+    },
+    sort_keys=('test_date',),
+    cached=True
+)
 
 list_tests = handler['list']
+export_tests = handler['export']
 get_test = handler['get_by_id']
 create_test = handler['create']
 update_test = handler['update']
 delete_test = handler['delete']
+bulk_tests = handler['bulk']
@@ -4,62 +4,228 @@ Handles CRUD operations for customers
 """
 
 import json
+import re
 import sys
 import os
+import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils import db, auth, response
-from utils.error_handler import async_handler
+from utils import db, auth, response, pagination, cache, etag, projection, statements
+from utils.error_handler import async_handler, ValidationError
+
+# Sort key for keyset (cursor) pagination
+KEYSET_COLUMNS = ['created_at', 'id']
+
+CUSTOMER_COLUMNS = '''id, customer_name, contact_person, phone, email, gst_number,
+               address, city, state, pincode, is_active, created_at, updated_at'''
+
+# Each search branch stops after this many matches; larger result sets are
+# reported with totalMode 'bounded' instead of being counted exactly
+SEARCH_MATCH_CAP = int(os.environ.get('SEARCH_MATCH_CAP', 1000))
+
+# Shortest word indexed by the InnoDB full-text parser (innodb_ft_min_token_size)
+FULLTEXT_MIN_WORD = 3
 
 
 @async_handler
 def list_customers(event, context):
-    """List all customers - GET /customers"""
+    """
+    List all customers - GET /customers
+    Page/limit or keyset (cursor=) pagination; search= runs a ranked search;
+    fields= limits the returned columns
+    """
     auth.validate_request(event)
     
     query_params = event.get('queryStringParameters') or {}
-    page = int(query_params.get('page', 1))
-    limit = int(query_params.get('limit', 50))
-    offset = (page - 1) * limit
-    search = query_params.get('search', '')
+    search = query_params.get('search', '').strip()
+    if search:
+        return _search_customers(query_params, search)
     
     sql = '''
-        SELECT id, customer_name, contact_person, phone, email, gst_number,
-               address, city, state, pincode, is_active, created_at, updated_at
+        SELECT {columns}
         FROM customers
         WHERE 1=1
     '''
     params = []
+    version_columns = f'id, {etag.VERSION_COLUMN}'
     
-    if search:
-        sql += ' AND (customer_name LIKE %s OR contact_person LIKE %s OR phone LIKE %s OR email LIKE %s)'
-        search_param = f'%{search}%'
-        params.extend([search_param, search_param, search_param, search_param])
+    if pagination.is_cursor_mode(query_params):
+        columns = _select_list(query_params, KEYSET_COLUMNS + [etag.VERSION_COLUMN])
+        limit = pagination.get_limit(query_params)
+        after = pagination.decode_cursor(query_params.get('cursor'), KEYSET_COLUMNS)
+        if after is not None:
+            condition, condition_params = pagination.keyset_condition(KEYSET_COLUMNS, after)
+            sql += f' AND {condition}'
+            params.extend(condition_params)
+        sql += f' ORDER BY {pagination.order_by(KEYSET_COLUMNS)} LIMIT %s'
+        
+        if etag.requested(event):
+            versions = db.query(sql.format(columns=version_columns), tuple(params + [limit]))
+            unchanged = etag.not_modified(event, etag.weak(versions))
+            if unchanged:
+                return unchanged
+        
+        customers, next_cursor = pagination.keyset_page(
+            db.query(sql.format(columns=columns), tuple(params + [limit + 1])),
+            KEYSET_COLUMNS, limit
+        )
+        return etag.tag(response.success({
+            'customers': customers,
+            'pagination': {
+                'limit': limit,
+                'nextCursor': next_cursor
+            }
+        }), etag.weak(customers))
+    
+    page = int(query_params.get('page', 1))
+    limit = int(query_params.get('limit', 50))
+    offset = (page - 1) * limit
+    mode = pagination.get_total_mode(query_params)
+    columns = _select_list(query_params, ['id', etag.VERSION_COLUMN])
     
     sql += ' ORDER BY created_at DESC LIMIT %s OFFSET %s'
-    params.extend([limit, offset])
     
-    customers = db.query(sql, tuple(params))
+    # Get total count (part of the page ETag, so before the version check)
+    total, mode_used = pagination.count_total('customers', mode)
     
-    # Get total count
-    count_sql = 'SELECT COUNT(*) as total FROM customers WHERE 1=1'
-    count_params = []
-    if search:
-        count_sql += ' AND (customer_name LIKE %s OR contact_person LIKE %s OR phone LIKE %s OR email LIKE %s)'
-        count_params = [search_param, search_param, search_param, search_param]
+    if etag.requested(event):
+        versions = db.query(sql.format(columns=version_columns), tuple(params + [limit, offset]))
+        unchanged = etag.not_modified(event, etag.weak(versions, extra=(total, mode_used)))
+        if unchanged:
+            return unchanged
+    
+    params.extend([limit + 1 if mode == 'none' else limit, offset])
+    customers = db.query(sql.format(columns=columns), tuple(params))
+    customers, page_info = pagination.offset_page(customers, page, limit, total, mode_used)
+    
+    return etag.tag(response.success({
+        'customers': customers,
+        'pagination': page_info
+    }), etag.weak(customers, extra=(total, mode_used)))
+
+
+def _select_list(query_params, required):
+    """SELECT list for ?fields= (always including required columns)"""
+    columns = projection.parse_fields(query_params, 'customers', required)
+    return ', '.join(columns) if columns else CUSTOMER_COLUMNS
+
+
+def _search_terms(search):
+    """
+    Normalise a search string the same way as the generated search columns
+    
+    Phone and GST terms are only produced for input that looks like a phone
+    number or a GST number, so a name search doesn't fan out to every index.
+    """
+    name = re.sub(r'[\W_]+', ' ', search.lower()).strip()
+    words = [word for word in name.split() if len(word) >= FULLTEXT_MIN_WORD]
+    
+    digits = ''
+    if re.fullmatch(r'[\d\s+()-]+', search):
+        digits = re.sub(r'\D', '', re.sub(r'^\s*(?:\+\s*91|0)', '', search))
+        digits = digits[-10:]
+    
+    gst = ''
+    if re.fullmatch(r'[\w\s-]+', search) and re.search(r'\d', search) and re.search(r'[^\W\d_]', search):
+        gst = re.sub(r'[\W_]', '', search.upper())
+    
+    # Email prefix, with LIKE wildcards escaped; only for input containing @
+    email = ''
+    if '@' in search:
+        email = re.sub(r'([\\%_])', r'\\\1', search.strip())
+    
+    return {
+        'name': name,
+        'digits': digits,
+        'gst': gst,
+        'email': email,
+        'fulltext': ' '.join(f'+{word}*' for word in words)
+    }
+
+
+def _search_customers(query_params, search):
+    """
+    Ranked customer search
     
-    total_result = db.query(count_sql, tuple(count_params))
-    total = total_result[0]['total'] if total_result else 0
+    Every branch is a prefix or full-text lookup on an index (search_name,
+    phone_digits, search_gst, email, ft_customer_name) capped at
+    SEARCH_MATCH_CAP rows. Matches are ranked exact name or email > name
+    prefix > phone/GST/email prefix > full-text relevance, then paged, and
+    only the page's rows are fetched.
+    """
+    if pagination.is_cursor_mode(query_params):
+        raise ValidationError('cursor pagination is not supported with search')
     
+    page = int(query_params.get('page', 1))
+    limit = int(query_params.get('limit', 50))
+    columns = _select_list(query_params, ['id'])
+    terms = _search_terms(search)
+    
+    branches, params = [], []
+    if terms['name']:
+        branches.append(
+            'SELECT 0 as branch, id, IF(search_name = %s, 100, 80) as score, search_name '
+            'FROM customers WHERE search_name LIKE %s LIMIT %s'
+        )
+        params.extend([terms['name'], terms['name'] + '%', SEARCH_MATCH_CAP])
+    if len(terms['digits']) >= 3:
+        branches.append(
+            'SELECT 1 as branch, id, 70 as score, search_name FROM customers '
+            'WHERE phone_digits LIKE %s LIMIT %s'
+        )
+        params.extend([terms['digits'] + '%', SEARCH_MATCH_CAP])
+    if len(terms['gst']) >= 2:
+        branches.append(
+            'SELECT 2 as branch, id, 70 as score, search_name FROM customers '
+            'WHERE search_gst LIKE %s LIMIT %s'
+        )
+        params.extend([terms['gst'] + '%', SEARCH_MATCH_CAP])
+    if terms['email']:
+        branches.append(
+            'SELECT 4 as branch, id, IF(email = %s, 100, 70) as score, search_name FROM customers '
+            'WHERE email LIKE %s LIMIT %s'
+        )
+        params.extend([search.strip(), terms['email'] + '%', SEARCH_MATCH_CAP])
+    if terms['fulltext']:
+        branches.append(
+            'SELECT 3 as branch, id, 20 + LEAST(MATCH(customer_name, contact_person) AGAINST (%s IN BOOLEAN MODE), 59) as score, '
+            'search_name FROM customers '
+            'WHERE MATCH(customer_name, contact_person) AGAINST (%s IN BOOLEAN MODE) LIMIT %s'
+        )
+        params.extend([terms['fulltext'], terms['fulltext'], SEARCH_MATCH_CAP])
+    
+    matches = {}
+    branch_counts = {}
+    if branches:
+        rows = db.query(' UNION ALL '.join(f'({branch})' for branch in branches), tuple(params))
+        for row in rows:
+            branch_counts[row['branch']] = branch_counts.get(row['branch'], 0) + 1
+            best = matches.get(row['id'])
+            if best is None or row['score'] > best['score']:
+                matches[row['id']] = row
+    
+    ranked = sorted(matches.values(), key=lambda row: (-row['score'], row['search_name'] or '', -row['id']))
+    page_ids = [row['id'] for row in ranked[(page - 1) * limit:page * limit]]
+    
+    customers = []
+    if page_ids:
+        placeholders = ', '.join(['%s'] * len(page_ids))
+        rows = db.query(
+            f'SELECT {columns} FROM customers WHERE id IN ({placeholders})',
+            tuple(page_ids)
+        )
+        by_id = {row['id']: row for row in rows}
+        customers = [by_id[customer_id] for customer_id in page_ids if customer_id in by_id]
+    
+    # A branch that hit its cap may have more matches than we fetched
+    bounded = any(count >= SEARCH_MATCH_CAP for count in branch_counts.values())
+    customers, page_info = pagination.offset_page(
+        customers, page, limit, len(matches), 'bounded' if bounded else 'exact'
+    )
     return response.success({
         'customers': customers,
-        'pagination': {
-            'page': page,
-            'limit': limit,
-            'total': total,
-            'totalPages': (total + limit - 1) // limit
-        }
+        'pagination': page_info
     })
 
 
@@ -69,6 +235,14 @@ def get_customer(event, context):
     auth.validate_request(event)
     
     customer_id = event['pathParameters']['id']
+    if etag.requested(event):
+        versions = db.query('SELECT id, updated_at FROM customers WHERE id = %s', (customer_id,))
+        if not versions:
+            return response.not_found('Customer')
+        unchanged = etag.not_modified(event, etag.strong(versions[0]['id'], versions[0]['updated_at']))
+        if unchanged:
+            return unchanged
+    
     customers = db.query(
         '''SELECT id, customer_name, contact_person, phone, email, gst_number,
                   address, city, state, pincode, is_active, created_at, updated_at
@@ -79,7 +253,46 @@ def get_customer(event, context):
     if not customers:
         return response.not_found('Customer')
     
-    return response.success(customers[0])
+    customer = customers[0]
+    return etag.tag(response.success(customer), etag.strong(customer['id'], customer['updated_at']))
+
+
+@async_handler
+def get_statement(event, context):
+    """
+    Customer statement - GET /customers/{id}/statement
+    Invoices and receipts in date order with a running balance;
+    date_from/date_to (YYYY-MM-DD) limit the period, with the balance
+    before date_from brought forward
+    """
+    auth.validate_request(event)
+    
+    customer_id = event['pathParameters']['id']
+    query_params = event.get('queryStringParameters') or {}
+    dates = {}
+    for name in ('date_from', 'date_to'):
+        if query_params.get(name):
+            try:
+                dates[name] = datetime.date.fromisoformat(query_params[name]).isoformat()
+            except ValueError:
+                raise ValidationError(f'{name} must be a date (YYYY-MM-DD)')
+    
+    customers = db.query('SELECT id, customer_name FROM customers WHERE id = %s', (customer_id,))
+    if not customers:
+        return response.not_found('Customer')
+    
+    sql, params, opening, snapshot_date = statements.build(customer_id, dates.get('date_from'), dates.get('date_to'))
+    entries = db.query(sql, tuple(params))
+    
+    return response.success({
+        'customer': customers[0],
+        'dateFrom': dates.get('date_from'),
+        'dateTo': dates.get('date_to'),
+        'openingBalance': opening,
+        'openingSnapshot': snapshot_date,
+        'closingBalance': entries[-1]['balance'] if entries else opening,
+        'entries': entries
+    })
 
 
 @async_handler
@@ -111,6 +324,8 @@ def create_customer(event, context):
             user['id']
         )
     )
+    pagination.invalidate_totals('customers')
+    cache.bump_version('customers')
     
     return response.success({
         'id': result['last_insert_id'],
@@ -151,6 +366,8 @@ def update_customer(event, context):
             customer_id
         )
     )
+    pagination.invalidate_totals('customers')
+    cache.bump_version('customers')
     
     return response.success({'message': 'Customer updated successfully'})
 
@@ -171,5 +388,7 @@ def delete_customer(event, context):
         'UPDATE customers SET is_active = 0, updated_at = NOW() WHERE id = %s',
         (customer_id,)
     )
+    pagination.invalidate_totals('customers')
+    cache.bump_version('customers')
     
     return response.success({'message': 'Customer deleted successfully'})
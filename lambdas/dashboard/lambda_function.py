@@ -7,7 +7,7 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils import db, auth, response
+from utils import db, auth, response, cache
 from utils.error_handler import async_handler
 
 # Constants
@@ -17,6 +17,46 @@ ORDER_STATUS = {
     'CANCELLED': 'cancelled'
 }
 
+# Source tables for each cached endpoint (see utils.cache)
+STATS_TABLES = ('customers', 'sales_invoices', 'sales_orders')
+QUANTITY_TABLES = ('delivery_challans',)
+SUMMARY_TABLES = ('sales_invoices', 'sales_orders')
+
+# Window bounds on the database clock, matching the old SQL predicates:
+#   day   - DATE(d) = CURDATE()
+#   week  - YEARWEEK(d) = YEARWEEK(CURDATE()), i.e. Sunday to Saturday
+#   month - same YEAR() and MONTH() as CURDATE()
+#   year  - YEAR(d) = YEAR(CURDATE())
+# Each is a constant for the statement, so rollup_date stays a range scan
+WEEK_START = 'CURDATE() - INTERVAL (DAYOFWEEK(CURDATE()) - 1) DAY'
+MONTH_START = 'CURDATE() - INTERVAL (DAYOFMONTH(CURDATE()) - 1) DAY'
+YEAR_START = 'MAKEDATE(YEAR(CURDATE()), 1)'
+
+# Per-day totals are read from the rollup tables maintained by utils.rollups,
+# so each query touches at most one row per day in the current window
+STATS_SQL = f'''
+    SELECT c.active_customers, i.invoice_count, i.revenue_total, o.pending_orders
+    FROM (SELECT COUNT(*) as active_customers FROM customers WHERE is_active = 1) c
+    CROSS JOIN (
+        SELECT SUM(invoice_count) as invoice_count, SUM(revenue_total) as revenue_total
+        FROM daily_revenue
+        WHERE rollup_date >= {YEAR_START} AND rollup_date < {YEAR_START} + INTERVAL 1 YEAR
+    ) i
+    CROSS JOIN (SELECT COUNT(*) as pending_orders FROM sales_orders WHERE status = %s) o
+'''
+
+QUANTITY_SQL = f'''
+    SELECT
+        SUM(CASE WHEN rollup_date = CURDATE() THEN quantity_total END) as daily,
+        SUM(CASE WHEN rollup_date >= {WEEK_START} AND rollup_date < {WEEK_START} + INTERVAL 7 DAY
+                 THEN quantity_total END) as weekly,
+        SUM(CASE WHEN rollup_date >= {MONTH_START} AND rollup_date < {MONTH_START} + INTERVAL 1 MONTH
+                 THEN quantity_total END) as monthly
+    FROM daily_deliveries
+    WHERE rollup_date >= LEAST({WEEK_START}, {MONTH_START})
+      AND rollup_date < GREATEST({WEEK_START} + INTERVAL 7 DAY, {MONTH_START} + INTERVAL 1 MONTH)
+'''
+
 
 @async_handler
 def stats(event, context):
@@ -26,17 +66,19 @@ def stats(event, context):
     """
     auth.validate_request(event)
     
-    customer_count = db.query('SELECT COUNT(*) as count FROM customers WHERE is_active = 1')
-    invoice_count = db.query('SELECT COUNT(*) as count FROM sales_invoices WHERE YEAR(invoice_date) = YEAR(CURDATE())')
-    revenue_total = db.query('SELECT SUM(total_amount) as total FROM sales_invoices WHERE YEAR(invoice_date) = YEAR(CURDATE())')
-    pending_orders = db.query('SELECT COUNT(*) as count FROM sales_orders WHERE status = %s', (ORDER_STATUS['PENDING'],))
+    def compute():
+        result = db.query(STATS_SQL, (ORDER_STATUS['PENDING'],))
+        row = result[0] if result else {}
+        return response.success({
+            'activeCustomers': row.get('active_customers') or 0,
+            'totalInvoices': row.get('invoice_count') or 0,
+            'yearlyRevenue': row.get('revenue_total') or 0,
+            'pendingOrders': row.get('pending_orders') or 0
+        })
     
-    return response.success({
-        'activeCustomers': customer_count[0]['count'] if customer_count else 0,
-        'totalInvoices': invoice_count[0]['count'] if invoice_count else 0,
-        'yearlyRevenue': revenue_total[0]['total'] if revenue_total and revenue_total[0]['total'] else 0,
-        'pendingOrders': pending_orders[0]['count'] if pending_orders else 0
-    })
+    # The windows roll over with CURDATE(); a cached response outlives
+    # midnight by at most CACHE_TTL
+    return cache.cached_response('dashboard:stats', STATS_TABLES, compute)
 
 
 @async_handler
@@ -47,15 +89,16 @@ def quantity(event, context):
     """
     auth.validate_request(event)
     
-    daily = db.query('SELECT SUM(quantity) as total FROM delivery_challans WHERE DATE(delivery_date) = CURDATE()')
-    weekly = db.query('SELECT SUM(quantity) as total FROM delivery_challans WHERE YEARWEEK(delivery_date) = YEARWEEK(CURDATE())')
-    monthly = db.query('SELECT SUM(quantity) as total FROM delivery_challans WHERE YEAR(delivery_date) = YEAR(CURDATE()) AND MONTH(delivery_date) = MONTH(CURDATE())')
+    def compute():
+        result = db.query(QUANTITY_SQL)
+        row = result[0] if result else {}
+        return response.success({
+            'daily': row.get('daily') or 0,
+            'weekly': row.get('weekly') or 0,
+            'monthly': row.get('monthly') or 0
+        })
     
-    return response.success({
-        'daily': daily[0]['total'] if daily and daily[0]['total'] else 0,
-        'weekly': weekly[0]['total'] if weekly and weekly[0]['total'] else 0,
-        'monthly': monthly[0]['total'] if monthly and monthly[0]['total'] else 0
-    })
+    return cache.cached_response('dashboard:quantity', QUANTITY_TABLES, compute)
 
 
 @async_handler
@@ -66,21 +109,24 @@ def summary_handler(event, context):
     """
     auth.validate_request(event)
     
-    recent_invoices = db.query('''
-        SELECT id, invoice_number, total_amount, invoice_date
-        FROM sales_invoices
-        ORDER BY created_at DESC
-        LIMIT 5
-    ''')
-    
-    recent_orders = db.query('''
-        SELECT id, order_number, status, order_date
-        FROM sales_orders
-        ORDER BY created_at DESC
-        LIMIT 5
-    ''')
+    def compute():
+        recent_invoices = db.query('''
+            SELECT id, invoice_number, total_amount, invoice_date
+            FROM sales_invoices
+            ORDER BY created_at DESC
+            LIMIT 5
+        ''')
+        
+        recent_orders = db.query('''
+            SELECT id, order_number, status, order_date
+            FROM sales_orders
+            ORDER BY created_at DESC
+            LIMIT 5
+        ''')
+        
+        return response.success({
+            'recentInvoices': recent_invoices,
+            'recentOrders': recent_orders
+        })
     
-    return response.success({
-        'recentInvoices': recent_invoices,
-        'recentOrders': recent_orders
-    })
+    return cache.cached_response('dashboard:summary', SUMMARY_TABLES, compute)
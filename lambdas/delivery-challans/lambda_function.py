@@ -1,11 +1,24 @@
 """Delivery Challan Lambda Functions"""
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from utils import rollups
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('delivery_challans')
+handler = create_crud_handler(
+    'delivery_challans',
+    on_change=rollups.record_challan_change,
+    filters={
+        'delivery_date': 'range',
+        'customer_id': 'in',
+        'vehicle_number': 'eq',
+        'status': 'in'
+    },
+    sort_keys=('delivery_date',),
+    cached=True
+)
 
 list_challans = handler['list']
+export_challans = handler['export']
 get_challan = handler['get_by_id']
 create_challan = handler['create']
 update_challan = handler['update']
@@ -3,9 +3,10 @@ import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('mix_designs')
+handler = create_crud_handler('mix_designs', cached=True)
 
 list_designs = handler['list']
+export_designs = handler['export']
 get_design = handler['get_by_id']
 create_design = handler['create']
 update_design = handler['update']
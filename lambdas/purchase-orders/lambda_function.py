@@ -6,6 +6,7 @@ from utils.crud_handler import create_crud_handler
 handler = create_crud_handler('purchase_orders')
 
 list_orders = handler['list']
+export_orders = handler['export']
 get_order = handler['get_by_id']
 create_order = handler['create']
 update_order = handler['update']
@@ -6,6 +6,7 @@ from utils.crud_handler import create_crud_handler
 handler = create_crud_handler('quotations')
 
 list_quotations = handler['list']
+export_quotations = handler['export']
 get_quotation = handler['get_by_id']
 create_quotation = handler['create']
 update_quotation = handler['update']
@@ -6,6 +6,7 @@ from utils.crud_handler import create_crud_handler
 handler = create_crud_handler('recipes')
 
 list_recipes = handler['list']
+export_recipes = handler['export']
 get_recipe = handler['get_by_id']
 create_recipe = handler['create']
 update_recipe = handler['update']
@@ -1,5 +1,6 @@
 """
 Reports Lambda Functions
+Report definitions served through the report engine (see utils.report_engine)
 """
 
 import sys
@@ -7,60 +8,124 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils import auth, response
-from utils.error_handler import async_handler
-
-
-@async_handler
-def list_reports(event, context):
-    """
-    List available reports
-    GET /reports
-    """
-    auth.validate_request(event)
-    
-    reports = [
-        {'id': 'sales-summary', 'name': 'Sales Summary Report', 'type': 'pdf'},
-        {'id': 'customer-statement', 'name': 'Customer Statement', 'type': 'pdf'},
-        {'id': 'inventory-report', 'name': 'Inventory Report', 'type': 'excel'},
-        {'id': 'qc-report', 'name': 'Quality Control Report', 'type': 'pdf'},
-        {'id': 'financial-summary', 'name': 'Financial Summary', 'type': 'pdf'}
-    ]
-    
-    return response.success(reports)
-
-
-@async_handler
-def preview(event, context):
-    """
-    Preview report
-    GET /reports/preview
-    """
-    auth.validate_request(event)
-    
-    query_params = event.get('queryStringParameters') or {}
-    report_id = query_params.get('report_id')
-    
-    # This would generate report data based on reportId
-    return response.success({
-        'reportId': report_id,
-        'message': 'Report preview functionality to be implemented'
-    })
-
-
-@async_handler
-def download(event, context):
-    """
-    Download report
-    GET /reports/download
-    """
-    auth.validate_request(event)
-    
-    query_params = event.get('queryStringParameters') or {}
-    report_id = query_params.get('report_id')
-    
-    # This would generate and return downloadable report
-    return response.success({
-        'reportId': report_id,
-        'message': 'Report download functionality to be implemented'
-    })
+from utils import statements
+from utils.report_engine import create_report_engine
+
+
+def _date_range(column, params, conditions, args):
+    """Append date_from/date_to conditions on a date column"""
+    if 'date_from' in params:
+        conditions.append(f'{column} >= %s')
+        args.append(params['date_from'])
+    if 'date_to' in params:
+        conditions.append(f'{column} <= %s')
+        args.append(params['date_to'])
+
+
+def _where(conditions):
+    """WHERE clause for a list of conditions ('' when empty)"""
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+
+def _sales_summary(params):
+    """Invoice count and amounts per day"""
+    conditions, args = [], []
+    _date_range('invoice_date', params, conditions, args)
+    return f'''SELECT invoice_date, COUNT(*) as invoice_count,
+                      SUM(subtotal) as subtotal, SUM(tax_amount) as tax_amount,
+                      SUM(discount_amount) as discount_amount, SUM(total_amount) as total_amount
+               FROM sales_invoices{_where(conditions)}
+               GROUP BY invoice_date
+               ORDER BY invoice_date''', args
+
+
+def _customer_statement(params):
+    """One customer's invoices and receipts with a running balance"""
+    sql, args, _, _ = statements.build(params['customer_id'], params.get('date_from'), params.get('date_to'))
+    return sql, args
+
+
+def _inventory(params):
+    """Aggregate purchases per material type"""
+    conditions, args = [], []
+    _date_range('purchase_date', params, conditions, args)
+    return f'''SELECT aggregate_type, COUNT(*) as purchase_count,
+                      SUM(quantity) as quantity, SUM(amount) as amount,
+                      SUM(CASE WHEN payment_status = 'pending' OR payment_status IS NULL
+                               THEN amount ELSE 0 END) as pending_amount
+               FROM aggregates{_where(conditions)}
+               GROUP BY aggregate_type
+               ORDER BY aggregate_type''', args
+
+
+def _qc(params):
+    """Cube test results with their mix design"""
+    conditions, args = [], []
+    _date_range('ct.test_date', params, conditions, args)
+    return f'''SELECT ct.test_date, ct.test_number, md.design_name, md.grade, ct.casting_date,
+                      ct.age_days, ct.strength_result, ct.required_strength, ct.test_status
+               FROM cube_tests ct
+               LEFT JOIN mix_designs md ON ct.mix_design_id = md.id{_where(conditions)}
+               ORDER BY ct.test_date, ct.id''', args
+
+
+def _financial_summary(params):
+    """Cash book credits, debits and balance per month"""
+    conditions, args = [], []
+    _date_range('transaction_date', params, conditions, args)
+    return f'''SELECT DATE_FORMAT(transaction_date, '%%Y-%%m') as month,
+                      SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE 0 END) as total_credit,
+                      SUM(CASE WHEN transaction_type = 'debit' THEN amount ELSE 0 END) as total_debit,
+                      SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE -amount END) as net
+               FROM cash_book{_where(conditions)}
+               GROUP BY month
+               ORDER BY month''', args
+
+
+DATE_RANGE = {'date_from': 'date', 'date_to': 'date'}
+
+REPORTS = {
+    'sales-summary': {
+        'name': 'Sales Summary Report',
+        'tables': ('sales_invoices',),
+        'params': DATE_RANGE,
+        'query': _sales_summary
+    },
+    'customer-statement': {
+        'name': 'Customer Statement',
+        'tables': ('sales_invoices', 'cash_book'),
+        'params': dict(DATE_RANGE, customer_id='int'),
+        'required': ('customer_id',),
+        'query': _customer_statement,
+        'columns': statements.STATEMENT_COLUMNS
+    },
+    'inventory-report': {
+        'name': 'Inventory Report',
+        'tables': ('aggregates',),
+        'params': DATE_RANGE,
+        'query': _inventory
+    },
+    'qc-report': {
+        'name': 'Quality Control Report',
+        'tables': ('cube_tests', 'mix_designs'),
+        'params': DATE_RANGE,
+        'query': _qc
+    },
+    'financial-summary': {
+        'name': 'Financial Summary',
+        'tables': ('cash_book',),
+        'params': DATE_RANGE,
+        'query': _financial_summary
+    }
+}
+
+engine = create_report_engine(REPORTS)
+
+# Export handlers
+list_reports = engine['list']
+preview = engine['preview']
+download = engine['download']
+submit_report = engine['submit']
+get_report_job = engine['status']
+get_report_result = engine['result']
+run_report_job = engine['run']
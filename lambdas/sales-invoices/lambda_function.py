@@ -6,54 +6,221 @@ Handles CRUD operations for sales invoices
 import json
 import sys
 import os
+from decimal import Decimal, InvalidOperation
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils import db, auth, response
+from utils import db, auth, response, pagination, cache, rollups, statements, etag, projection, export
 from utils.error_handler import async_handler
 
+# Sort key for keyset (cursor) pagination
+KEYSET_COLUMNS = ['si.invoice_date', 'si.created_at', 'si.id']
+
+# Line item columns written from the request body
+ITEM_FIELDS = ('item_description', 'quantity', 'unit_price', 'tax_rate', 'amount')
+
+INSERT_ITEM_SQL = '''INSERT INTO sales_invoice_items (
+    invoice_id, item_description, quantity, unit_price, tax_rate, amount
+) VALUES (%s, %s, %s, %s, %s, %s)'''
+
+# Columns for list pages; customer_updated_at feeds the page ETag (so a
+# renamed customer refreshes customer_name) and is dropped from the response
+LIST_COLUMNS = 'si.*, c.customer_name, c.updated_at as customer_updated_at'
+LIST_VERSION_COLUMNS = 'si.id, si.updated_at, c.updated_at as customer_updated_at'
+LIST_ETAG_COLUMNS = ('updated_at', 'customer_updated_at')
+
+# Invoice export: one row per line item with its invoice header
+EXPORT_COLUMNS = [
+    ('si.id', 'invoice_id'), ('si.invoice_number', 'invoice_number'),
+    ('si.invoice_date', 'invoice_date'), ('si.due_date', 'due_date'),
+    ('si.customer_id', 'customer_id'), ('c.customer_name', 'customer_name'),
+    ('si.status', 'status'), ('si.subtotal', 'subtotal'), ('si.tax_amount', 'tax_amount'),
+    ('si.discount_amount', 'discount_amount'), ('si.total_amount', 'total_amount'),
+    ('sii.id', 'item_id'), ('sii.item_description', 'item_description'),
+    ('sii.quantity', 'quantity'), ('sii.unit_price', 'unit_price'),
+    ('sii.tax_rate', 'tax_rate'), ('sii.amount', 'amount')
+]
+
+# Everything a single invoice response depends on. Items are only ever
+# inserted or deleted (see _sync_items), so their count and newest id
+# change with every item write.
+INVOICE_VERSION_SQL = '''
+    SELECT si.id, si.updated_at, c.updated_at as customer_updated_at,
+           COUNT(sii.id) as item_count, MAX(sii.id) as last_item_id
+    FROM sales_invoices si
+    LEFT JOIN customers c ON si.customer_id = c.id
+    LEFT JOIN sales_invoice_items sii ON sii.invoice_id = si.id
+    WHERE si.id = %s
+    GROUP BY si.id, si.updated_at, c.updated_at
+'''
+
+
+def _invoice_etag(version):
+    """Strong ETag for an invoice from the INVOICE_VERSION_SQL columns"""
+    return etag.strong(
+        version['id'],
+        version['updated_at'],
+        version['customer_updated_at'],
+        version['item_count'],
+        version['last_item_id']
+    )
+
+
+def _select_list(query_params, required):
+    """SELECT list for list pages, projected to ?fields= when given"""
+    fields = projection.parse_fields(query_params, 'sales_invoices', required, extra=('customer_name',))
+    if not fields:
+        return LIST_COLUMNS
+    columns = ['c.customer_name' if field == 'customer_name' else f'si.{field}' for field in fields]
+    return ', '.join(columns + ['c.updated_at as customer_updated_at'])
+
+
+def _etag_extra(page_info):
+    """Pagination values a page ETag covers besides its rows (offset pages only)"""
+    if 'totalMode' not in page_info:
+        return ()
+    return (page_info['total'], page_info['totalMode'])
+
+
+def _list_response(invoices, page_info):
+    """List response tagged with the page ETag, without the version column"""
+    page_etag = etag.weak(invoices, 'id', LIST_ETAG_COLUMNS, _etag_extra(page_info))
+    for invoice in invoices:
+        invoice.pop('customer_updated_at', None)
+    return etag.tag(response.success({
+        'invoices': invoices,
+        'pagination': page_info
+    }), page_etag)
+
 
 @async_handler
 def list_invoices(event, context):
-    """List all sales invoices - GET /sales-invoices"""
+    """
+    List all sales invoices - GET /sales-invoices
+    Page/limit or keyset (cursor=) pagination; fields= limits the returned columns
+    """
     auth.validate_request(event)
     
     query_params = event.get('queryStringParameters') or {}
+    if pagination.is_cursor_mode(query_params):
+        return _list_invoices_by_cursor(event, query_params)
+    
     page = int(query_params.get('page', 1))
     limit = int(query_params.get('limit', 50))
     offset = (page - 1) * limit
+    mode = pagination.get_total_mode(query_params)
+    columns = _select_list(query_params, ['id', 'updated_at'])
+    
+    sql = '''SELECT {columns}
+             FROM sales_invoices si
+             LEFT JOIN customers c ON si.customer_id = c.id
+             ORDER BY si.invoice_date DESC, si.created_at DESC
+             LIMIT %s OFFSET %s'''
+    
+    # The total is part of the page ETag, so it is needed before the version check
+    total, mode_used = pagination.count_total('sales_invoices', mode)
+    
+    if etag.requested(event):
+        versions = db.query(sql.format(columns=LIST_VERSION_COLUMNS), (limit, offset))
+        unchanged = etag.not_modified(
+            event, etag.weak(versions, 'id', LIST_ETAG_COLUMNS, (total, mode_used))
+        )
+        if unchanged:
+            return unchanged
     
     invoices = db.query(
-        '''SELECT si.*, c.customer_name
-           FROM sales_invoices si
-           LEFT JOIN customers c ON si.customer_id = c.id
-           ORDER BY si.invoice_date DESC, si.created_at DESC
-           LIMIT %s OFFSET %s''',
-        (limit, offset)
+        sql.format(columns=columns),
+        (limit + 1 if mode == 'none' else limit, offset)
     )
+    invoices, page_info = pagination.offset_page(invoices, page, limit, total, mode_used)
     
-    total_result = db.query('SELECT COUNT(*) as total FROM sales_invoices')
-    total = total_result[0]['total'] if total_result else 0
+    return _list_response(invoices, page_info)
+
+
+def _list_invoices_by_cursor(event, query_params):
+    """List one keyset page ordered by (invoice_date, created_at, id) DESC"""
+    limit = pagination.get_limit(query_params)
+    after = pagination.decode_cursor(query_params.get('cursor'), KEYSET_COLUMNS)
+    columns = _select_list(query_params, ['invoice_date', 'created_at', 'id', 'updated_at'])
     
-    return response.success({
-        'invoices': invoices,
-        'pagination': {
-            'page': page,
-            'limit': limit,
-            'total': total,
-            'totalPages': (total + limit - 1) // limit
-        }
+    sql = '''SELECT {columns}
+             FROM sales_invoices si
+             LEFT JOIN customers c ON si.customer_id = c.id'''
+    params = []
+    if after is not None:
+        condition, params = pagination.keyset_condition(KEYSET_COLUMNS, after)
+        sql += f' WHERE {condition}'
+    sql += f' ORDER BY {pagination.order_by(KEYSET_COLUMNS)} LIMIT %s'
+    
+    if etag.requested(event):
+        versions = db.query(sql.format(columns=LIST_VERSION_COLUMNS), tuple(params + [limit]))
+        unchanged = etag.not_modified(event, etag.weak(versions, 'id', LIST_ETAG_COLUMNS))
+        if unchanged:
+            return unchanged
+    
+    invoices, next_cursor = pagination.keyset_page(
+        db.query(sql.format(columns=columns), tuple(params + [limit + 1])),
+        KEYSET_COLUMNS, limit
+    )
+    
+    return _list_response(invoices, {
+        'limit': limit,
+        'nextCursor': next_cursor
     })
 
 
+@async_handler
+def export_invoices(event, context):
+    """
+    Export invoices with their line items - GET /sales-invoices/export
+    One row per item (invoices without items get one row with empty item
+    columns); invoice_date_from/invoice_date_to, customer_id and format=csv|ndjson
+    """
+    auth.validate_request(event)
+    
+    query_params = event.get('queryStringParameters') or {}
+    fmt = export.get_format(query_params)
+    
+    conditions, params = [], []
+    if query_params.get('invoice_date_from'):
+        conditions.append('si.invoice_date >= %s')
+        params.append(query_params['invoice_date_from'])
+    if query_params.get('invoice_date_to'):
+        conditions.append('si.invoice_date <= %s')
+        params.append(query_params['invoice_date_to'])
+    if query_params.get('customer_id'):
+        conditions.append('si.customer_id = %s')
+        params.append(query_params['customer_id'])
+    
+    sql = f"""SELECT {', '.join(f'{column} as {name}' for column, name in EXPORT_COLUMNS)}
+              FROM sales_invoices si
+              LEFT JOIN customers c ON si.customer_id = c.id
+              LEFT JOIN sales_invoice_items sii ON sii.invoice_id = si.id"""
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    sql += ' ORDER BY si.invoice_date, si.id, sii.id'
+    
+    return response.success(export.export_query(
+        sql, tuple(params), 'sales_invoices', fmt, [name for _, name in EXPORT_COLUMNS]
+    ))
+
+
 @async_handler
 def get_invoice(event, context):
     """Get invoice by ID - GET /sales-invoices/{id}"""
     auth.validate_request(event)
     
     invoice_id = event['pathParameters']['id']
+    if etag.requested(event):
+        versions = db.query(INVOICE_VERSION_SQL, (invoice_id,))
+        if not versions:
+            return response.not_found('Sales Invoice')
+        unchanged = etag.not_modified(event, _invoice_etag(versions[0]))
+        if unchanged:
+            return unchanged
+    
     invoices = db.query(
-        '''SELECT si.*, c.customer_name
+        '''SELECT si.*, c.customer_name, c.updated_at as customer_updated_at
            FROM sales_invoices si
            LEFT JOIN customers c ON si.customer_id = c.id
            WHERE si.id = %s''',
@@ -72,7 +239,14 @@ def get_invoice(event, context):
     invoice = invoices[0]
     invoice['items'] = items
     
-    return response.success(invoice)
+    current = _invoice_etag({
+        'id': invoice['id'],
+        'updated_at': invoice['updated_at'],
+        'customer_updated_at': invoice.pop('customer_updated_at'),
+        'item_count': len(items),
+        'last_item_id': max((item['id'] for item in items), default=None)
+    })
+    return etag.tag(response.success(invoice), current)
 
 
 @async_handler
@@ -111,21 +285,14 @@ def create_invoice(event, context):
     
     invoice_id = result['last_insert_id']
     
-    # Insert items
-    for item in items:
-        db.execute(
-            '''INSERT INTO sales_invoice_items (
-                invoice_id, item_description, quantity, unit_price, tax_rate, amount
-            ) VALUES (%s, %s, %s, %s, %s, %s)''',
-            (
-                invoice_id,
-                item.get('item_description'),
-                item.get('quantity'),
-                item.get('unit_price'),
-                item.get('tax_rate'),
-                item.get('amount')
-            )
-        )
+    # Insert items (one multi-row insert, same transaction as the header)
+    _insert_items(invoice_id, items)
+    stored = _stored_invoice(invoice_id)
+    rollups.record_invoice_change(None, stored)
+    statements.record_invoice_change(None, stored)
+    
+    pagination.invalidate_totals('sales_invoices')
+    cache.bump_version('sales_invoices')
     
     return response.success({
         'id': invoice_id,
@@ -140,8 +307,11 @@ def update_invoice(event, context):
     invoice_id = event['pathParameters']['id']
     body = json.loads(event['body'])
     
-    # Check if invoice exists
-    existing = db.query('SELECT id FROM sales_invoices WHERE id = %s', (invoice_id,))
+    # Check if invoice exists (locked so the rollup delta is consistent)
+    existing = db.query(
+        'SELECT id, customer_id, invoice_date, total_amount FROM sales_invoices WHERE id = %s FOR UPDATE',
+        (invoice_id,)
+    )
     if not existing:
         return response.not_found('Sales Invoice')
     
@@ -166,29 +336,85 @@ def update_invoice(event, context):
             invoice_id
         )
     )
+    stored = _stored_invoice(invoice_id)
+    rollups.record_invoice_change(existing[0], stored)
+    statements.record_invoice_change(existing[0], stored)
+    cache.bump_version('sales_invoices')
     
     # Update items if provided
     items = body.get('items')
     if items is not None:
-        db.execute('DELETE FROM sales_invoice_items WHERE invoice_id = %s', (invoice_id,))
-        for item in items:
-            db.execute(
-                '''INSERT INTO sales_invoice_items (
-                    invoice_id, item_description, quantity, unit_price, tax_rate, amount
-                ) VALUES (%s, %s, %s, %s, %s, %s)''',
-                (
-                    invoice_id,
-                    item.get('item_description'),
-                    item.get('quantity'),
-                    item.get('unit_price'),
-                    item.get('tax_rate'),
-                    item.get('amount')
-                )
-            )
+        _sync_items(invoice_id, items)
     
     return response.success({'message': 'Sales invoice updated successfully'})
 
 
+def _stored_invoice(invoice_id):
+    """Invoice columns the rollups need, as stored (re-read inside the write's transaction)"""
+    rows = db.query(
+        'SELECT id, customer_id, invoice_date, total_amount FROM sales_invoices WHERE id = %s',
+        (invoice_id,)
+    )
+    return rows[0] if rows else None
+
+
+def _insert_items(invoice_id, items):
+    """Insert line items for an invoice as a single multi-row INSERT"""
+    db.execute_many(
+        INSERT_ITEM_SQL,
+        [(invoice_id,) + tuple(item.get(field) for field in ITEM_FIELDS) for item in items]
+    )
+
+
+def _item_key(item):
+    """Comparable identity of a line item (numbers compared by value)"""
+    key = [item.get('item_description')]
+    for field in ITEM_FIELDS[1:]:
+        value = item.get(field)
+        try:
+            key.append(Decimal(str(value)) if value is not None else None)
+        except InvalidOperation:
+            key.append(value)
+    return tuple(key)
+
+
+def _sync_items(invoice_id, items):
+    """
+    Replace an invoice's line items with the given set
+    
+    Items identical to a stored row are left in place; only removed rows are
+    deleted and only new or changed rows are inserted.
+    """
+    existing = db.query(
+        '''SELECT id, item_description, quantity, unit_price, tax_rate, amount
+           FROM sales_invoice_items WHERE invoice_id = %s''',
+        (invoice_id,)
+    )
+    
+    stored = {}
+    for row in existing:
+        stored.setdefault(_item_key(row), []).append(row['id'])
+    
+    new_items = []
+    for item in items:
+        ids = stored.get(_item_key(item))
+        if ids:
+            ids.pop()
+        else:
+            new_items.append(item)
+    
+    stale_ids = [item_id for ids in stored.values() for item_id in ids]
+    if stale_ids:
+        placeholders = ', '.join(['%s'] * len(stale_ids))
+        db.execute(
+            f'DELETE FROM sales_invoice_items WHERE id IN ({placeholders})',
+            tuple(stale_ids)
+        )
+    
+    if new_items:
+        _insert_items(invoice_id, new_items)
+
+
 @async_handler
 def delete_invoice(event, context):
     """Delete a sales invoice - DELETE /sales-invoices/{id}"""
@@ -196,12 +422,19 @@ def delete_invoice(event, context):
     invoice_id = event['pathParameters']['id']
     
     # Check if invoice exists
-    existing = db.query('SELECT id FROM sales_invoices WHERE id = %s', (invoice_id,))
+    existing = db.query(
+        'SELECT id, customer_id, invoice_date, total_amount FROM sales_invoices WHERE id = %s FOR UPDATE',
+        (invoice_id,)
+    )
     if not existing:
         return response.not_found('Sales Invoice')
     
     # Delete items and invoice
     db.execute('DELETE FROM sales_invoice_items WHERE invoice_id = %s', (invoice_id,))
     db.execute('DELETE FROM sales_invoices WHERE id = %s', (invoice_id,))
+    rollups.record_invoice_change(existing[0], None)
+    statements.record_invoice_change(existing[0], None)
+    pagination.invalidate_totals('sales_invoices')
+    cache.bump_version('sales_invoices')
     
     return response.success({'message': 'Sales invoice deleted successfully'})
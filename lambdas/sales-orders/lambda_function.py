@@ -3,9 +3,17 @@ import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('sales_orders')
+handler = create_crud_handler(
+    'sales_orders',
+    filters={
+        'customer_id': 'in',
+        'status': 'in'
+    },
+    cached=True
+)
 
 list_orders = handler['list']
+export_orders = handler['export']
 get_order = handler['get_by_id']
 create_order = handler['create']
 update_order = handler['update']
@@ -1,2 +1 @@
 # Lambda utilities package
-__init__.py
@@ -1,11 +1,16 @@
 """
 Authentication Utility
 Handles JWT token validation and user authentication
+
+jwt and bcrypt are imported inside the functions that use them: bcrypt is
+only needed by the login and user management paths, and both add noticeably
+to cold-start import time.
 """
 
 import os
-import jwt
-import bcrypt
+import time
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 JWT_SECRET = os.environ.get('JWT_SECRET')
@@ -14,6 +19,18 @@ JWT_EXPIRY = os.environ.get('JWT_EXPIRY', '24h')
 if not JWT_SECRET:
     raise ValueError('JWT_SECRET environment variable is required')
 
+# Verified tokens kept per container (see verify_token)
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+
+# sha256(token) -> (exp, claims), most recently used last
+_token_cache = OrderedDict()
+
+# Hit/miss counters for this container (see get_token_cache_stats)
+_token_stats = {
+    'hits': 0,
+    'misses': 0
+}
+
 
 def _parse_expiry(expiry_str):
     """Parse expiry string like '24h' to timedelta"""
@@ -29,19 +46,64 @@ def _parse_expiry(expiry_str):
 
 def generate_token(payload):
     """Generate JWT token"""
+    import jwt
+    
     expiry = _parse_expiry(JWT_EXPIRY)
     payload['exp'] = datetime.utcnow() + expiry
     return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
 
 
 def verify_token(token):
-    """Verify JWT token"""
+    """
+    Verify JWT token
+    
+    Claims of verified tokens are cached by token digest until their exp, so
+    repeat calls with the same token skip decoding and signature checks.
+    Tokens without an exp claim are verified every time. jwt is imported
+    on the first cache miss, so warm hits never load it.
+    """
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    cached = _token_cache.get(digest)
+    if cached:
+        if time.time() < cached[0]:
+            _token_cache.move_to_end(digest)
+            _token_stats['hits'] += 1
+            return dict(cached[1])
+        del _token_cache[digest]
+        raise Exception('Token has expired')
+    
+    import jwt
+    
+    _token_stats['misses'] += 1
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+        claims = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
     except jwt.ExpiredSignatureError:
         raise Exception('Token has expired')
     except jwt.InvalidTokenError:
         raise Exception('Invalid token')
+    
+    if isinstance(claims.get('exp'), (int, float)) and TOKEN_CACHE_SIZE > 0:
+        _token_cache[digest] = (claims['exp'], dict(claims))
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return claims
+
+
+def clear_token_cache():
+    """Drop all cached verified tokens (e.g. after rotating JWT_SECRET)"""
+    _token_cache.clear()
+
+
+def get_token_cache_stats():
+    """
+    Get verified-token cache counters for this container
+    
+    Returns:
+        Dictionary with hit and miss counts, cache size and the hit rate
+    """
+    lookups = _token_stats['hits'] + _token_stats['misses']
+    hit_rate = _token_stats['hits'] / lookups if lookups else 0.0
+    return dict(_token_stats, entries=len(_token_cache), hit_rate=hit_rate)
 
 
 def extract_token(event):
@@ -67,10 +129,14 @@ def validate_request(event):
 
 def hash_password(password):
     """Hash password using bcrypt"""
+    import bcrypt
+    
     salt = bcrypt.gensalt(rounds=10)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
 def compare_password(password, password_hash):
     """Compare password with hash"""
+    import bcrypt
+    
     return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
@@ -0,0 +1,172 @@
+"""
+Blob Store Utility
+Pluggable storage for generated files (exports and report artifacts)
+
+Files are written incrementally through a writer (write/close/abort) and
+handed out as a download reference. The s3 backend writes multipart
+uploads to BLOB_BUCKET (or an S3-compatible store at BLOB_S3_ENDPOINT) and
+references are presigned URLs; the local backend writes under BLOB_DIR and
+references are file:// paths, for local runs and tests. BLOB_BACKEND picks
+the backend (s3 when BLOB_BUCKET is set, otherwise local).
+"""
+
+import os
+
+BLOB_BUCKET = os.environ.get('BLOB_BUCKET')
+BLOB_BACKEND = os.environ.get('BLOB_BACKEND', 's3' if BLOB_BUCKET else 'local')
+BLOB_S3_ENDPOINT = os.environ.get('BLOB_S3_ENDPOINT')
+BLOB_DIR = os.environ.get('BLOB_DIR', '/tmp/blobs')
+BLOB_URL_TTL = int(os.environ.get('BLOB_URL_TTL', 3600))
+
+# S3 multipart part size (the minimum for all but the last part is 5 MB)
+S3_PART_BYTES = 8 * 1024 * 1024
+
+
+class LocalStore:
+    """Stores blobs as files under a directory"""
+    
+    def __init__(self, root=BLOB_DIR):
+        self.root = root
+    
+    def _path(self, key):
+        return os.path.join(self.root, key)
+    
+    def open_writer(self, key, content_type):
+        return _LocalWriter(self, key)
+    
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+    
+    def reference(self, key):
+        """Download reference for a stored blob"""
+        return {'location': 'file://' + self._path(key)}
+
+
+class _LocalWriter:
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self.path = store._path(key)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, 'wb')
+    
+    def write(self, data):
+        self.file.write(data)
+    
+    def close(self):
+        """Finish the file and return its download reference"""
+        self.file.close()
+        return self.store.reference(self.key)
+    
+    def abort(self):
+        self.file.close()
+        os.remove(self.path)
+
+
+class S3Store:
+    """Stores blobs in an S3 bucket (boto3 ships with the Lambda runtime)"""
+    
+    def __init__(self, bucket=BLOB_BUCKET, endpoint_url=BLOB_S3_ENDPOINT):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self._client = None
+    
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('s3', endpoint_url=self.endpoint_url)
+        return self._client
+    
+    def open_writer(self, key, content_type):
+        return _S3Writer(self, key, content_type)
+    
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
+            return False
+        return True
+    
+    def reference(self, key):
+        """Download reference for a stored blob, with a presigned URL"""
+        url = self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': key}, ExpiresIn=BLOB_URL_TTL
+        )
+        return {
+            'location': f's3://{self.bucket}/{key}',
+            'url': url,
+            'expiresIn': BLOB_URL_TTL
+        }
+
+
+class _S3Writer:
+    def __init__(self, store, key, content_type):
+        self.store = store
+        self.key = key
+        self.upload_id = store.client.create_multipart_upload(
+            Bucket=store.bucket, Key=key, ContentType=content_type
+        )['UploadId']
+        self.parts = []
+        self.buffer = bytearray()
+    
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= S3_PART_BYTES:
+            self._upload_part()
+    
+    def _upload_part(self):
+        number = len(self.parts) + 1
+        result = self.store.client.upload_part(
+            Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=number, Body=bytes(self.buffer)
+        )
+        self.parts.append({'PartNumber': number, 'ETag': result['ETag']})
+        self.buffer = bytearray()
+    
+    def close(self):
+        """Upload the last part, complete the upload and return its download reference"""
+        if self.buffer or not self.parts:
+            self._upload_part()
+        self.store.client.complete_multipart_upload(
+            Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+        return self.store.reference(self.key)
+    
+    def abort(self):
+        self.store.client.abort_multipart_upload(
+            Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id
+        )
+
+
+BACKENDS = {
+    'local': LocalStore,
+    's3': S3Store
+}
+
+if BLOB_BACKEND not in BACKENDS:
+    raise ValueError(f'Unknown BLOB_BACKEND: {BLOB_BACKEND}')
+
+_store = None
+
+
+def get_store():
+    """The configured store, created on first use"""
+    global _store
+    if _store is None:
+        _store = BACKENDS[BLOB_BACKEND]()
+    return _store
+
+
+def set_store(store):
+    """
+    Replace the store (e.g. a LocalStore on a temporary directory in tests)
+    
+    Args:
+        store: Object with open_writer(key, content_type), exists(key) and
+            reference(key)
+    """
+    global _store
+    _store = store
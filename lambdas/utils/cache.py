@@ -0,0 +1,205 @@
+"""
+Response Cache Utility
+TTL cache for rendered API responses with write-driven invalidation
+
+Cache keys include a version number per source table. Write paths call
+bump_version() inside their transaction, so once a write commits every
+container computes a new key and stops serving the old response, without
+waiting for the TTL. Responses are kept in a per-container LRU and, unless
+CACHE_SHARED_BACKEND=none, in the response_cache MySQL table so a warm
+result computed by one container is reused by the others. Expired rows are
+removed by prune(), run on a schedule.
+"""
+
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from . import db, response
+
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 30))
+CACHE_SIZE = int(os.environ.get('CACHE_SIZE', 128))
+CACHE_SHARED_BACKEND = os.environ.get('CACHE_SHARED_BACKEND', 'mysql')
+
+# cache_key -> (expires_at, body), most recently used last
+_local = OrderedDict()
+
+# Hit/miss counters for this container (see get_stats)
+_stats = {
+    'local_hits': 0,
+    'shared_hits': 0,
+    'misses': 0,
+    'stores': 0
+}
+
+
+def _mysql_get(cache_key):
+    """Read a live entry from the response_cache table"""
+    rows = db.query(
+        'SELECT body FROM response_cache WHERE cache_key = %s AND expires_at > NOW()',
+        (cache_key,)
+    )
+    return rows[0]['body'] if rows else None
+
+
+def _mysql_set(cache_key, body, ttl):
+    """
+    Write an entry to the response_cache table once the request has committed
+    
+    The write runs on its own autocommit statement (see db.on_commit), so a
+    GET never holds response_cache locks for the rest of its request, and a
+    failed write is logged instead of failing the response.
+    """
+    def store():
+        try:
+            db.execute(
+                '''REPLACE INTO response_cache (cache_key, body, expires_at)
+                   VALUES (%s, %s, NOW() + INTERVAL %s SECOND)''',
+                (cache_key, body, int(ttl))
+            )
+        except Exception as error:
+            print(f'Warning: response cache write failed: {error}')
+    
+    db.on_commit(store)
+
+
+def prune(batch_size=1000):
+    """
+    Delete expired response_cache entries in small batches
+    
+    Run on a schedule (python -m utils.cache), not from request handlers.
+    
+    Returns:
+        Number of entries deleted
+    """
+    deleted = 0
+    while True:
+        affected = db.execute(
+            'DELETE FROM response_cache WHERE expires_at < NOW() LIMIT %s', (batch_size,)
+        )['affected_rows']
+        deleted += affected
+        if affected < batch_size:
+            return deleted
+
+
+# Shared backends as (get(cache_key), set(cache_key, body, ttl)) pairs
+SHARED_BACKENDS = {
+    'mysql': (_mysql_get, _mysql_set),
+    'none': None
+}
+
+if CACHE_SHARED_BACKEND not in SHARED_BACKENDS:
+    raise ValueError(f'Unknown CACHE_SHARED_BACKEND: {CACHE_SHARED_BACKEND}')
+
+_shared = SHARED_BACKENDS[CACHE_SHARED_BACKEND]
+
+
+def set_shared_backend(backend):
+    """
+    Replace the shared backend
+    
+    Args:
+        backend: A (get, set) pair of functions, or None for local-only caching
+    """
+    global _shared
+    _shared = backend
+
+
+def bump_version(*tables):
+    """Invalidate cached responses built from the given tables"""
+    db.execute_many(
+        '''INSERT INTO table_versions (table_name, version) VALUES (%s, 1)
+           ON DUPLICATE KEY UPDATE version = version + 1''',
+        [(table,) for table in tables]
+    )
+
+
+def get_versions(tables):
+    """Current change counter for each table (0 if never written)"""
+    placeholders = ', '.join(['%s'] * len(tables))
+    rows = db.query(
+        f'SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})',
+        tuple(tables)
+    )
+    versions = {row['table_name']: row['version'] for row in rows}
+    return [versions.get(table, 0) for table in tables]
+
+
+def _cache_key(name, tables, params):
+    """Build a cache key from the endpoint name, parameters and table versions"""
+    raw = json.dumps([params, get_versions(tables)], default=str, separators=(',', ':'))
+    return f"{name}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def cached_response(name, tables, compute, params=(), ttl=None):
+    """
+    Return a cached response, computing and storing it on a miss
+    
+    Only 200 responses are cached. Callers must authenticate the request
+    before calling, since a hit skips compute() entirely.
+    
+    Args:
+        name: Endpoint name, e.g. 'dashboard:stats'
+        tables: Tables the response is derived from
+        compute: Function returning the response dict on a miss
+        params: Values the response depends on besides table contents
+        ttl: Seconds to keep the response (default CACHE_TTL)
+    
+    Returns:
+        Response dict
+    """
+    ttl = CACHE_TTL if ttl is None else ttl
+    cache_key = _cache_key(name, tables, params)
+    now = time.monotonic()
+    
+    entry = _local.get(cache_key)
+    if entry and entry[0] > now:
+        _local.move_to_end(cache_key)
+        _stats['local_hits'] += 1
+        return response.raw(entry[1])
+    
+    if _shared:
+        body = _shared[0](cache_key)
+        if body is not None:
+            _stats['shared_hits'] += 1
+            _store_local(cache_key, body, now + ttl)
+            return response.raw(body)
+    
+    _stats['misses'] += 1
+    result = compute()
+    if result.get('statusCode') == 200:
+        _store_local(cache_key, result['body'], now + ttl)
+        if _shared:
+            _shared[1](cache_key, result['body'], ttl)
+        _stats['stores'] += 1
+    return result
+
+
+def _store_local(cache_key, body, expires_at):
+    """Insert into the local LRU, evicting the least recently used entry"""
+    _local[cache_key] = (expires_at, body)
+    _local.move_to_end(cache_key)
+    while len(_local) > CACHE_SIZE:
+        _local.popitem(last=False)
+
+
+def clear_local():
+    """Drop every response held in this container's LRU"""
+    _local.clear()
+
+
+def get_stats():
+    """
+    Get cache hit/miss counters for this container
+    
+    Returns:
+        Dictionary with hit, miss and store counts and the hit rate
+    """
+    hits = _stats['local_hits'] + _stats['shared_hits']
+    lookups = hits + _stats['misses']
+    return dict(_stats, entries=len(_local), hit_rate=hits / lookups if lookups else 0.0)
+
+
+if __name__ == '__main__':
+    print(f'Pruned {prune()} expired response cache entries')
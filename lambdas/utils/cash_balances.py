@@ -0,0 +1,211 @@
+"""
+Cash Book Balance Snapshots
+Monthly closing balances read by the cash book summary
+
+cash_book_monthly holds, per calendar month with activity, the month's
+credit, debit and net movement and the closing (cumulative) credit, debit
+and balance at its end. Cash book writes through the CRUD handler apply
+signed deltas inside the same request transaction: the written month's row
+is created or adjusted, and a back-dated write cascades its delta to the
+closing columns of every later month. A balance as of any day is then one
+snapshot lookup plus a scan of that day's month.
+"""
+
+import datetime
+from decimal import Decimal
+from . import db
+
+ZERO = {'closing_credit': Decimal('0'), 'closing_debit': Decimal('0'), 'closing_balance': Decimal('0')}
+
+UPSERT_MONTH_SQL = '''
+    INSERT INTO cash_book_monthly (
+        period_start, credit_total, debit_total, net_total,
+        closing_credit, closing_debit, closing_balance
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        credit_total = credit_total + VALUES(credit_total),
+        debit_total = debit_total + VALUES(debit_total),
+        net_total = net_total + VALUES(net_total),
+        closing_credit = closing_credit + VALUES(credit_total),
+        closing_debit = closing_debit + VALUES(debit_total),
+        closing_balance = closing_balance + VALUES(net_total)
+'''
+
+CASCADE_SQL = '''
+    UPDATE cash_book_monthly SET
+        closing_credit = closing_credit + %s,
+        closing_debit = closing_debit + %s,
+        closing_balance = closing_balance + %s
+    WHERE period_start > %s
+'''
+
+# Same totals as the cash book summary always reported
+TOTALS_SQL = '''
+    SELECT
+        COALESCE(SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE 0 END), 0) as total_credit,
+        COALESCE(SUM(CASE WHEN transaction_type = 'debit' THEN amount ELSE 0 END), 0) as total_debit,
+        COALESCE(SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE -amount END), 0) as balance
+    FROM cash_book
+    WHERE transaction_date >= %s AND transaction_date <= %s
+'''
+
+
+def month_start(day):
+    """First day of the month of a date or YYYY-MM-DD string"""
+    return datetime.date.fromisoformat(str(day)[:10]).replace(day=1)
+
+
+def transaction_kind(value):
+    """
+    transaction_type as the SQL totals compare it
+    
+    The column's _ci collation ignores case and trailing spaces, so
+    'Credit ' is a credit in TOTALS_SQL and rebuild(); the deltas must agree.
+    Any type other than credit or debit only counts against the net balance.
+    """
+    return (value or '').rstrip(' ').lower()
+
+
+def _movement(row, sign):
+    """Signed (credit, debit, net) movement of one cash book row"""
+    amount = sign * Decimal(str(row.get('amount') or 0))
+    kind = transaction_kind(row.get('transaction_type'))
+    return (
+        amount if kind == 'credit' else Decimal('0'),
+        amount if kind == 'debit' else Decimal('0'),
+        amount if kind == 'credit' else -amount
+    )
+
+
+def record_change(old, new):
+    """
+    Apply a cash book write to cash_book_monthly
+    
+    Args:
+        old: Entry before the write (transaction_date, transaction_type, amount) or None
+        new: Entry after the write or None
+    """
+    deltas = {}
+    for row, sign in ((old, -1), (new, 1)):
+        if not row or not row.get('transaction_date'):
+            continue
+        month = month_start(row['transaction_date'])
+        totals = deltas.get(month, (Decimal('0'),) * 3)
+        deltas[month] = tuple(total + value for total, value in zip(totals, _movement(row, sign)))
+    
+    for month, (credit, debit, net) in sorted(deltas.items()):
+        if credit or debit or net:
+            _apply(month, credit, debit, net)
+
+
+def _apply(month, credit, debit, net):
+    """Add a month's movement to its snapshot and cascade it to later months"""
+    # Locking the previous month keeps a concurrent back-dated cascade from
+    # missing a month row created here
+    previous = db.query(
+        '''SELECT closing_credit, closing_debit, closing_balance FROM cash_book_monthly
+           WHERE period_start < %s ORDER BY period_start DESC LIMIT 1 FOR UPDATE''',
+        (month,)
+    )
+    base = previous[0] if previous else ZERO
+    db.execute(UPSERT_MONTH_SQL, (
+        month, credit, debit, net,
+        base['closing_credit'] + credit,
+        base['closing_debit'] + debit,
+        base['closing_balance'] + net
+    ))
+    db.execute(CASCADE_SQL, (credit, debit, net, month))
+
+
+def closing(as_of=None):
+    """
+    Cumulative credit, debit and balance at the end of a day
+    
+    Args:
+        as_of: Last day included (date or YYYY-MM-DD), default all history
+    
+    Returns:
+        Dictionary with total_credit, total_debit and balance
+    """
+    if as_of is None:
+        latest = db.query(
+            '''SELECT closing_credit, closing_debit, closing_balance FROM cash_book_monthly
+               ORDER BY period_start DESC LIMIT 1'''
+        )
+        snapshot = latest[0] if latest else ZERO
+        return {
+            'total_credit': snapshot['closing_credit'],
+            'total_debit': snapshot['closing_debit'],
+            'balance': snapshot['closing_balance']
+        }
+    
+    start = month_start(as_of)
+    previous = db.query(
+        '''SELECT closing_credit, closing_debit, closing_balance FROM cash_book_monthly
+           WHERE period_start < %s ORDER BY period_start DESC LIMIT 1''',
+        (start,)
+    )
+    snapshot = previous[0] if previous else ZERO
+    partial = db.query(TOTALS_SQL, (start, str(as_of)[:10]))[0]
+    return {
+        'total_credit': snapshot['closing_credit'] + partial['total_credit'],
+        'total_debit': snapshot['closing_debit'] + partial['total_debit'],
+        'balance': snapshot['closing_balance'] + partial['balance']
+    }
+
+
+def summary(start_date=None, end_date=None):
+    """
+    Credit, debit and balance over an inclusive date range
+    
+    A range within one month is scanned directly; otherwise the totals are
+    the difference of the closings at both ends.
+    
+    Args:
+        start_date: First day (date or YYYY-MM-DD), default all history
+        end_date: Last day, default all history
+    
+    Returns:
+        Dictionary with total_credit, total_debit and balance
+    """
+    if start_date and end_date and month_start(start_date) == month_start(end_date):
+        return db.query(TOTALS_SQL, (str(start_date)[:10], str(end_date)[:10]))[0]
+    
+    end = closing(end_date)
+    if not start_date:
+        return end
+    before = closing(datetime.date.fromisoformat(str(start_date)[:10]) - datetime.timedelta(days=1))
+    return {key: end[key] - before[key] for key in end}
+
+
+def rebuild():
+    """
+    Recompute every snapshot from cash_book (backfill or repair)
+    
+    Returns:
+        List of results for each statement
+    """
+    return db.transaction([
+        {'sql': 'DELETE FROM cash_book_monthly', 'params': ()},
+        {'sql': '''INSERT INTO cash_book_monthly (
+                       period_start, credit_total, debit_total, net_total,
+                       closing_credit, closing_debit, closing_balance
+                   )
+                   SELECT period_start, credit_total, debit_total, net_total,
+                          SUM(credit_total) OVER (ORDER BY period_start),
+                          SUM(debit_total) OVER (ORDER BY period_start),
+                          SUM(net_total) OVER (ORDER BY period_start)
+                   FROM (
+                       SELECT DATE_FORMAT(transaction_date, '%%Y-%%m-01') as period_start,
+                              SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE 0 END) as credit_total,
+                              SUM(CASE WHEN transaction_type = 'debit' THEN amount ELSE 0 END) as debit_total,
+                              SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE -amount END) as net_total
+                       FROM cash_book
+                       GROUP BY period_start
+                   ) months''', 'params': ()}
+    ])
+
+
+if __name__ == '__main__':
+    for result in rebuild():
+        print(result)
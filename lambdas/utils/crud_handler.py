@@ -3,50 +3,325 @@ Generic CRUD Lambda Functions Template
 This provides reusable CRUD operations for simple tables
 """
 
+import os
 import json
-from . import db, auth, response
-from .error_handler import async_handler
+import datetime
+from . import db, auth, response, pagination, cache, etag, projection, export
+from .error_handler import async_handler, ValidationError
 
+# Filter kinds for create_crud_handler(filters=...)
+#   eq    - ?column=value
+#   in    - ?column=a,b,c (a single value is an equality match)
+#   range - ?column_from=low&column_to=high (inclusive, either may be omitted;
+#           a date-only upper bound covers the whole day on DATETIME columns)
+FILTER_KINDS = ('eq', 'in', 'range')
 
-def create_crud_handler(table_name, primary_key='id'):
+# Most values accepted by one 'in' filter
+MAX_IN_VALUES = 100
+
+# Most rows accepted by one bulk request
+BULK_MAX_ROWS = int(os.environ.get('BULK_MAX_ROWS', 500))
+
+# How bulk requests treat failing rows
+#   all_or_nothing - any failure rolls back every row (default)
+#   best_effort    - failing rows are reported, the rest are committed
+BULK_MODES = ('all_or_nothing', 'best_effort')
+BULK_OPERATIONS = ('create', 'update', 'delete')
+
+# Server auto-increment settings, read once per container (see consecutive_insert_ids)
+_autoinc = {}
+
+
+def consecutive_insert_ids():
+    """
+    Whether a multi-row INSERT is given consecutive auto-increment ids
+    
+    Only guaranteed with auto_increment_increment = 1 and
+    innodb_autoinc_lock_mode 0 or 1; lock mode 2 (interleaved, the MySQL 8
+    default) may hand out gaps under concurrent inserts. Checked once per
+    container.
+    """
+    if 'consecutive' not in _autoinc:
+        row = db.query('SELECT @@auto_increment_increment as step, @@innodb_autoinc_lock_mode as lock_mode')[0]
+        _autoinc['consecutive'] = int(row['step']) == 1 and int(row['lock_mode']) < 2
+        if not _autoinc['consecutive']:
+            print(f"Warning: auto_increment_increment={row['step']}, innodb_autoinc_lock_mode={row['lock_mode']}; "
+                  'bulk creates insert row by row to learn each id')
+    return _autoinc['consecutive']
+
+
+def _is_date(value):
+    """Whether a filter value is a bare YYYY-MM-DD date (no time part)"""
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        return False
+    return len(value) == 10
+
+
+def _error_message(error):
+    """Short message for a failed row (the MySQL message without its code)"""
+    if len(error.args) > 1 and isinstance(error.args[0], int):
+        return str(error.args[1])
+    return str(error)
+
+
+def unindexed_columns(table_name, columns):
+    """
+    Find columns that are not the leading column of any index on a table
+    
+    Filters and sort keys on such columns scan the whole table.
+    
+    Returns:
+        List of the given columns without a supporting index
+    """
+    rows = db.query(
+        '''SELECT DISTINCT COLUMN_NAME as column_name FROM information_schema.STATISTICS
+           WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND SEQ_IN_INDEX = 1''',
+        (table_name,)
+    )
+    indexed = {row['column_name'] for row in rows}
+    return [column for column in columns if column not in indexed]
+
+
+def create_crud_handler(table_name, primary_key='id', total_mode='exact', on_change=None,
+                        filters=None, sort_keys=(), cached=False):
     """
     Create a generic CRUD handler for a table
     
     Args:
         table_name: Name of the database table
         primary_key: Primary key column name (default: 'id')
+        total_mode: Default pagination total strategy, overridable per
+            request with ?total= (see pagination.TOTAL_MODES)
+        on_change: Optional callback on_change(old, new) run in the write's
+            transaction after each create (old=None), update or delete
+            (new=None); rows are dicts of column values as stored, re-read
+            after the write so defaults and coercions are included
+        filters: Optional {column: kind} list filters, kind one of
+            FILTER_KINDS; columns should be indexed (see check_indexes)
+        sort_keys: Columns the list may be sorted by with ?sort=column
+            (ascending) or ?sort=-column (descending), besides created_at
+        cached: Whether a cache.cached_response endpoint reads this table;
+            only then do writes bump its table_versions row, a lock held
+            until the request commits
     
     Returns:
         Dictionary with CRUD handler functions
     """
+    filters = dict(filters or {})
+    for column, kind in filters.items():
+        if kind not in FILTER_KINDS:
+            raise ValueError(f'Unknown filter kind for {table_name}.{column}: {kind}')
+    sortable = ('created_at',) + tuple(sort_keys)
+    index_check = {}
+    
+    def check_indexes():
+        """
+        Log filter and sort columns no index supports (once per container)
+        
+        Returns:
+            List of unindexed filter and sort columns
+        """
+        if 'unindexed' not in index_check:
+            columns = list(filters) + [key for key in sort_keys if key not in filters]
+            index_check['unindexed'] = unindexed_columns(table_name, columns) if columns else []
+            for column in index_check['unindexed']:
+                print(f'Warning: {table_name}.{column} is used as a list filter or sort key but has no index')
+        return index_check['unindexed']
+    
+    def parse_filters(query_params):
+        """
+        Build the WHERE condition for the declared filters present in the query
+        
+        Returns:
+            Tuple of (condition, params); condition is '' when none apply
+        """
+        conditions, params = [], []
+        for column, kind in filters.items():
+            if kind == 'range':
+                lower = query_params.get(f'{column}_from')
+                upper = query_params.get(f'{column}_to')
+                if lower:
+                    conditions.append(f'{column} >= %s')
+                    params.append(lower)
+                if upper and _is_date(upper):
+                    # Before the next day, so DATETIME rows later on that day match
+                    conditions.append(f'{column} < %s + INTERVAL 1 DAY')
+                    params.append(upper)
+                elif upper:
+                    conditions.append(f'{column} <= %s')
+                    params.append(upper)
+                continue
+            
+            raw = query_params.get(column)
+            if not raw:
+                continue
+            values = [value.strip() for value in raw.split(',')] if kind == 'in' else [raw]
+            values = [value for value in values if value]
+            if len(values) > MAX_IN_VALUES:
+                raise ValidationError(f'{column} accepts at most {MAX_IN_VALUES} values')
+            if len(values) == 1:
+                conditions.append(f'{column} = %s')
+            else:
+                conditions.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+        return ' AND '.join(conditions), params
+    
+    def parse_sort(query_params):
+        """
+        Read ?sort= into keyset columns and direction (default created_at DESC)
+        
+        Returns:
+            Tuple of (sort columns ending with the primary key, descending)
+        """
+        sort = query_params.get('sort') or '-created_at'
+        descending = sort.startswith('-')
+        column = sort.lstrip('-')
+        if column not in sortable:
+            raise ValidationError(f"sort must be one of: {', '.join(sortable)} (prefix - for descending)")
+        columns = [column] if column == primary_key else [column, primary_key]
+        return columns, descending
+    
+    def select_list(query_params, required):
+        """SELECT list for ?fields= (always including required columns), or *"""
+        columns = projection.parse_fields(query_params, table_name, required)
+        return ', '.join(columns) if columns else '*'
+    
+    def stored_rows(record_ids):
+        """Re-read written rows inside the transaction, keyed by str(primary key)"""
+        if not record_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(record_ids))
+        rows = db.query(
+            f'SELECT * FROM {table_name} WHERE {primary_key} IN ({placeholders})',
+            tuple(record_ids)
+        )
+        return {str(row[primary_key]): row for row in rows}
+    
+    def find_existing(record_id):
+        """Fetch the row being changed (locked, with all columns if on_change needs them)"""
+        columns = '*' if on_change else primary_key
+        lock = ' FOR UPDATE' if on_change else ''
+        return db.query(
+            f'SELECT {columns} FROM {table_name} WHERE {primary_key} = %s{lock}',
+            (record_id,)
+        )
     
     @async_handler
     def list_handler(event, context):
-        """List all records"""
+        """
+        List records: page/limit or keyset (cursor=) pagination, declared
+        filters, sort= on whitelisted keys and fields= projection
+        """
         auth.validate_request(event)
+        if filters or sort_keys:
+            check_indexes()
         
         query_params = event.get('queryStringParameters') or {}
+        where, params = parse_filters(query_params)
+        sort_columns, descending = parse_sort(query_params)
+        if pagination.is_cursor_mode(query_params):
+            return list_by_cursor(event, query_params, where, params, sort_columns, descending)
+        
         page = int(query_params.get('page', 1))
         limit = int(query_params.get('limit', 50))
         offset = (page - 1) * limit
+        mode = pagination.get_total_mode(query_params, total_mode)
+        columns = select_list(query_params, [primary_key, etag.VERSION_COLUMN])
+        
+        sql = f'SELECT {{columns}} FROM {table_name}'
+        if where:
+            sql += f' WHERE {where}'
+        sql += f' ORDER BY {pagination.order_by(sort_columns, descending)} LIMIT %s OFFSET %s'
+        
+        # The total is part of the page ETag, so it is needed before the version check
+        total_count, mode_used = pagination.count_total(table_name, mode, where, params)
+        
+        if etag.requested(event):
+            versions = db.query(
+                sql.format(columns=f'{primary_key}, {etag.VERSION_COLUMN}'),
+                tuple(params + [limit, offset])
+            )
+            unchanged = etag.not_modified(event, etag.weak(versions, primary_key, extra=(total_count, mode_used)))
+            if unchanged:
+                return unchanged
         
         records = db.query(
-            f'SELECT * FROM {table_name} ORDER BY created_at DESC LIMIT %s OFFSET %s',
-            (limit, offset)
+            sql.format(columns=columns),
+            tuple(params + [limit + 1 if mode == 'none' else limit, offset])
         )
+        records, page_info = pagination.offset_page(records, page, limit, total_count, mode_used)
         
-        total = db.query(f'SELECT COUNT(*) as total FROM {table_name}')
-        total_count = total[0]['total'] if total else 0
+        return etag.tag(response.success({
+            'data': records,
+            'pagination': page_info
+        }), etag.weak(records, primary_key, extra=(total_count, mode_used)))
+    
+    def list_by_cursor(event, query_params, where, params, sort_columns, descending):
+        """List one keyset page ordered by the sort columns and primary key"""
+        limit = pagination.get_limit(query_params)
+        after = pagination.decode_cursor(query_params.get('cursor'), sort_columns)
+        columns = select_list(query_params, sort_columns + [etag.VERSION_COLUMN])
         
-        return response.success({
+        conditions = [where] if where else []
+        params = list(params)
+        if after is not None:
+            condition, condition_params = pagination.keyset_condition(sort_columns, after, descending)
+            conditions.append(condition)
+            params.extend(condition_params)
+        
+        sql = f'SELECT {{columns}} FROM {table_name}'
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += f' ORDER BY {pagination.order_by(sort_columns, descending)} LIMIT %s'
+        
+        if etag.requested(event):
+            versions = db.query(
+                sql.format(columns=f'{primary_key}, {etag.VERSION_COLUMN}'),
+                tuple(params + [limit])
+            )
+            unchanged = etag.not_modified(event, etag.weak(versions, primary_key))
+            if unchanged:
+                return unchanged
+        
+        records, next_cursor = pagination.keyset_page(
+            db.query(sql.format(columns=columns), tuple(params + [limit + 1])), sort_columns, limit
+        )
+        
+        return etag.tag(response.success({
             'data': records,
             'pagination': {
-                'page': page,
                 'limit': limit,
-                'total': total_count,
-                'totalPages': (total_count + limit - 1) // limit
+                'nextCursor': next_cursor
             }
-        })
+        }), etag.weak(records, primary_key))
+    
+    @async_handler
+    def export_handler(event, context):
+        """
+        Export every matching record - GET /{resource}/export
+        
+        Takes the list filters, sort= and fields=, plus format=csv|ndjson.
+        Rows are streamed to the export sink and the response holds the
+        download reference.
+        """
+        auth.validate_request(event)
+        if filters or sort_keys:
+            check_indexes()
+        
+        query_params = event.get('queryStringParameters') or {}
+        fmt = export.get_format(query_params)
+        where, params = parse_filters(query_params)
+        sort_columns, descending = parse_sort(query_params)
+        columns = projection.parse_fields(query_params, table_name) or list(projection.get_columns(table_name))
+        
+        sql = f"SELECT {', '.join(columns)} FROM {table_name}"
+        if where:
+            sql += f' WHERE {where}'
+        sql += f' ORDER BY {pagination.order_by(sort_columns, descending)}'
+        
+        return response.success(export.export_query(sql, tuple(params), table_name, fmt, columns))
     
     @async_handler
     def get_by_id_handler(event, context):
@@ -54,6 +329,20 @@ def create_crud_handler(table_name, primary_key='id'):
         auth.validate_request(event)
         
         record_id = event['pathParameters']['id']
+        if etag.requested(event):
+            versions = db.query(
+                f'SELECT {primary_key}, {etag.VERSION_COLUMN} FROM {table_name} WHERE {primary_key} = %s',
+                (record_id,)
+            )
+            if not versions:
+                return response.not_found(table_name)
+            version = versions[0]
+            unchanged = etag.not_modified(
+                event, etag.strong(version[primary_key], version[etag.VERSION_COLUMN])
+            )
+            if unchanged:
+                return unchanged
+        
         records = db.query(
             f'SELECT * FROM {table_name} WHERE {primary_key} = %s',
             (record_id,)
@@ -62,7 +351,11 @@ def create_crud_handler(table_name, primary_key='id'):
         if not records:
             return response.not_found(table_name)
         
-        return response.success(records[0])
+        record = records[0]
+        return etag.tag(
+            response.success(record),
+            etag.strong(record[primary_key], record.get(etag.VERSION_COLUMN))
+        )
     
     @async_handler
     def create_handler(event, context):
@@ -81,6 +374,12 @@ def create_crud_handler(table_name, primary_key='id'):
             f"INSERT INTO {table_name} ({', '.join(fields)}) VALUES ({placeholders})",
             tuple(values)
         )
+        if on_change:
+            record_id = body.get(primary_key, result['last_insert_id'])
+            on_change(None, stored_rows([record_id]).get(str(record_id)))
+        pagination.invalidate_totals(table_name)
+        if cached:
+            cache.bump_version(table_name)
         
         return response.success({
             'id': result['last_insert_id'],
@@ -95,10 +394,7 @@ def create_crud_handler(table_name, primary_key='id'):
         body = json.loads(event['body'])
         
         # Check if record exists
-        existing = db.query(
-            f'SELECT {primary_key} FROM {table_name} WHERE {primary_key} = %s',
-            (record_id,)
-        )
+        existing = find_existing(record_id)
         if not existing:
             return response.not_found(table_name)
         
@@ -113,6 +409,11 @@ def create_crud_handler(table_name, primary_key='id'):
             f'UPDATE {table_name} SET {set_clause} WHERE {primary_key} = %s',
             tuple(values + [record_id])
         )
+        if on_change:
+            on_change(existing[0], stored_rows([record_id]).get(str(record_id)))
+        pagination.invalidate_totals(table_name)
+        if cached:
+            cache.bump_version(table_name)
         
         return response.success({'message': f'{table_name} updated successfully'})
     
@@ -123,10 +424,7 @@ def create_crud_handler(table_name, primary_key='id'):
         record_id = event['pathParameters']['id']
         
         # Check if record exists
-        existing = db.query(
-            f'SELECT {primary_key} FROM {table_name} WHERE {primary_key} = %s',
-            (record_id,)
-        )
+        existing = find_existing(record_id)
         if not existing:
             return response.not_found(table_name)
         
@@ -134,13 +432,262 @@ def create_crud_handler(table_name, primary_key='id'):
             f'DELETE FROM {table_name} WHERE {primary_key} = %s',
             (record_id,)
         )
+        if on_change:
+            on_change(existing[0], None)
+        pagination.invalidate_totals(table_name)
+        if cached:
+            cache.bump_version(table_name)
         
         return response.success({'message': f'{table_name} deleted successfully'})
     
+    def lock_existing(record_ids):
+        """Fetch and lock the rows a bulk update/delete targets, keyed by str(primary key)"""
+        columns = '*' if on_change else primary_key
+        placeholders = ', '.join(['%s'] * len(record_ids))
+        rows = db.query(
+            f'SELECT {columns} FROM {table_name} WHERE {primary_key} IN ({placeholders}) FOR UPDATE',
+            tuple(record_ids)
+        )
+        return {str(row[primary_key]): row for row in rows}
+    
+    def execute_rows(sql, params, singles):
+        """
+        Run a multi-row statement, or each row's own statement if it fails
+        
+        A statement that fails on a constraint or data error leaves no
+        changes behind, so re-running row by row pins each error on the row
+        that caused it while the others still apply.
+        
+        Args:
+            sql: Multi-row statement
+            params: Its parameters
+            singles: One (sql, params) per row, in row order
+        
+        Returns:
+            Tuple of (result, outcomes): the statement's execute() result and
+            None, or None and one execute() result or exception per row
+        """
+        try:
+            return db.execute(sql, params), None
+        except Exception as error:
+            if not db.is_data_error(error):
+                raise
+            if len(singles) == 1:
+                return None, [error]
+        return None, execute_singles(singles)
+    
+    def execute_singles(singles):
+        """Run each (sql, params); returns one execute() result or data error per row"""
+        outcomes = []
+        for single_sql, single_params in singles:
+            try:
+                outcomes.append(db.execute(single_sql, single_params))
+            except Exception as error:
+                if not db.is_data_error(error):
+                    raise
+                outcomes.append(error)
+        return outcomes
+    
+    def group_by_columns(items):
+        """Group (index, row) pairs by their column set, keeping row order"""
+        groups = {}
+        for index, row in items:
+            groups.setdefault(tuple(sorted(row)), []).append((index, row))
+        return groups.items()
+    
+    def bulk_create(rows, results, user):
+        """Insert rows with one multi-row INSERT per column set"""
+        created = []
+        for columns, group in group_by_columns((index, dict(row, created_by=user['id'])) for index, row in enumerate(rows)):
+            row_placeholders = f"({', '.join(['%s'] * len(columns))})"
+            insert = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES "
+            values = [tuple(row[column] for column in columns) for _, row in group]
+            
+            singles = [(insert + row_placeholders, row_values) for row_values in values]
+            if primary_key in columns or consecutive_insert_ids():
+                result, outcomes = execute_rows(
+                    insert + ', '.join([row_placeholders] * len(group)),
+                    tuple(value for row_values in values for value in row_values),
+                    singles
+                )
+            else:
+                result, outcomes = None, execute_singles(singles)
+            for position, (index, row) in enumerate(group):
+                outcome = outcomes[position] if outcomes else None
+                if isinstance(outcome, Exception):
+                    results[index].update(status='error', error=_error_message(outcome))
+                    continue
+                # Consecutive ids are checked by consecutive_insert_ids()
+                if primary_key in row:
+                    record_id = row[primary_key]
+                elif outcome:
+                    record_id = outcome['last_insert_id']
+                else:
+                    record_id = result['last_insert_id'] + position
+                results[index].update(status='created', id=record_id)
+                created.append(record_id)
+        
+        if on_change:
+            stored = stored_rows(created)
+            for record_id in created:
+                on_change(None, stored.get(str(record_id)))
+    
+    def bulk_update(rows, results, user):
+        """Update rows with one CASE-based UPDATE per column set"""
+        existing = lock_existing([row[primary_key] for row in rows])
+        items = []
+        for index, row in enumerate(rows):
+            if str(row[primary_key]) not in existing:
+                results[index].update(status='not_found')
+                continue
+            changes = {column: value for column, value in row.items() if column != primary_key}
+            items.append((index, dict(changes, updated_by=user['id'])))
+        
+        updated = []
+        for columns, group in group_by_columns(items):
+            ids = [rows[index][primary_key] for index, _ in group]
+            set_clauses, params = [], []
+            for column in columns:
+                cases = ' '.join(['WHEN %s THEN %s'] * len(group))
+                set_clauses.append(f'{column} = CASE {primary_key} {cases} ELSE {column} END')
+                for record_id, (_, row) in zip(ids, group):
+                    params.extend([record_id, row[column]])
+            placeholders = ', '.join(['%s'] * len(ids))
+            single_set = ', '.join(f'{column} = %s' for column in columns)
+            
+            _, outcomes = execute_rows(
+                f"UPDATE {table_name} SET {', '.join(set_clauses)} WHERE {primary_key} IN ({placeholders})",
+                tuple(params + ids),
+                [
+                    (f'UPDATE {table_name} SET {single_set} WHERE {primary_key} = %s',
+                     tuple(row[column] for column in columns) + (record_id,))
+                    for record_id, (_, row) in zip(ids, group)
+                ]
+            )
+            for position, (record_id, (index, row)) in enumerate(zip(ids, group)):
+                outcome = outcomes[position] if outcomes else None
+                if isinstance(outcome, Exception):
+                    results[index].update(status='error', error=_error_message(outcome))
+                    continue
+                results[index].update(status='updated')
+                updated.append(record_id)
+        
+        if on_change:
+            stored = stored_rows(updated)
+            for record_id in updated:
+                on_change(existing[str(record_id)], stored.get(str(record_id)))
+    
+    def bulk_delete(rows, results, user):
+        """Delete rows with one DELETE ... IN"""
+        existing = lock_existing([row[primary_key] for row in rows])
+        items = []
+        for index, row in enumerate(rows):
+            if str(row[primary_key]) in existing:
+                items.append((index, row[primary_key]))
+            else:
+                results[index].update(status='not_found')
+        if not items:
+            return
+        
+        placeholders = ', '.join(['%s'] * len(items))
+        single_sql = f'DELETE FROM {table_name} WHERE {primary_key} = %s'
+        _, outcomes = execute_rows(
+            f'DELETE FROM {table_name} WHERE {primary_key} IN ({placeholders})',
+            tuple(record_id for _, record_id in items),
+            [(single_sql, (record_id,)) for _, record_id in items]
+        )
+        for position, (index, record_id) in enumerate(items):
+            outcome = outcomes[position] if outcomes else None
+            if isinstance(outcome, Exception):
+                results[index].update(status='error', error=_error_message(outcome))
+                continue
+            results[index].update(status='deleted')
+            if on_change:
+                on_change(existing[str(record_id)], None)
+    
+    bulk_operations = {
+        'create': bulk_create,
+        'update': bulk_update,
+        'delete': bulk_delete
+    }
+    
+    @async_handler
+    def bulk_handler(event, context):
+        """
+        Create, update or delete many records - POST /{resource}/bulk
+        
+        Body: {"operation": "create"|"update"|"delete", "rows": [...],
+        "mode": "all_or_nothing"|"best_effort"}. Update rows carry the
+        primary key plus the columns to change; delete rows may be bare ids.
+        Rows are written with multi-row statements in one transaction and
+        reported individually in request order.
+        """
+        user = auth.validate_request(event)
+        body = json.loads(event.get('body') or '{}')
+        
+        operation = body.get('operation')
+        mode = body.get('mode') or 'all_or_nothing'
+        rows = body.get('rows')
+        if operation not in BULK_OPERATIONS:
+            raise ValidationError(f"operation must be one of: {', '.join(BULK_OPERATIONS)}")
+        if mode not in BULK_MODES:
+            raise ValidationError(f"mode must be one of: {', '.join(BULK_MODES)}")
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError('rows must be a non-empty array')
+        if len(rows) > BULK_MAX_ROWS:
+            raise ValidationError(f'At most {BULK_MAX_ROWS} rows per request')
+        
+        if operation == 'delete':
+            rows = [row if isinstance(row, dict) else {primary_key: row} for row in rows]
+        if not all(isinstance(row, dict) and row for row in rows):
+            raise ValidationError('Each row must be a non-empty object')
+        if operation != 'create':
+            if not all(row.get(primary_key) is not None for row in rows):
+                raise ValidationError(f'Each row must include {primary_key}')
+            keys = [str(row[primary_key]) for row in rows]
+            if len(set(keys)) != len(keys):
+                raise ValidationError(f'Duplicate {primary_key} values in rows')
+        if operation != 'delete':
+            allowed = set(projection.get_columns(table_name))
+            unknown = sorted({column for row in rows for column in row if column not in allowed})
+            if unknown:
+                raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+        
+        results = [{'index': index} for index in range(len(rows))]
+        bulk_operations[operation](rows, results, user)
+        
+        failed = [result for result in results if result['status'] in ('error', 'not_found')]
+        summary = {'total': len(rows), 'succeeded': len(rows) - len(failed), 'failed': len(failed)}
+        
+        if failed and mode == 'all_or_nothing':
+            # The error status makes async_handler roll the whole batch back
+            for result in results:
+                if result['status'] not in ('error', 'not_found'):
+                    result['status'] = 'rolled_back'
+                    result.pop('id', None)
+            summary['succeeded'] = 0
+            return response.error(f'Bulk {operation} failed, no rows were written', 400, {
+                'results': results,
+                'summary': summary
+            })
+        
+        if summary['succeeded']:
+            pagination.invalidate_totals(table_name)
+            if cached:
+                cache.bump_version(table_name)
+        
+        return response.success({
+            'results': results,
+            'summary': summary
+        }, 201 if operation == 'create' and not failed else 200)
+    
     return {
+        'check_indexes': check_indexes,
         'list': list_handler,
+        'export': export_handler,
         'get_by_id': get_by_id_handler,
         'create': create_handler,
         'update': update_handler,
-        'delete': delete_handler
+        'delete': delete_handler,
+        'bulk': bulk_handler
     }
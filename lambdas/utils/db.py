@@ -4,10 +4,16 @@ Manages MySQL database connections with connection pooling
 """
 
 import os
-import pymysql
-from pymysql.cursors import DictCursor
+import re
+import json
+import time
+from functools import lru_cache
 from contextlib import contextmanager
 
+# pymysql is imported by _driver() when the first connection is opened, so
+# importing this module (and every Lambda built on it) stays cheap
+pymysql = None
+
 # Database configuration from environment variables
 DB_CONFIG = {
     'host': os.environ.get('DB_HOST'),
@@ -16,30 +22,369 @@ DB_CONFIG = {
     'database': os.environ.get('DB_NAME'),
     'port': int(os.environ.get('DB_PORT', 3306)),
     'charset': 'utf8mb4',
-    'cursorclass': DictCursor,
     'autocommit': False
 }
 
+# Seconds a warm connection may sit idle before it is pinged on checkout
+DB_PING_INTERVAL = float(os.environ.get('DB_PING_INTERVAL', 30))
+
+# MySQL client error codes meaning the server connection is gone
+CONNECTION_LOST_ERRORS = (2003, 2006, 2013, 2055)
+
+# Statements slower than this many milliseconds are logged with their
+# EXPLAIN plan (0 disables the slow-query log)
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 500))
+
+# Statement kinds MySQL can EXPLAIN without side effects
+EXPLAINABLE = ('select', 'with', 'update', 'delete')
+
+# Fingerprints whose plan has been logged; each is explained once per container
+EXPLAINED_MAX = 256
+
+# Literal and placeholder patterns replaced when fingerprinting a statement
+_FINGERPRINT_PATTERNS = (
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), '?'),
+    (re.compile(r'"(?:[^"\\]|\\.)*"'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' ')
+)
+
+# Connection kept alive across warm Lambda invocations
+_connection = None
+_last_used = 0.0
+
+# Newly opened connection that has not run a statement yet
+_fresh_connection = None
+
+# Request-scoped unit of work opened by async_handler (see begin_request)
+_request = {
+    'active': False,
+    'connection': None,
+    'dirty': False,
+    'on_commit': []
+}
+
+# Counters for connection reuse (see get_stats)
+_stats = {
+    'opened': 0,
+    'reused': 0,
+    'reconnects': 0
+}
+
+# Statements run during the current (or last) request (see get_request_statements)
+_trace = {
+    'active': False,
+    'statements': []
+}
+
+_explained = set()
+
+
+def _driver():
+    """Import pymysql on first use"""
+    global pymysql
+    if pymysql is None:
+        import pymysql as driver
+        pymysql = driver
+    return pymysql
+
+
+def _connect():
+    """Open a new connection and make it the warm connection"""
+    global _connection, _fresh_connection
+    driver = _driver()
+    _connection = _fresh_connection = driver.connect(cursorclass=driver.cursors.DictCursor, **DB_CONFIG)
+    _stats['opened'] += 1
+    return _connection
+
+
+def _discard():
+    """Drop the warm connection so the next checkout reconnects"""
+    global _connection
+    connection, _connection = _connection, None
+    if connection is not None:
+        try:
+            connection.close()
+        except pymysql.err.Error:
+            pass
+
+
+def _is_connection_lost(error):
+    """Check whether an error is an OperationalError for a dropped connection"""
+    if pymysql is None or not isinstance(error, pymysql.err.OperationalError):
+        return False
+    return bool(error.args) and error.args[0] in CONNECTION_LOST_ERRORS
+
+
+def is_data_error(error):
+    """
+    Check whether an error was caused by the values written
+    
+    Constraint and data errors (duplicate key, missing foreign key, bad or
+    too long value) only fail the statement: the connection and the open
+    transaction stay usable.
+    """
+    return pymysql is not None and isinstance(error, (pymysql.err.IntegrityError, pymysql.err.DataError))
+
+
+def _in_transaction(connection):
+    """Check whether the server reports an open transaction on a connection"""
+    return bool(connection.server_status & pymysql.constants.SERVER_STATUS.SERVER_STATUS_IN_TRANS)
+
+
+def _acquire():
+    """
+    Return the warm connection, reconnecting if it is closed or dead
+    
+    The liveness ping is only sent when the connection has been idle longer
+    than DB_PING_INTERVAL, so back-to-back statements skip the round trip.
+    """
+    connection = _connection
+    if connection is None or not connection.open:
+        return _connect()
+    
+    if time.monotonic() - _last_used > DB_PING_INTERVAL:
+        try:
+            connection.ping(reconnect=False)
+        except pymysql.err.Error:
+            _discard()
+            _stats['reconnects'] += 1
+            return _connect()
+    
+    _stats['reused'] += 1
+    return connection
+
+
+@lru_cache(maxsize=512)
+def fingerprint(sql):
+    """
+    Normalise a statement for grouping: literals and placeholders become ?,
+    value lists become (?+) and whitespace is collapsed
+    
+    Statements that differ only in their values (or IN list length) share a
+    fingerprint, so a fingerprint run many times in one request is an N+1.
+    """
+    text = sql.replace('%%', '%')
+    for pattern, replacement in _FINGERPRINT_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def _explain(connection, sql, params):
+    """EXPLAIN plan rows for a statement, or None if it cannot be explained"""
+    if sql.lstrip(' \t\n(').split(None, 1)[0].lower() not in EXPLAINABLE:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params or ())
+            return cursor.fetchall()
+    except pymysql.err.Error:
+        return None
+
+
+def _record(connection, sql, params, seconds, rows, explain=True):
+    """
+    Add a finished statement to the request trace and log it if slow
+    
+    Args:
+        connection: Connection the statement ran on
+        sql: SQL as sent (with placeholders)
+        params: Its parameters, used only to EXPLAIN a slow statement
+        seconds: Time spent in the driver
+        rows: Rows returned (SELECT) or affected (writes)
+        explain: Whether a slow run may be EXPLAINed on this connection
+    """
+    global _fresh_connection
+    reused = connection is not _fresh_connection
+    if not reused:
+        _fresh_connection = None
+    
+    entry = {
+        'fingerprint': fingerprint(sql),
+        'durationMs': round(seconds * 1000, 3),
+        'rows': rows,
+        'reused': reused
+    }
+    if _trace['active']:
+        _trace['statements'].append(entry)
+    
+    if SLOW_QUERY_MS and entry['durationMs'] >= SLOW_QUERY_MS:
+        log = dict(entry, message='Slow query')
+        if explain and entry['fingerprint'] not in _explained and len(_explained) < EXPLAINED_MAX:
+            _explained.add(entry['fingerprint'])
+            log['plan'] = _explain(connection, sql, params)
+        print(json.dumps(log, default=str, separators=(',', ':')))
+
+
+def _finish(connection, commit):
+    """Commit or roll back a connection's transaction, tracing the round trip"""
+    started = time.perf_counter()
+    if commit:
+        connection.commit()
+    else:
+        connection.rollback()
+    _record(connection, 'COMMIT' if commit else 'ROLLBACK', None, time.perf_counter() - started, 0, explain=False)
+
+
+def reset_session(connection):
+    """
+    Reset per-request session state on a warm connection
+    
+    Ends any open transaction so the next request does not inherit
+    uncommitted work or a stale REPEATABLE READ snapshot. Skips the
+    round trip when the server reports no transaction in progress.
+    """
+    if connection.open and _in_transaction(connection):
+        connection.rollback()
+
 
 @contextmanager
 def get_connection():
     """
     Get a database connection as a context manager
-    Automatically closes connection when done
+    Reuses the warm connection and resets its session state when done
+    
+    Inside a request scope the same connection is handed out to every call
+    and its transaction is left open until end_request().
     """
-    connection = None
+    global _last_used
+    if _request['active']:
+        if _request['connection'] is None:
+            _request['connection'] = _acquire()
+        try:
+            yield _request['connection']
+        except Exception as e:
+            if _is_connection_lost(e):
+                _request['connection'] = None
+                _discard()
+            raise
+        return
+    
+    connection = _acquire()
     try:
-        connection = pymysql.connect(**DB_CONFIG)
         yield connection
+    except Exception as e:
+        if _is_connection_lost(e):
+            _discard()
+        raise
     finally:
-        if connection:
-            connection.close()
+        _last_used = time.monotonic()
+        if _connection is connection:
+            try:
+                reset_session(connection)
+            except pymysql.err.Error:
+                _discard()
+
+
+def begin_request():
+    """
+    Start a request-scoped unit of work
+    
+    No connection is opened until the first statement runs. Every
+    query()/execute()/transaction() call until end_request() shares that
+    connection and a single transaction.
+    
+    Returns:
+        False if a request scope is already active (nested call), else True
+    """
+    if _request['active']:
+        return False
+    _request.update(active=True, connection=None, dirty=False, on_commit=[])
+    _trace.update(active=True, statements=[])
+    return True
+
+
+def end_request(commit=True):
+    """
+    Finish the request-scoped unit of work
+    
+    Callbacks registered with on_commit() run after a successful commit,
+    outside the request scope; their statements still count towards the
+    request trace.
+    
+    Args:
+        commit: Commit the request transaction if True, otherwise roll it back
+    """
+    global _last_used
+    connection = _request['connection']
+    callbacks = _request['on_commit']
+    _request.update(active=False, connection=None, dirty=False, on_commit=[])
+    if connection is not None and connection.open:
+        _last_used = time.monotonic()
+        if _in_transaction(connection):
+            try:
+                _finish(connection, commit)
+            except Exception:
+                # Unknown transaction state: never hand this connection out again
+                _trace['active'] = False
+                _discard()
+                raise
+    
+    try:
+        if commit:
+            for callback in callbacks:
+                callback()
+    finally:
+        _trace['active'] = False
+
+
+def on_commit(callback):
+    """
+    Run callback once the current request transaction has committed
+    
+    For work that must only see committed data, e.g. handing a new row to
+    another process. Outside a request scope writes commit immediately, so
+    the callback runs right away.
+    """
+    if _request['active']:
+        _request['on_commit'].append(callback)
+    else:
+        callback()
+
+
+def in_request():
+    """Check whether a request-scoped unit of work is active"""
+    return _request['active']
+
+
+def get_request_statements():
+    """
+    Statements traced for the current request, or the last one once it ended
+    
+    Returns:
+        List of dicts with fingerprint, durationMs, rows (returned or
+        affected) and reused (False for the first statement on a newly
+        opened connection), in execution order
+    """
+    return list(_trace['statements'])
+
+
+def get_stats():
+    """
+    Get connection reuse counters for this container
+    
+    Returns:
+        Dictionary with opened, reused and reconnects counts and the hit rate
+    """
+    checkouts = _stats['opened'] + _stats['reused']
+    return dict(_stats, hit_rate=_stats['reused'] / checkouts if checkouts else 0.0)
+
+
+def close():
+    """Close the warm connection (e.g. at container shutdown)"""
+    _discard()
 
 
 def query(sql, params=None):
     """
     Execute a query and return results
     
+    Read queries are retried once on a fresh connection if the warm
+    connection turns out to have been dropped by the server, unless the
+    current request has already written through it.
+    
     Args:
         sql: SQL query string
         params: Query parameters (tuple or list)
@@ -47,15 +392,71 @@ def query(sql, params=None):
     Returns:
         List of result dictionaries
     """
+    try:
+        return _fetch_all(sql, params)
+    except Exception as e:
+        if not _is_connection_lost(e) or _request['dirty']:
+            raise
+        _stats['reconnects'] += 1
+    
+    return _fetch_all(sql, params)
+
+
+def _fetch_all(sql, params):
+    """Run a buffered query once and trace it"""
     with get_connection() as connection:
         with connection.cursor() as cursor:
+            started = time.perf_counter()
             cursor.execute(sql, params or ())
-            return cursor.fetchall()
+            rows = cursor.fetchall()
+            _record(connection, sql, params, time.perf_counter() - started, len(rows))
+            return rows
+
+
+def stream(sql, params=None, chunk_size=1000):
+    """
+    Execute a query and yield its rows without buffering the result set
+    
+    Uses an unbuffered (server-side) cursor, so rows are read from the
+    socket chunk_size at a time and memory stays flat however many rows the
+    query returns. The connection cannot run other statements until the
+    generator is exhausted or closed, so consume it fully (or close() it)
+    before the next query.
+    
+    Args:
+        sql: SQL query string
+        params: Query parameters (tuple or list)
+        chunk_size: Rows fetched per read
+    
+    Yields:
+        Result dictionaries
+    """
+    with get_connection() as connection:
+        cursor = connection.cursor(_driver().cursors.SSDictCursor)
+        # Only time spent in the driver is traced, not the consumer's work
+        seconds, count = 0.0, 0
+        try:
+            started = time.perf_counter()
+            cursor.execute(sql, params or ())
+            seconds += time.perf_counter() - started
+            while True:
+                started = time.perf_counter()
+                rows = cursor.fetchmany(chunk_size)
+                seconds += time.perf_counter() - started
+                if not rows:
+                    break
+                count += len(rows)
+                yield from rows
+        finally:
+            # Reads and discards any unread rows so the connection is usable again
+            cursor.close()
+            _record(connection, sql, params, seconds, count)
 
 
 def execute(sql, params=None):
     """
     Execute a query that modifies data (INSERT, UPDATE, DELETE)
+    Commits immediately unless running inside a request scope
     
     Args:
         sql: SQL query string
@@ -66,17 +467,54 @@ def execute(sql, params=None):
     """
     with get_connection() as connection:
         with connection.cursor() as cursor:
+            started = time.perf_counter()
             affected_rows = cursor.execute(sql, params or ())
-            connection.commit()
+            _record(connection, sql, params, time.perf_counter() - started, affected_rows)
+            if _request['active']:
+                _request['dirty'] = True
+            else:
+                connection.commit()
             return {
                 'affected_rows': affected_rows,
                 'last_insert_id': cursor.lastrowid
             }
 
 
+def execute_many(sql, params_seq):
+    """
+    Execute one INSERT/REPLACE/UPDATE for many parameter sets
+    
+    Plain INSERT ... VALUES statements are sent as multi-row inserts by
+    pymysql, so a batch costs one round trip instead of one per row.
+    Commits immediately unless running inside a request scope.
+    
+    Args:
+        sql: SQL query string with a single VALUES (...) group
+        params_seq: Sequence of parameter tuples
+    
+    Returns:
+        Number of affected rows
+    """
+    params_seq = list(params_seq)
+    if not params_seq:
+        return {'affected_rows': 0}
+    
+    with get_connection() as connection:
+        with connection.cursor() as cursor:
+            started = time.perf_counter()
+            affected_rows = cursor.executemany(sql, params_seq)
+            _record(connection, sql, None, time.perf_counter() - started, affected_rows, explain=False)
+            if _request['active']:
+                _request['dirty'] = True
+            else:
+                connection.commit()
+            return {'affected_rows': affected_rows}
+
+
 def transaction(queries):
     """
     Execute multiple queries in a transaction
+    Inside a request scope the queries join the request transaction
     
     Args:
         queries: List of dicts with 'sql' and 'params' keys
@@ -91,13 +529,19 @@ def transaction(queries):
                 for query_dict in queries:
                     sql = query_dict['sql']
                     params = query_dict.get('params', ())
+                    started = time.perf_counter()
                     affected_rows = cursor.execute(sql, params)
+                    _record(connection, sql, params, time.perf_counter() - started, affected_rows)
                     results.append({
                         'affected_rows': affected_rows,
                         'last_insert_id': cursor.lastrowid
                     })
-                connection.commit()
+                if _request['active']:
+                    _request['dirty'] = True
+                else:
+                    connection.commit()
                 return results
         except Exception as e:
-            connection.rollback()
+            if not _request['active']:
+                connection.rollback()
             raise e
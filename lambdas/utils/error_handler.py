@@ -3,10 +3,20 @@ Error Handler Utility
 Centralized error handling for Lambda functions
 """
 
-from . import response
+from . import db, response, metrics
+import time
 import traceback
 
 
+class ValidationError(Exception):
+    """Invalid request input, rendered as a 400 validation error response"""
+    name = 'ValidationError'
+    
+    def __init__(self, message, details=None):
+        super().__init__(message)
+        self.details = details or {'message': message}
+
+
 def handle_error(error):
     """Handle errors and return appropriate response"""
     print(f'Error: {error}')
@@ -35,10 +45,44 @@ def handle_error(error):
 
 
 def async_handler(func):
-    """Decorator to handle async errors"""
+    """
+    Decorator to handle async errors
+    
+    Runs the handler inside a request-scoped unit of work: all db calls
+    share one lazily opened connection and transaction, which is committed
+    when the handler returns a non-error response and rolled back otherwise.
+    Large response bodies are compressed as the client's Accept-Encoding
+    allows (see response.compress). Each invocation ends with one EMF
+    metrics line summarising its statements (see metrics.emit).
+    """
     def wrapper(event, context):
+        if not db.begin_request():
+            # Nested handler: the outer one owns the transaction, errors are
+            # still turned into responses here
+            try:
+                return func(event, context)
+            except Exception as error:
+                return handle_error(error)
+        started = time.perf_counter()
+        
         try:
-            return func(event, context)
+            result = func(event, context)
         except Exception as error:
-            return handle_error(error)
+            try:
+                db.end_request(commit=False)
+            except Exception as rollback_error:
+                # end_request has already closed the scope and dropped the connection;
+                # the client still gets the response for the original error
+                print(f'Error: rollback failed: {rollback_error}')
+            result = handle_error(error)
+        else:
+            try:
+                db.end_request(commit=result.get('statusCode', 200) < 400)
+            except Exception as error:
+                result = handle_error(error)
+            else:
+                result = response.compress(result, event)
+        
+        metrics.emit(event, context, func, result, started)
+        return result
     return wrapper
@@ -0,0 +1,112 @@
+"""
+ETag Utility
+Entity tags and If-None-Match handling for conditional GET requests
+
+Single records get a strong ETag derived from their primary key and
+updated_at (plus any related versions, e.g. invoice items); list pages get
+a weak ETag derived from the page's keys, newest updated_at and row count,
+plus the pagination total, which changes with writes to other pages.
+Handlers check If-None-Match against a lightweight version query first and
+only fetch full rows when the client's copy is stale.
+
+updated_at has one-second resolution, so two writes to the same row within
+the same second can share an ETag.
+"""
+
+import json
+import hashlib
+from . import response
+
+# Column holding the last modification time on every table
+VERSION_COLUMN = 'updated_at'
+
+
+def _digest(parts):
+    """Stable hex digest of JSON-serializable parts (dates via str)"""
+    raw = json.dumps(parts, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def strong(*parts):
+    """
+    Strong ETag for one record
+    
+    Args:
+        parts: Values identifying the record version, e.g. (id, updated_at)
+    """
+    return f'"{_digest(parts)}"'
+
+
+def weak(rows, key='id', version_columns=(VERSION_COLUMN,), extra=()):
+    """
+    Weak ETag for a list page
+    
+    Args:
+        rows: Page rows (full rows or just the key and version columns)
+        key: Primary key column
+        version_columns: Last modification columns the rows depend on, e.g.
+            the joined customer's updated_at for a customer_name column
+        extra: Other values the page response shows, e.g. the pagination
+            total and totalMode
+    """
+    versions = [
+        row[column] for row in rows for column in version_columns
+        if row.get(column) is not None
+    ]
+    newest = max(versions) if versions else None
+    return f'W/"{_digest([newest, len(rows), [row[key] for row in rows], list(extra)])}"'
+
+
+def if_none_match(event):
+    """Read the If-None-Match header from an event (None if absent)"""
+    headers = (event or {}).get('headers') or {}
+    for name, value in headers.items():
+        if name.lower() == 'if-none-match':
+            return value
+    return None
+
+
+def requested(event):
+    """Check whether the client sent If-None-Match (a version lookup is worthwhile)"""
+    return bool(if_none_match(event))
+
+
+def matches(event, current):
+    """
+    Compare If-None-Match with the current ETag
+    
+    Uses the weak comparison If-None-Match requires, so W/"x" matches "x".
+    """
+    header = if_none_match(event)
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = current[2:] if current.startswith('W/') else current
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(event, current):
+    """
+    Return a 304 response if the client's copy is current, else None
+    
+    Args:
+        event: API Gateway event
+        current: ETag of the current representation
+    """
+    if matches(event, current):
+        return response.not_modified(current)
+    return None
+
+
+def tag(result, current):
+    """Attach an ETag to a response dict and return it"""
+    result['headers']['ETag'] = current
+    result['headers']['Cache-Control'] = 'private, no-cache'
+    return result
@@ -0,0 +1,143 @@
+"""
+Export Utility
+Streams query results to CSV or NDJSON files for download
+
+Rows are read through db.stream (an unbuffered server-side cursor) and
+written to the blob store as they arrive, so memory stays flat whatever the
+row count. The download reference is a presigned S3 URL or, with the local
+blob backend, a file:// path (see blobstore).
+"""
+
+import os
+import io
+import csv
+import uuid
+import time
+import base64
+from . import db, response, blobstore
+from .error_handler import ValidationError
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+EXPORT_PREFIX = os.environ.get('EXPORT_PREFIX', 'exports')
+
+# Encoded bytes collected before a write to the blob store
+FLUSH_BYTES = 256 * 1024
+
+# Rows read from the server-side cursor per fetch
+CHUNK_ROWS = 1000
+
+
+def _csv_value(value):
+    """CSV cell for a column value (NULL as an empty cell)"""
+    if value is None:
+        return ''
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    return value
+
+
+def _csv_lines(rows, columns):
+    """Encode rows as CSV text, one chunk per row (header first)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for row in rows:
+        if not header_written:
+            columns = columns or list(row)
+            writer.writerow(columns)
+            header_written = True
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if not header_written and columns:
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+
+def _ndjson_lines(rows, columns):
+    """Encode rows as newline-delimited JSON"""
+    for row in rows:
+        if columns:
+            row = {column: row.get(column) for column in columns}
+        yield response.dumps(row) + '\n'
+
+
+ENCODERS = {
+    'csv': _csv_lines,
+    'ndjson': _ndjson_lines
+}
+
+
+def write_query(sql, params, key, fmt='csv', columns=None):
+    """
+    Stream a query's rows to a blob
+    
+    Args:
+        sql: SELECT statement
+        params: Query parameters
+        key: Blob key to write
+        fmt: One of FORMATS
+        columns: Column order for the file; defaults to the first row's keys
+    
+    Returns:
+        Dictionary with the download reference, format, row count and size
+    """
+    writer = blobstore.get_store().open_writer(key, FORMATS[fmt])
+    counted = {'rows': 0}
+    
+    def counting(rows):
+        for row in rows:
+            counted['rows'] += 1
+            yield row
+    
+    size, pending, pending_bytes = 0, [], 0
+    try:
+        for text in ENCODERS[fmt](counting(db.stream(sql, params, CHUNK_ROWS)), columns):
+            data = text.encode('utf-8')
+            pending.append(data)
+            pending_bytes += len(data)
+            if pending_bytes >= FLUSH_BYTES:
+                writer.write(b''.join(pending))
+                size += pending_bytes
+                pending, pending_bytes = [], 0
+        if pending:
+            writer.write(b''.join(pending))
+            size += pending_bytes
+        reference = writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    
+    return dict(reference, format=fmt, contentType=FORMATS[fmt], rows=counted['rows'], bytes=size)
+
+
+def export_query(sql, params, name, fmt='csv', columns=None):
+    """
+    Stream a query's rows to a new export file under EXPORT_PREFIX
+    
+    Args:
+        sql: SELECT statement
+        params: Query parameters
+        name: File name prefix, e.g. the table name
+        fmt: One of FORMATS
+        columns: Column order for the file; defaults to the first row's keys
+    
+    Returns:
+        Dictionary with the download reference, format, row count and size
+    """
+    stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+    key = f'{EXPORT_PREFIX}/{name}/{stamp}-{uuid.uuid4().hex[:8]}.{fmt}'
+    return write_query(sql, params, key, fmt, columns)
+
+
+def get_format(query_params):
+    """Read the export format from ?format= (csv by default)"""
+    fmt = query_params.get('format') or 'csv'
+    if fmt not in FORMATS:
+        raise ValidationError(f"format must be one of: {', '.join(FORMATS)}")
+    return fmt
@@ -0,0 +1,116 @@
+"""
+Invocation Metrics Utility
+One CloudWatch Embedded Metric Format (EMF) log line per handler invocation
+
+async_handler calls emit() once the request scope has ended. The line
+carries the invocation's duration and its query count, time, rows and
+opened connections as metrics (dimensions FunctionName and Route), plus the
+per-fingerprint breakdown of the statements traced by utils.db as plain
+properties for CloudWatch Logs Insights. A fingerprint with a high count is
+an N+1; MaxRepeatedQuery makes that alarmable.
+"""
+
+import os
+import json
+import time
+from . import db
+
+# Enabled by default only inside Lambda, so scripts and benchmarks calling
+# handlers keep a clean stdout
+QUERY_METRICS = os.environ.get('QUERY_METRICS', '1' if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ else '0') == '1'
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'RMCBilling')
+
+# Fingerprints listed per invocation, slowest total first
+TOP_STATEMENTS = 20
+
+METRIC_UNITS = (
+    ('Duration', 'Milliseconds'),
+    ('QueryCount', 'Count'),
+    ('QueryTime', 'Milliseconds'),
+    ('RowsReturned', 'Count'),
+    ('ConnectionsOpened', 'Count'),
+    ('MaxRepeatedQuery', 'Count')
+)
+
+
+def summarize(statements):
+    """
+    Aggregate traced statements by fingerprint
+    
+    Args:
+        statements: Entries from db.get_request_statements()
+    
+    Returns:
+        Dictionary with QueryCount, QueryTime, RowsReturned,
+        ConnectionsOpened, MaxRepeatedQuery and Statements (per-fingerprint
+        count, totalMs, maxMs and rows, slowest total first)
+    """
+    groups = {}
+    for entry in statements:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'count': 0,
+            'totalMs': 0.0,
+            'maxMs': 0.0,
+            'rows': 0
+        })
+        group['count'] += 1
+        group['totalMs'] += entry['durationMs']
+        group['maxMs'] = max(group['maxMs'], entry['durationMs'])
+        group['rows'] += entry['rows'] or 0
+    
+    ranked = sorted(groups.values(), key=lambda group: group['totalMs'], reverse=True)
+    for group in ranked:
+        group['totalMs'] = round(group['totalMs'], 3)
+    return {
+        'QueryCount': len(statements),
+        'QueryTime': round(sum(entry['durationMs'] for entry in statements), 3),
+        'RowsReturned': sum(entry['rows'] or 0 for entry in statements),
+        'ConnectionsOpened': sum(1 for entry in statements if not entry['reused']),
+        'MaxRepeatedQuery': max((group['count'] for group in ranked), default=0),
+        'Statements': ranked[:TOP_STATEMENTS]
+    }
+
+
+def route(event, func):
+    """Route dimension: the HTTP API route key, else the handler name"""
+    if isinstance(event, dict):
+        if event.get('routeKey'):
+            return event['routeKey']
+        if event.get('httpMethod') and event.get('resource'):
+            return f"{event['httpMethod']} {event['resource']}"
+    return getattr(func, '__name__', 'handler')
+
+
+def emit(event, context, func, result, started):
+    """
+    Print the EMF line for a finished invocation
+    
+    Args:
+        event: Lambda event
+        context: Lambda context (may be None)
+        func: Handler function
+        result: Response returned to the client
+        started: time.perf_counter() at the start of the invocation
+    """
+    if not QUERY_METRICS:
+        return
+    
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['FunctionName', 'Route']],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, unit in METRIC_UNITS]
+            }]
+        },
+        'FunctionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        'Route': route(event, func),
+        'RequestId': getattr(context, 'aws_request_id', None),
+        'StatusCode': result.get('statusCode') if isinstance(result, dict) else None,
+        'Duration': round((time.perf_counter() - started) * 1000, 3)
+    }
+    record.update(summarize(db.get_request_statements()))
+    print(json.dumps(record, default=str, separators=(',', ':')))
@@ -0,0 +1,206 @@
+"""
+Pagination Utility
+Keyset (cursor) pagination and pagination total helpers for list endpoints
+"""
+
+import os
+import time
+import base64
+import json
+from . import db
+from .error_handler import ValidationError
+
+# How list endpoints compute pagination.total (?total=)
+#   exact    - COUNT(*) on every call
+#   cached   - COUNT(*) cached per container for TOTAL_CACHE_TTL seconds,
+#              dropped when the table is written through the CRUD handlers
+#   estimate - row estimate from table statistics (unfiltered lists only)
+#   none     - no count; pagination.hasNextPage tells whether to keep going
+TOTAL_MODES = ('exact', 'cached', 'estimate', 'none')
+
+TOTAL_CACHE_TTL = float(os.environ.get('TOTAL_CACHE_TTL', 60))
+TOTAL_CACHE_SIZE = 256
+
+# (table_name, where, params) -> (expires_at, total)
+_total_cache = {}
+
+
+def get_limit(query_params, default=50, maximum=500):
+    """Read the page size from query parameters, capped at maximum"""
+    try:
+        limit = int(query_params.get('limit', default))
+    except (TypeError, ValueError):
+        raise ValidationError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def is_cursor_mode(query_params):
+    """
+    Check whether the client opted into keyset pagination
+    
+    Passing cursor= (empty) requests the first page, any other value is a
+    nextCursor returned by a previous page.
+    """
+    return 'cursor' in query_params
+
+
+def encode_cursor(row, columns):
+    """
+    Build an opaque cursor from the sort key values of a row
+    
+    Args:
+        row: Last row of the current page
+        columns: Sort key columns, optionally table-qualified (e.g. 'si.id')
+    
+    Returns:
+        URL-safe cursor string
+    """
+    values = [row[column.split('.')[-1]] for column in columns]
+    raw = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Returns:
+        List of sort key values, or None for the first page
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValidationError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValidationError('Invalid cursor')
+    return values
+
+
+def keyset_condition(columns, values, descending=True):
+    """
+    Build the WHERE condition selecting rows after a cursor
+    
+    For (a, b, c) in DESC order this expands to
+    a < ? OR (a = ? AND (b < ? OR (b = ? AND c < ?))) (> for ASC), which
+    MySQL can resolve as a range scan on an index over the sort keys.
+    
+    Returns:
+        Tuple of (sql, params)
+    """
+    op = '<' if descending else '>'
+    column, value = columns[-1], values[-1]
+    sql = f'{column} {op} %s'
+    params = [value]
+    for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+        sql = f'{column} {op} %s OR ({column} = %s AND ({sql}))'
+        params = [value, value] + params
+    return f'({sql})', params
+
+
+def order_by(columns, descending=True):
+    """Build the ORDER BY clause matching keyset_condition"""
+    direction = 'DESC' if descending else 'ASC'
+    return ', '.join(f'{column} {direction}' for column in columns)
+
+
+def keyset_page(rows, columns, limit):
+    """
+    Trim a page fetched with LIMIT limit + 1 and compute the next cursor
+    
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], columns)
+
+
+def get_total_mode(query_params, default='exact'):
+    """Read the requested total strategy from query parameters"""
+    mode = query_params.get('total') or default
+    if mode not in TOTAL_MODES:
+        raise ValidationError(f"total must be one of: {', '.join(TOTAL_MODES)}")
+    return mode
+
+
+def count_total(table_name, mode, where='', params=()):
+    """
+    Compute the pagination total for a list query using the given strategy
+    
+    Args:
+        table_name: Table being listed
+        mode: One of TOTAL_MODES
+        where: Optional filter condition (without WHERE) applied to the list
+        params: Parameters for the filter condition
+    
+    Returns:
+        Tuple of (total, mode_used); total is None when mode is 'none'.
+        A filtered 'estimate' falls back to 'cached', and a cache miss is
+        reported as 'exact' since the count was just computed.
+    """
+    if mode == 'none':
+        return None, 'none'
+    
+    if mode == 'estimate':
+        if not where:
+            estimate = db.query(
+                '''SELECT TABLE_ROWS as total FROM information_schema.TABLES
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s''',
+                (table_name,)
+            )
+            if estimate and estimate[0]['total'] is not None:
+                return int(estimate[0]['total']), 'estimate'
+        mode = 'cached'
+    
+    key = (table_name, where, tuple(params))
+    if mode == 'cached':
+        cached = _total_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1], 'cached'
+    
+    sql = f'SELECT COUNT(*) as total FROM {table_name}'
+    if where:
+        sql += f' WHERE {where}'
+    result = db.query(sql, tuple(params))
+    total = result[0]['total'] if result else 0
+    
+    if mode == 'cached':
+        if len(_total_cache) >= TOTAL_CACHE_SIZE:
+            _total_cache.pop(next(iter(_total_cache)))
+        _total_cache[key] = (time.monotonic() + TOTAL_CACHE_TTL, total)
+    return total, 'exact'
+
+
+def invalidate_totals(table_name):
+    """Drop cached totals for a table after a write"""
+    for key in [key for key in _total_cache if key[0] == table_name]:
+        del _total_cache[key]
+
+
+def offset_page(rows, page, limit, total, total_mode):
+    """
+    Build the page/limit pagination block for a list response
+    
+    With total_mode 'none' the rows must have been fetched with
+    LIMIT limit + 1; the extra row is trimmed and reported as hasNextPage.
+    
+    Returns:
+        Tuple of (rows, pagination dict)
+    """
+    info = {
+        'page': page,
+        'limit': limit,
+        'total': total,
+        'totalPages': (total + limit - 1) // limit if total is not None else None,
+        'totalMode': total_mode
+    }
+    if total_mode == 'none':
+        info['hasNextPage'] = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        info['hasNextPage'] = page * limit < total
+    return rows, info
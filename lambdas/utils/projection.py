@@ -0,0 +1,58 @@
+"""
+Field Projection Utility
+Validates ?fields= column lists against the table's real columns
+
+Column names are read from information_schema once per container and
+cached, so projected queries never interpolate an unchecked identifier.
+"""
+
+from . import db
+from .error_handler import ValidationError
+
+# table_name -> tuple of column names in table order
+_columns = {}
+
+
+def get_columns(table_name):
+    """Column names of a table, discovered once per container"""
+    if table_name not in _columns:
+        rows = db.query(
+            '''SELECT COLUMN_NAME as column_name FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+               ORDER BY ORDINAL_POSITION''',
+            (table_name,)
+        )
+        _columns[table_name] = tuple(row['column_name'] for row in rows)
+    return _columns[table_name]
+
+
+def parse_fields(query_params, table_name, required=(), extra=()):
+    """
+    Read the requested columns from ?fields=a,b,c
+    
+    Args:
+        query_params: Request query parameters
+        table_name: Table the columns must belong to
+        required: Columns always returned when the table has them (primary
+            key, sort and version columns the handler needs)
+        extra: Additional allowed names that are not table columns, e.g.
+            a joined customer_name
+    
+    Returns:
+        List of column names in request order, or None when fields= is absent
+    """
+    raw = query_params.get('fields')
+    if not raw:
+        return None
+    
+    requested = [name.strip() for name in raw.split(',') if name.strip()]
+    allowed = set(get_columns(table_name)) | set(extra)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+    
+    selected = []
+    for name in [name for name in required if name in allowed] + requested:
+        if name not in selected:
+            selected.append(name)
+    return selected
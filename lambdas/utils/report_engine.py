@@ -0,0 +1,321 @@
+"""
+Report Engine
+Asynchronous report jobs with cached artifacts
+
+A report is a named query. Submitting one records a job in report_jobs and
+hands it to a worker once the request commits: the worker Lambda named by
+REPORT_WORKER_FUNCTION (invoked asynchronously, so generation is not bound
+by the API Gateway timeout) or, when unset, the submitting process itself.
+The worker streams the query to the blob store and records the artifact on
+the job. Clients poll the job and fetch the download reference when done.
+
+A submit with the same report, format and parameters while the source
+tables are unchanged returns the existing job instead of starting another:
+a finished one for REPORT_FRESHNESS seconds, or one still in progress.
+"""
+
+import os
+import json
+import hashlib
+import datetime
+import traceback
+from . import db, auth, response, cache, export, blobstore
+from .error_handler import async_handler, ValidationError
+
+REPORT_WORKER_FUNCTION = os.environ.get('REPORT_WORKER_FUNCTION')
+REPORT_FRESHNESS = int(os.environ.get('REPORT_FRESHNESS', 900))
+# Jobs running longer than this are presumed dead (the Lambda maximum)
+REPORT_JOB_TIMEOUT = 900
+REPORT_PREFIX = os.environ.get('REPORT_PREFIX', 'reports')
+
+# Rows returned by a preview
+PREVIEW_ROWS = 100
+
+# Parameter types a report definition can declare
+PARAM_TYPES = {
+    'date': lambda value: datetime.date.fromisoformat(str(value)).isoformat(),
+    'int': int,
+    'str': str
+}
+
+FIND_JOB_SQL = '''
+    SELECT * FROM report_jobs
+    WHERE params_hash = %s AND (
+        (status = 'done' AND finished_at > NOW() - INTERVAL %s SECOND)
+        OR (status = 'queued' AND created_at > NOW() - INTERVAL %s SECOND)
+        OR (status = 'running' AND started_at > NOW() - INTERVAL %s SECOND)
+    )
+    ORDER BY id DESC LIMIT 1
+'''
+
+_lambda_client = None
+
+
+def _invoke_worker(job_id):
+    """Start the worker Lambda for a job without waiting for it"""
+    global _lambda_client
+    if _lambda_client is None:
+        import boto3
+        _lambda_client = boto3.client('lambda')
+    _lambda_client.invoke(
+        FunctionName=REPORT_WORKER_FUNCTION,
+        InvocationType='Event',
+        Payload=json.dumps({'job_id': job_id}).encode('utf-8')
+    )
+
+
+def _finish(job_id, status, **columns):
+    """Record the outcome of a job"""
+    assignments = ''.join(f', {column} = %s' for column in columns)
+    db.execute(
+        f'UPDATE report_jobs SET status = %s, finished_at = NOW(){assignments} WHERE id = %s',
+        (status, *columns.values(), job_id)
+    )
+
+
+def _job_view(job):
+    """API representation of a report_jobs row"""
+    view = {
+        'jobId': job['id'],
+        'reportId': job['report_id'],
+        'format': job['format'],
+        'params': json.loads(job['params']),
+        'status': job['status'],
+        'createdAt': job['created_at'],
+        'startedAt': job['started_at'],
+        'finishedAt': job['finished_at']
+    }
+    if job['status'] == 'done':
+        view.update(
+            rows=job['row_count'],
+            bytes=job['byte_count'],
+            result=blobstore.get_store().reference(job['artifact_key'])
+        )
+    elif job['status'] == 'failed':
+        view['error'] = job['error']
+    return view
+
+
+def create_report_engine(reports):
+    """
+    Create report handlers for a set of report definitions
+    
+    Args:
+        reports: report_id -> definition dict with
+            name: Display name
+            tables: Tables the report reads (for freshness and preview caching)
+            params: Parameter name -> type in PARAM_TYPES
+            required: Parameter names that must be given
+            query: Function(params) -> (sql, args); the SELECT must not have a
+                LIMIT, previews add one
+            columns: Optional output column order
+    
+    Returns:
+        Dictionary of handlers: list, preview, submit, download, status,
+        result and run (the worker entry point)
+    """
+    
+    def get_definition(report_id):
+        if report_id not in reports:
+            raise ValidationError(f"report_id must be one of: {', '.join(reports)}")
+        return reports[report_id]
+    
+    def parse_params(definition, raw):
+        """Validate and normalise report parameters"""
+        if not isinstance(raw, dict):
+            raise ValidationError('params must be an object')
+        params = {}
+        for name, kind in definition.get('params', {}).items():
+            value = raw.get(name)
+            if value in (None, ''):
+                if name in definition.get('required', ()):
+                    raise ValidationError(f'{name} is required')
+                continue
+            try:
+                params[name] = PARAM_TYPES[kind](value)
+            except (TypeError, ValueError):
+                raise ValidationError(f'{name} must be a valid {kind}')
+        return params
+    
+    def run_job(job_id):
+        """Generate a claimed job's artifact and record the outcome"""
+        claimed = db.execute(
+            "UPDATE report_jobs SET status = 'running', started_at = NOW() WHERE id = %s AND status = 'queued'",
+            (job_id,)
+        )
+        if not claimed['affected_rows']:
+            return None
+        
+        job = db.query('SELECT * FROM report_jobs WHERE id = %s', (job_id,))[0]
+        try:
+            definition = reports[job['report_id']]
+            sql, args = definition['query'](json.loads(job['params']))
+            key = f"{REPORT_PREFIX}/{job['report_id']}/{job_id}.{job['format']}"
+            result = export.write_query(sql, args, key, job['format'], definition.get('columns'))
+        except Exception as error:
+            traceback.print_exc()
+            _finish(job_id, 'failed', error=str(error)[:1000])
+            return 'failed'
+        
+        _finish(job_id, 'done', artifact_key=key, row_count=result['rows'], byte_count=result['bytes'])
+        return 'done'
+    
+    def dispatch(job_id):
+        """Hand a committed job to the worker (or run it here when none is configured)"""
+        try:
+            if REPORT_WORKER_FUNCTION:
+                _invoke_worker(job_id)
+            else:
+                run_job(job_id)
+        except Exception as error:
+            traceback.print_exc()
+            _finish(job_id, 'failed', error=f'Could not start report: {error}'[:1000])
+    
+    def submit(report_id, raw_params, fmt, user):
+        """Return a fresh or in-progress job for the request, or queue a new one"""
+        definition = get_definition(report_id)
+        params = parse_params(definition, raw_params)
+        if fmt not in export.FORMATS:
+            raise ValidationError(f"format must be one of: {', '.join(export.FORMATS)}")
+        
+        raw = json.dumps(
+            [report_id, fmt, params, cache.get_versions(definition['tables'])],
+            sort_keys=True, separators=(',', ':')
+        )
+        params_hash = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+        
+        existing = db.query(FIND_JOB_SQL, (params_hash, REPORT_FRESHNESS, REPORT_JOB_TIMEOUT, REPORT_JOB_TIMEOUT))
+        if existing and (existing[0]['status'] != 'done'
+                         or blobstore.get_store().exists(existing[0]['artifact_key'])):
+            job = _job_view(existing[0])
+            job['cached'] = True
+            return response.success(job, 200 if job['status'] == 'done' else 202)
+        
+        created = db.execute(
+            '''INSERT INTO report_jobs (report_id, params, format, params_hash, created_by)
+               VALUES (%s, %s, %s, %s, %s)''',
+            (report_id, json.dumps(params, sort_keys=True), fmt, params_hash, user['id'])
+        )
+        job_id = created['last_insert_id']
+        db.on_commit(lambda: dispatch(job_id))
+        
+        job = db.query('SELECT * FROM report_jobs WHERE id = %s', (job_id,))[0]
+        return response.success(dict(_job_view(job), cached=False), 202)
+    
+    @async_handler
+    def list_handler(event, context):
+        """List available reports and their parameters"""
+        auth.validate_request(event)
+        
+        return response.success([
+            {
+                'id': report_id,
+                'name': definition['name'],
+                'formats': list(export.FORMATS),
+                'params': definition.get('params', {}),
+                'required': list(definition.get('required', ()))
+            }
+            for report_id, definition in reports.items()
+        ])
+    
+    @async_handler
+    def preview_handler(event, context):
+        """
+        First PREVIEW_ROWS rows of a report, computed synchronously
+        Query: report_id plus the report's parameters
+        """
+        auth.validate_request(event)
+        
+        query_params = event.get('queryStringParameters') or {}
+        report_id = query_params.get('report_id')
+        definition = get_definition(report_id)
+        params = parse_params(definition, query_params)
+        
+        def compute():
+            sql, args = definition['query'](params)
+            rows = db.query(f'{sql} LIMIT %s', tuple(args) + (PREVIEW_ROWS + 1,))
+            return response.success({
+                'reportId': report_id,
+                'params': params,
+                'rows': rows[:PREVIEW_ROWS],
+                'truncated': len(rows) > PREVIEW_ROWS
+            })
+        
+        return cache.cached_response(
+            'reports:preview', definition['tables'], compute,
+            params=(report_id, sorted(params.items()))
+        )
+    
+    @async_handler
+    def submit_handler(event, context):
+        """
+        Submit a report job
+        Body: {"report_id": ..., "format": "csv"|"ndjson", "params": {...}}
+        """
+        user = auth.validate_request(event)
+        body = json.loads(event.get('body') or '{}')
+        
+        return submit(body.get('report_id'), body.get('params') or {}, body.get('format') or 'csv', user)
+    
+    @async_handler
+    def download_handler(event, context):
+        """
+        Submit a report job from query parameters
+        Query: report_id, format and the report's parameters
+        """
+        user = auth.validate_request(event)
+        query_params = event.get('queryStringParameters') or {}
+        
+        return submit(query_params.get('report_id'), query_params, query_params.get('format') or 'csv', user)
+    
+    @async_handler
+    def status_handler(event, context):
+        """Get a report job"""
+        auth.validate_request(event)
+        job_id = event['pathParameters']['id']
+        
+        jobs = db.query('SELECT * FROM report_jobs WHERE id = %s', (job_id,))
+        if not jobs:
+            return response.not_found('Report job')
+        
+        return response.success(_job_view(jobs[0]))
+    
+    @async_handler
+    def result_handler(event, context):
+        """Get the download reference of a finished report job"""
+        auth.validate_request(event)
+        job_id = event['pathParameters']['id']
+        
+        jobs = db.query('SELECT * FROM report_jobs WHERE id = %s', (job_id,))
+        if not jobs:
+            return response.not_found('Report job')
+        job = jobs[0]
+        
+        if job['status'] == 'failed':
+            return response.error(f"Report failed: {job['error']}", 409)
+        if job['status'] != 'done':
+            return response.error(f"Report is still {job['status']}", 409)
+        if not blobstore.get_store().exists(job['artifact_key']):
+            return response.error('Report artifact has expired, submit the report again', 410)
+        
+        return response.success(dict(
+            blobstore.get_store().reference(job['artifact_key']),
+            rows=job['row_count'],
+            bytes=job['byte_count'],
+            format=job['format'],
+            contentType=export.FORMATS[job['format']]
+        ))
+    
+    def run_handler(event, context):
+        """Worker entry point, invoked asynchronously with {"job_id": ...}"""
+        return {'jobId': event['job_id'], 'status': run_job(event['job_id'])}
+    
+    return {
+        'list': list_handler,
+        'preview': preview_handler,
+        'submit': submit_handler,
+        'download': download_handler,
+        'status': status_handler,
+        'result': result_handler,
+        'run': run_handler
+    }
@@ -3,27 +3,125 @@ Response Formatter Utility
 Standardizes API responses for consistency
 """
 
+import os
 import json
+import zlib
+import base64
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+JSON_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Credentials': True,
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Expose-Headers': 'ETag'
+}
+
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# (largest body size, gzip level, brotli quality): small bodies get the best
+# ratio, large ones a cheaper level so compression time stays bounded
+COMPRESSION_LEVELS = (
+    (64 * 1024, 9, 6),
+    (512 * 1024, 6, 5),
+    (None, 4, 4)
+)
+
+# brotli is optional: imported on first use, gzip only when not installed
+_brotli = None
+
+
+def _encode_timedelta(value):
+    """Format a MySQL TIME value (returned as timedelta) as [-]HH:MM:SS"""
+    seconds = int(value.total_seconds())
+    sign = '-' if seconds < 0 else ''
+    hours, remainder = divmod(abs(seconds), 3600)
+    return f'{sign}{hours:02d}:{remainder // 60:02d}:{remainder % 60:02d}'
+
+
+def _encode_bytes(value):
+    """Encode binary column values as base64 text"""
+    return base64.b64encode(value).decode('ascii')
+
+
+# Column value types json cannot encode, looked up by exact type so each
+# value costs one dict lookup (subclasses fall back to isinstance in order).
+# Decimal becomes a JSON number and dates ISO 8601 strings.
+_VALUE_ENCODERS = {
+    Decimal: float,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    time: time.isoformat,
+    timedelta: _encode_timedelta,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes
+}
+
+
+def _encode_value(value):
+    """Encode values DictCursor rows contain that json cannot"""
+    encoder = _VALUE_ENCODERS.get(type(value))
+    if encoder is None:
+        for value_type, type_encoder in _VALUE_ENCODERS.items():
+            if isinstance(value, value_type):
+                encoder = type_encoder
+                break
+        else:
+            raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+    return encoder(value)
+
+
+# Shared encoder: rows are encoded in place by the C encoder, which only
+# calls _encode_value for the values it cannot handle itself
+_encoder = json.JSONEncoder(
+    default=_encode_value,
+    ensure_ascii=False,
+    check_circular=False,
+    separators=(',', ':')
+)
+
+
+def dumps(data):
+    """Serialize a response body, including Decimal/date/datetime/bytes values"""
+    return _encoder.encode(data)
 
 
 def success(data, status_code=200):
     """Success response"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Credentials': True,
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps({
+        'headers': dict(JSON_HEADERS),
+        'body': dumps({
             'success': True,
             'data': data
         })
     }
 
 
+def raw(body, status_code=200):
+    """Response with an already serialized JSON body (e.g. from the cache)"""
+    return {
+        'statusCode': status_code,
+        'headers': dict(JSON_HEADERS),
+        'body': body
+    }
+
+
+def not_modified(etag):
+    """304 Not Modified response for a conditional GET"""
+    headers = dict(JSON_HEADERS, **{'ETag': etag, 'Cache-Control': 'private, no-cache'})
+    del headers['Content-Type']
+    return {
+        'statusCode': 304,
+        'headers': headers,
+        'body': ''
+    }
+
+
 def error(message, status_code=500, details=None):
     """Error response"""
     body = {
@@ -35,14 +133,8 @@ def error(message, status_code=500, details=None):
     
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Credentials': True,
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body)
+        'headers': dict(JSON_HEADERS),
+        'body': dumps(body)
     }
 
 
@@ -64,3 +156,94 @@ def unauthorized(message='Unauthorized'):
 def forbidden(message='Forbidden'):
     """Forbidden response"""
     return error(message, 403)
+
+
+def _load_brotli():
+    """Import brotli on first use, or return False when it is not installed"""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli
+
+
+def _accepted_encodings(event):
+    """Parse the request Accept-Encoding header into {coding: q}"""
+    headers = (event or {}).get('headers') or {}
+    header = next((value for key, value in headers.items() if key.lower() == 'accept-encoding'), '')
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _choose_encoding(event):
+    """Pick br or gzip from Accept-Encoding, or None for identity"""
+    accepted = _accepted_encodings(event)
+    wildcard = accepted.get('*', 0.0)
+    candidates = []
+    if _load_brotli():
+        candidates.append((accepted.get('br', wildcard), 1, 'br'))
+    candidates.append((accepted.get('gzip', wildcard), 0, 'gzip'))
+    q, _, encoding = max(candidates)
+    return encoding if q > 0 else None
+
+
+def compress(result, event):
+    """
+    Compress a response body the client accepts compressed
+    
+    Bodies of at least COMPRESS_MIN_BYTES are encoded with brotli (when
+    installed) or gzip according to the request Accept-Encoding header and
+    returned base64 encoded with isBase64Encoded, as API Gateway requires.
+    Every negotiated response carries Vary: Accept-Encoding, compressed or
+    not, so shared caches keep the encodings apart.
+    
+    Args:
+        result: Response dict returned by a handler
+        event: API Gateway event the response is for
+    
+    Returns:
+        The response dict, compressed in place when worthwhile
+    """
+    body = result.get('body')
+    headers = result.get('headers') or {}
+    if not isinstance(body, str) or result.get('isBase64Encoded') or 'Content-Encoding' in headers:
+        return result
+    
+    headers = dict(headers, Vary='Accept-Encoding')
+    result['headers'] = headers
+    data = body.encode('utf-8')
+    if len(data) < COMPRESS_MIN_BYTES:
+        return result
+    encoding = _choose_encoding(event)
+    if encoding is None:
+        return result
+    
+    for max_size, gzip_level, brotli_quality in COMPRESSION_LEVELS:
+        if max_size is None or len(data) <= max_size:
+            break
+    if encoding == 'br':
+        compressed = _brotli.compress(data, quality=brotli_quality)
+    else:
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        compressed = compressor.compress(data) + compressor.flush()
+    
+    result['headers'] = dict(headers, **{'Content-Encoding': encoding})
+    result['body'] = base64.b64encode(compressed).decode('ascii')
+    result['isBase64Encoded'] = True
+    return result
@@ -0,0 +1,141 @@
+"""
+Daily Rollup Utility
+Maintains per-day revenue and delivery totals read by the dashboard
+
+Writes to sales_invoices and delivery_challans apply signed deltas to the
+rollup tables inside the same request transaction, so dashboard reads cost
+one row per day regardless of how much history the base tables hold.
+"""
+
+from decimal import Decimal
+from . import db
+
+UPSERT_REVENUE_SQL = '''
+    INSERT INTO daily_revenue (rollup_date, invoice_count, revenue_total)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        invoice_count = invoice_count + VALUES(invoice_count),
+        revenue_total = revenue_total + VALUES(revenue_total)
+'''
+
+UPSERT_DELIVERIES_SQL = '''
+    INSERT INTO daily_deliveries (rollup_date, challan_count, quantity_total)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        challan_count = challan_count + VALUES(challan_count),
+        quantity_total = quantity_total + VALUES(quantity_total)
+'''
+
+UPSERT_CUSTOMER_DELIVERIES_SQL = '''
+    INSERT INTO daily_customer_deliveries (rollup_date, customer_id, challan_count, quantity_total)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        challan_count = challan_count + VALUES(challan_count),
+        quantity_total = quantity_total + VALUES(quantity_total)
+'''
+
+
+def _amount(value):
+    """Convert a stored or request amount to Decimal (NULL counts as 0)"""
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+
+def _deltas(old, new, key_fields, amount_field):
+    """
+    Signed (key, count, amount) deltas for replacing old with new
+    
+    Rows whose key did not change collapse into a single delta, and
+    zero deltas are dropped.
+    """
+    deltas = {}
+    if old:
+        key = tuple(str(old[field]) for field in key_fields)
+        count, amount = deltas.get(key, (0, Decimal('0')))
+        deltas[key] = (count - 1, amount - _amount(old.get(amount_field)))
+    if new:
+        key = tuple(str(new[field]) for field in key_fields)
+        count, amount = deltas.get(key, (0, Decimal('0')))
+        deltas[key] = (count + 1, amount + _amount(new.get(amount_field)))
+    return [key + delta for key, delta in deltas.items() if delta != (0, 0)]
+
+
+def record_invoice_change(old, new):
+    """
+    Apply an invoice write to daily_revenue
+    
+    Args:
+        old: Invoice before the write (invoice_date, total_amount) or None
+        new: Invoice after the write or None
+    """
+    deltas = _deltas(old, new, ('invoice_date',), 'total_amount')
+    db.execute_many(UPSERT_REVENUE_SQL, deltas)
+
+
+def record_challan_change(old, new):
+    """
+    Apply a delivery challan write to daily_deliveries and
+    daily_customer_deliveries
+    
+    Args:
+        old: Challan before the write (delivery_date, customer_id, quantity) or None
+        new: Challan after the write or None
+    """
+    db.execute_many(UPSERT_DELIVERIES_SQL, _deltas(old, new, ('delivery_date',), 'quantity'))
+    db.execute_many(
+        UPSERT_CUSTOMER_DELIVERIES_SQL,
+        _deltas(old, new, ('delivery_date', 'customer_id'), 'quantity')
+    )
+
+
+def rebuild(start_date=None, end_date=None):
+    """
+    Recompute rollup rows from the base tables (backfill or repair)
+    
+    Args:
+        start_date: First day to rebuild (inclusive), default all history
+        end_date: Last day to rebuild (inclusive), default all history
+    
+    Returns:
+        List of results for each statement
+    """
+    where, params = ['1=1'], []
+    if start_date:
+        where.append('{column} >= %s')
+        params.append(start_date)
+    if end_date:
+        where.append('{column} <= %s')
+        params.append(end_date)
+    condition = ' AND '.join(where)
+    
+    def scoped(sql, column):
+        return {'sql': sql.format(where=condition.format(column=column)), 'params': tuple(params)}
+    
+    return db.transaction([
+        scoped('DELETE FROM daily_revenue WHERE {where}', 'rollup_date'),
+        scoped('''INSERT INTO daily_revenue (rollup_date, invoice_count, revenue_total)
+                  SELECT invoice_date, COUNT(*), COALESCE(SUM(total_amount), 0)
+                  FROM sales_invoices WHERE {where}
+                  GROUP BY invoice_date''', 'invoice_date'),
+        scoped('DELETE FROM daily_deliveries WHERE {where}', 'rollup_date'),
+        scoped('''INSERT INTO daily_deliveries (rollup_date, challan_count, quantity_total)
+                  SELECT delivery_date, COUNT(*), COALESCE(SUM(quantity), 0)
+                  FROM delivery_challans WHERE {where}
+                  GROUP BY delivery_date''', 'delivery_date'),
+        scoped('DELETE FROM daily_customer_deliveries WHERE {where}', 'rollup_date'),
+        scoped('''INSERT INTO daily_customer_deliveries (rollup_date, customer_id, challan_count, quantity_total)
+                  SELECT delivery_date, customer_id, COUNT(*), COALESCE(SUM(quantity), 0)
+                  FROM delivery_challans WHERE {where}
+                  GROUP BY delivery_date, customer_id''', 'delivery_date')
+    ])
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Rebuild daily rollup tables from base tables')
+    parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD)')
+    args = parser.parse_args()
+    
+    for result in rebuild(args.start, args.end):
+        print(result)
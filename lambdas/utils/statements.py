@@ -0,0 +1,216 @@
+"""
+Customer Statement Utility
+Invoices and cash book receipts for one customer with a running balance
+
+A statement is one ordered query: invoices (debits) and receipts (cash book
+credits linked to the customer) merged with UNION ALL and carried forward
+with a window SUM, so its cost is one index range scan per source however
+many transactions the customer has. The balance brought forward into a
+statement comes from the newest customer_balance_snapshots row before it
+plus the few transactions since, rather than the customer's whole history.
+
+Snapshots are closing balances per customer and period end, built by
+rebuild_snapshots() (python -m utils.statements --period-end YYYY-MM-DD).
+Writes dated on or before a snapshot drop that customer's later snapshots,
+so a snapshot never disagrees with the rows it summarises.
+"""
+
+from decimal import Decimal
+from . import db
+
+# Statement columns in output order
+STATEMENT_COLUMNS = ['entry_date', 'entry_type', 'reference', 'description', 'debit', 'credit', 'balance']
+
+# Invoices sort before receipts on the same day
+ENTRIES_SQL = '''
+    SELECT invoice_date as entry_date, 'invoice' as entry_type, 0 as sort_order, id as entry_id,
+           invoice_number as reference, notes as description, total_amount as debit, 0 as credit
+    FROM sales_invoices
+    WHERE customer_id = %s{invoice_range}
+    UNION ALL
+    SELECT transaction_date, 'receipt', 1, id,
+           reference_number, description, 0, amount
+    FROM cash_book
+    WHERE customer_id = %s AND transaction_type = 'credit'{receipt_range}
+'''
+
+# Net balance (invoiced minus received) over a date range
+NET_SQL = '''
+    SELECT COALESCE(SUM(amount), 0) as net FROM (
+        SELECT total_amount as amount FROM sales_invoices
+        WHERE customer_id = %s{invoice_range}
+        UNION ALL
+        SELECT -amount FROM cash_book
+        WHERE customer_id = %s AND transaction_type = 'credit'{receipt_range}
+    ) entries
+'''
+
+SNAPSHOT_SQL = '''
+    INSERT INTO customer_balance_snapshots (customer_id, period_end, balance)
+    SELECT customer_id, %s, SUM(amount) FROM (
+        SELECT customer_id, total_amount as amount FROM sales_invoices
+        WHERE invoice_date <= %s{invoice_customer}
+        UNION ALL
+        SELECT customer_id, -amount FROM cash_book
+        WHERE transaction_type = 'credit' AND customer_id IS NOT NULL
+          AND transaction_date <= %s{receipt_customer}
+    ) entries
+    GROUP BY customer_id
+    ON DUPLICATE KEY UPDATE balance = VALUES(balance)
+'''
+
+
+def _ranges(after=None, before=None, start=None, end=None):
+    """
+    Date conditions for both sources of ENTRIES_SQL / NET_SQL
+    
+    Args:
+        after: Exclusive lower bound
+        before: Exclusive upper bound
+        start: Inclusive lower bound
+        end: Inclusive upper bound
+    
+    Returns:
+        Tuple of (format kwargs, params for each source)
+    """
+    bounds = [(op, value) for op, value in (('>', after), ('<', before), ('>=', start), ('<=', end)) if value]
+    params = [value for _, value in bounds]
+    return {
+        'invoice_range': ''.join(f' AND invoice_date {op} %s' for op, _ in bounds),
+        'receipt_range': ''.join(f' AND transaction_date {op} %s' for op, _ in bounds)
+    }, params
+
+
+def opening_balance(customer_id, date_from):
+    """
+    Balance brought forward into a statement starting on date_from
+    
+    Returns:
+        Tuple of (balance, snapshot period_end or None)
+    """
+    snapshot = db.query(
+        '''SELECT period_end, balance FROM customer_balance_snapshots
+           WHERE customer_id = %s AND period_end < %s
+           ORDER BY period_end DESC LIMIT 1''',
+        (customer_id, date_from)
+    )
+    period_end = snapshot[0]['period_end'] if snapshot else None
+    balance = snapshot[0]['balance'] if snapshot else Decimal('0')
+    
+    ranges, params = _ranges(after=period_end, before=date_from)
+    net = db.query(NET_SQL.format(**ranges), (customer_id, *params, customer_id, *params))
+    return balance + Decimal(str(net[0]['net'])), period_end
+
+
+def statement_query(customer_id, date_from=None, date_to=None, opening=Decimal('0')):
+    """
+    Single ordered query for a statement
+    
+    Args:
+        customer_id: Customer
+        date_from: First day (inclusive), default all history
+        date_to: Last day (inclusive), default all history
+        opening: Balance brought forward into date_from
+    
+    Returns:
+        Tuple of (sql, params) selecting STATEMENT_COLUMNS in date order
+    """
+    ranges, params = _ranges(start=date_from, end=date_to)
+    sql = f'''SELECT entry_date, entry_type, reference, description, debit, credit,
+                     %s + SUM(debit - credit) OVER (
+                         ORDER BY entry_date, sort_order, entry_id
+                         ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                     ) as balance
+              FROM ({ENTRIES_SQL.format(**ranges)}) entries
+              ORDER BY entry_date, sort_order, entry_id'''
+    return sql, [opening, customer_id, *params, customer_id, *params]
+
+
+def build(customer_id, date_from=None, date_to=None):
+    """
+    Statement query with its balance brought forward
+    
+    Returns:
+        Tuple of (sql, params, opening balance, snapshot period_end or None)
+    """
+    opening, period_end = opening_balance(customer_id, date_from) if date_from else (Decimal('0'), None)
+    sql, params = statement_query(customer_id, date_from, date_to, opening)
+    return sql, params, opening, period_end
+
+
+def _invalidate(changes):
+    """Drop snapshots at or after the earliest changed date, per customer"""
+    earliest = {}
+    for customer_id, entry_date in changes:
+        if customer_id is None or not entry_date:
+            continue
+        key = str(customer_id)
+        if key not in earliest or str(entry_date) < str(earliest[key][1]):
+            earliest[key] = (customer_id, entry_date)
+    db.execute_many(
+        'DELETE FROM customer_balance_snapshots WHERE customer_id = %s AND period_end >= %s',
+        list(earliest.values())
+    )
+
+
+def record_invoice_change(old, new):
+    """
+    Invalidate snapshots an invoice write affects
+    
+    Args:
+        old: Invoice before the write (customer_id, invoice_date) or None
+        new: Invoice after the write or None
+    """
+    _invalidate(
+        (row.get('customer_id'), row.get('invoice_date')) for row in (old, new) if row
+    )
+
+
+def record_receipt_change(old, new):
+    """
+    Invalidate snapshots a cash book write affects (on_change for cash_book)
+    
+    Args:
+        old: Entry before the write (customer_id, transaction_date) or None
+        new: Entry after the write or None
+    """
+    _invalidate(
+        (row.get('customer_id'), row.get('transaction_date')) for row in (old, new) if row
+    )
+
+
+def rebuild_snapshots(period_end, customer_id=None):
+    """
+    Compute closing balances as of period_end
+    
+    Args:
+        period_end: Last day of the period (inclusive)
+        customer_id: Only this customer, default every customer with activity
+    
+    Returns:
+        Number of affected rows
+    """
+    invoice_customer = receipt_customer = ''
+    invoice_params, receipt_params = [period_end], [period_end]
+    if customer_id is not None:
+        invoice_customer = ' AND customer_id = %s'
+        receipt_customer = ' AND customer_id = %s'
+        invoice_params.append(customer_id)
+        receipt_params.append(customer_id)
+    
+    result = db.execute(
+        SNAPSHOT_SQL.format(invoice_customer=invoice_customer, receipt_customer=receipt_customer),
+        (period_end, *invoice_params, *receipt_params)
+    )
+    return result['affected_rows']
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Build customer balance snapshots')
+    parser.add_argument('--period-end', required=True, help='Last day of the period (YYYY-MM-DD)')
+    parser.add_argument('--customer', type=int, help='Only this customer')
+    args = parser.parse_args()
+    
+    print(rebuild_snapshots(args.period_end, args.customer))
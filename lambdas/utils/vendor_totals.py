@@ -0,0 +1,124 @@
+"""
+Vendor Totals Utility
+Per-vendor purchase and pending-payment totals read by aggregates.by_vendor
+
+Writes to aggregates through the CRUD handler apply signed deltas to
+vendor_aggregate_totals inside the same request transaction, so the vendor
+summary costs one row per vendor regardless of how much purchase history
+the aggregates table holds. Purchases without a vendor are kept under ''
+and reported as vendor_name null.
+"""
+
+from decimal import Decimal
+from . import db
+
+# Purchases with no payment_status count as pending, as they always have
+PENDING_STATUS = 'pending'
+
+UPSERT_SQL = '''
+    INSERT INTO vendor_aggregate_totals (
+        vendor_name, purchase_count, total_quantity, total_amount, pending_count, pending_amount
+    ) VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        purchase_count = purchase_count + VALUES(purchase_count),
+        total_quantity = total_quantity + VALUES(total_quantity),
+        total_amount = total_amount + VALUES(total_amount),
+        pending_count = pending_count + VALUES(pending_count),
+        pending_amount = pending_amount + VALUES(pending_amount)
+'''
+
+SUMMARY_SQL = '''
+    SELECT NULLIF(vendor_name, '') as vendor_name, purchase_count, total_quantity, total_amount,
+           pending_count, pending_amount
+    FROM vendor_aggregate_totals
+    WHERE purchase_count > 0
+    ORDER BY vendor_name
+'''
+
+
+def _amount(value):
+    """Convert a stored or request amount to Decimal (NULL counts as 0)"""
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+
+def is_pending(status):
+    """
+    Whether a payment_status counts as pending
+    
+    Same rule as payment_status = 'pending' OR payment_status IS NULL under
+    the column's _ci collation (case-insensitive, trailing spaces ignored),
+    so incremental deltas agree with rebuild().
+    """
+    return status is None or status.rstrip(' ').lower() == PENDING_STATUS
+
+
+def _movement(row, sign):
+    """Signed (count, quantity, amount, pending count, pending amount) of one purchase"""
+    amount = sign * _amount(row.get('amount'))
+    pending = is_pending(row.get('payment_status'))
+    return (
+        sign,
+        sign * _amount(row.get('quantity')),
+        amount,
+        sign if pending else 0,
+        amount if pending else Decimal('0')
+    )
+
+
+def record_change(old, new):
+    """
+    Apply an aggregates write to vendor_aggregate_totals
+    
+    Args:
+        old: Purchase before the write (vendor_name, quantity, amount, payment_status) or None
+        new: Purchase after the write or None
+    """
+    deltas = {}
+    for row, sign in ((old, -1), (new, 1)):
+        if not row:
+            continue
+        vendor = row.get('vendor_name') or ''
+        totals = deltas.get(vendor, (0, Decimal('0'), Decimal('0'), 0, Decimal('0')))
+        deltas[vendor] = tuple(total + value for total, value in zip(totals, _movement(row, sign)))
+    
+    db.execute_many(UPSERT_SQL, [
+        (vendor,) + totals for vendor, totals in sorted(deltas.items()) if any(totals)
+    ])
+
+
+def summary():
+    """
+    Totals for every vendor with purchases, ordered by vendor name
+    
+    Returns:
+        List of dictionaries with vendor_name, purchase_count, total_quantity,
+        total_amount, pending_count and pending_amount
+    """
+    return db.query(SUMMARY_SQL)
+
+
+def rebuild():
+    """
+    Recompute vendor_aggregate_totals from aggregates (backfill or repair)
+    
+    Returns:
+        List of results for each statement
+    """
+    return db.transaction([
+        {'sql': 'DELETE FROM vendor_aggregate_totals', 'params': ()},
+        {'sql': '''INSERT INTO vendor_aggregate_totals (
+                       vendor_name, purchase_count, total_quantity, total_amount, pending_count, pending_amount
+                   )
+                   SELECT COALESCE(vendor_name, ''), COUNT(*),
+                          COALESCE(SUM(quantity), 0), COALESCE(SUM(amount), 0),
+                          SUM(CASE WHEN payment_status = 'pending' OR payment_status IS NULL THEN 1 ELSE 0 END),
+                          COALESCE(SUM(CASE WHEN payment_status = 'pending' OR payment_status IS NULL
+                                            THEN amount ELSE 0 END), 0)
+                   FROM aggregates
+                   GROUP BY COALESCE(vendor_name, '')''', 'params': ()}
+    ])
+
+
+if __name__ == '__main__':
+    for result in rebuild():
+        print(result)
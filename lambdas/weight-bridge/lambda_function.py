@@ -3,10 +3,19 @@ import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.crud_handler import create_crud_handler
 
-handler = create_crud_handler('weight_bridge_reports')
+handler = create_crud_handler(
+    'weight_bridge_reports',
+    filters={
+        'weighing_date': 'range',
+        'vehicle_number': 'in'
+    },
+    sort_keys=('weighing_date',)
+)
 
 list_reports = handler['list']
+export_reports = handler['export']
 get_report = handler['get_by_id']
 create_report = handler['create']
 update_report = handler['update']
 delete_report = handler['delete']
+bulk_reports = handler['bulk']